@@ -0,0 +1,190 @@
+"""
+ACLED Actor Statistics Index
+
+Pre-aggregates the snapshot to actor_id x inter1 x country x year (actor1 side,
+IDs from the actor dictionary) with event counts and fatality sums. Per-actor
+reports (top actors per type, the countries an actor is active in, the Sankey
+actor selection) are lookups on this index instead of a scan per actor.
+
+Usage:
+    python acled_actors.py build        # actor dictionary first
+    python acled_actor_stats.py build
+
+Weekly updates are folded in by acled_ingest.py via apply_actor_stats_delta.
+"""
+
+import argparse
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from acled_actors import ACTOR_DICTIONARY_PATH, actor_ids, read_actor_dictionary
+from acled_store import ACLED_SNAPSHOT_DIR, acled_year_range, intermediate_path, load_acled, require_artifact
+
+ACTOR_STATS_PATH = intermediate_path / 'acled' / 'actor_stats.parquet'
+
+ACTOR_STATS_KEYS = ['inter1', 'actor_id', 'country', 'year']
+ACTOR_STATS_MEASURES = ['events', 'fatalities']
+
+# Event columns needed to build or update the index
+ACTOR_STATS_SOURCE_COLUMNS = ['actor1', 'inter1', 'country', 'year', 'fatalities']
+
+
+def aggregate_actor_events(events, dictionary):
+    """Aggregate event rows to index grain; actors missing from the dictionary are dropped"""
+    events = events.assign(actor_id=actor_ids(events['actor1'], dictionary))
+    events = events[events['actor_id'] >= 0]
+    stats = events.groupby(ACTOR_STATS_KEYS, observed=True).agg(
+        events=('year', 'size'),
+        fatalities=('fatalities', 'sum')
+    ).reset_index()
+    stats[ACTOR_STATS_MEASURES] = stats[ACTOR_STATS_MEASURES].astype('int32')
+    return stats
+
+
+def _write_actor_stats(stats, path):
+    """Write the index sorted by its keys, so inter1 and actor_id filters skip row groups"""
+    stats = stats.sort_values(ACTOR_STATS_KEYS).reset_index(drop=True)
+    for col in ['inter1', 'country']:
+        stats[col] = stats[col].astype(str)
+    stats['actor_id'] = stats['actor_id'].astype('int32')
+    stats['year'] = stats['year'].astype('int16')
+    pq.write_table(pa.Table.from_pandas(stats[ACTOR_STATS_KEYS + ACTOR_STATS_MEASURES], preserve_index=False),
+                   path, compression='zstd')
+
+
+def build_actor_stats(snapshot_dir=ACLED_SNAPSHOT_DIR, dictionary_path=ACTOR_DICTIONARY_PATH,
+                      path=ACTOR_STATS_PATH):
+    """Build the index from the snapshot one year at a time"""
+    dictionary, _ = read_actor_dictionary(dictionary_path)
+    first_year, last_year = acled_year_range(snapshot_dir)
+    parts = []
+    for year in range(first_year, last_year + 1):
+        events = load_acled(columns=ACTOR_STATS_SOURCE_COLUMNS, years=(year, year), snapshot_dir=snapshot_dir)
+        if len(events):
+            parts.append(aggregate_actor_events(events, dictionary))
+
+    stats = pd.concat(parts, ignore_index=True)
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    _write_actor_stats(stats, path)
+
+    print(f'[OK] Actor stats: {path} ({len(stats):,} rows, {stats["actor_id"].nunique():,} actors)')
+    return path
+
+
+def apply_actor_stats_delta(removed_events, added_events, dictionary_path=ACTOR_DICTIONARY_PATH,
+                            path=ACTOR_STATS_PATH):
+    """
+    Update the index in place for an ingested ACLED delta.
+
+    Like apply_cube_delta: the aggregates of removed_events are subtracted,
+    those of added_events added, and rows that drop to zero events removed.
+    The dictionary must already contain the actors of added_events.
+    """
+    path = require_artifact(path, 'python acled_actor_stats.py build')
+    dictionary, _ = read_actor_dictionary(dictionary_path)
+    parts = [pq.read_table(path).to_pandas()]
+    if len(removed_events):
+        removed = aggregate_actor_events(removed_events, dictionary)
+        removed[ACTOR_STATS_MEASURES] = -removed[ACTOR_STATS_MEASURES]
+        parts.append(removed)
+    if len(added_events):
+        parts.append(aggregate_actor_events(added_events, dictionary))
+
+    for part in parts:
+        for col in ['inter1', 'country']:
+            part[col] = part[col].astype(str)
+    stats = pd.concat(parts, ignore_index=True).groupby(ACTOR_STATS_KEYS)[ACTOR_STATS_MEASURES].sum().reset_index()
+    stats = stats[stats['events'] > 0]
+    _write_actor_stats(stats, path)
+
+    print(f'[OK] Actor stats: {path} ({len(stats):,} rows, {stats["actor_id"].nunique():,} actors)')
+    return path
+
+
+def load_actor_stats(inter1=None, actors=None, dictionary_path=ACTOR_DICTIONARY_PATH, path=ACTOR_STATS_PATH):
+    """
+    Load index rows, optionally only some actor types and actor strings.
+
+    Filters are pushed down into the scan. Adds the actor string next to
+    actor_id; inter1, actor and country come back as plain strings.
+    """
+    path = require_artifact(path, 'python acled_actor_stats.py build')
+    dictionary, _ = read_actor_dictionary(dictionary_path)
+
+    conditions = []
+    if inter1 is not None:
+        conditions.append(ds.field('inter1').isin(list(inter1)))
+    if actors is not None:
+        ids = actor_ids(pd.Series(list(actors), dtype=object), dictionary)
+        conditions.append(ds.field('actor_id').isin([int(i) for i in ids if i >= 0]))
+    filters = None
+    for condition in conditions:
+        filters = condition if filters is None else filters & condition
+
+    stats = pq.read_table(path, filters=filters).to_pandas()
+    stats.insert(2, 'actor', dictionary['actor'].to_numpy()[stats['actor_id'].to_numpy()])
+    return stats
+
+
+def actor_totals(stats):
+    """
+    Per (inter1, actor): total events, fatalities and number of countries.
+
+    Sorted by inter1, then events descending with ties by actor name.
+    """
+    totals = stats.groupby(['inter1', 'actor_id', 'actor']).agg(
+        total_events=('events', 'sum'),
+        fatalities=('fatalities', 'sum'),
+        countries_active=('country', 'nunique')
+    ).reset_index()
+    return totals.sort_values(['inter1', 'total_events', 'actor'], ascending=[True, False, True]).reset_index(drop=True)
+
+
+def top_actors(stats, k):
+    """The k actors with the most events of each actor type (actor_totals rows)"""
+    return actor_totals(stats).groupby('inter1', sort=False).head(k).reset_index(drop=True)
+
+
+def top_actors_by_type(stats, k):
+    """
+    The k actors with the most events of each actor type, as {inter1: [actor, ...]}
+    (the Sankey selection; ties by actor name, like viz_specs.select_top_actors)
+    """
+    top = top_actors(stats, k)
+    return {actor_type: actors.tolist() for actor_type, actors in top.groupby('inter1', sort=False)['actor']}
+
+
+def country_breakdown(stats):
+    """
+    Per (inter1, actor, country): events and fatalities.
+
+    Sorted by inter1 and actor, then events descending with ties by country name,
+    so each actor's countries are one contiguous block, most active first.
+    """
+    countries = stats.groupby(['inter1', 'actor_id', 'actor', 'country'])[ACTOR_STATS_MEASURES].sum().reset_index()
+    return countries.sort_values(['inter1', 'actor_id', 'events', 'country'],
+                                 ascending=[True, True, False, True]).reset_index(drop=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build the ACLED actor statistics index')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    build_parser = subparsers.add_parser('build', help='Aggregate the snapshot into the actor index')
+    build_parser.add_argument('--snapshot', type=Path, default=ACLED_SNAPSHOT_DIR, help='ACLED snapshot directory')
+    build_parser.add_argument('--actors', type=Path, default=ACTOR_DICTIONARY_PATH, help='Actor dictionary')
+    build_parser.add_argument('--out', type=Path, default=ACTOR_STATS_PATH, help='Index output file')
+
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        build_actor_stats(args.snapshot, args.actors, args.out)
+
+
+if __name__ == '__main__':
+    main()
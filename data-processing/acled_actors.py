@@ -0,0 +1,209 @@
+"""
+ACLED Actor Dictionary
+
+Assigns a stable integer ID to every distinct actor string in the snapshot
+(actor1, actor2, assoc_actor_1, assoc_actor_2, and each single name of the
+';'-separated associate actor lists) and resolves the home country in its
+trailing parentheses once per string, e.g.
+
+    'Military Forces of Sudan (2019-)'  -> no home country
+    'Rapid Support Forces (Sudan)'      -> Sudan
+
+Only country names that occur as an event country count as a home country.
+Builders map actor columns to IDs and home countries to integer country codes,
+so cross-border checks are integer comparisons instead of a regex per row.
+
+IDs are stable: rebuilding keeps the existing IDs and appends new strings, and
+acled_ingest.py extends the dictionary with the actors of ingested events.
+
+Usage:
+    python acled_store.py convert   # once per full ACLED export
+    python acled_actors.py build
+"""
+
+import argparse
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from acled_store import ACLED_SNAPSHOT_DIR, acled_year_range, intermediate_path, load_acled, require_artifact
+
+ACTOR_DICTIONARY_PATH = intermediate_path / 'acled' / 'actor_dictionary.parquet'
+
+ACTOR_COLUMNS = ['actor1', 'actor2', 'assoc_actor_1', 'assoc_actor_2']
+
+# Associate actor columns hold ';'-separated lists of actors
+ASSOC_COLUMNS = ['assoc_actor_1', 'assoc_actor_2']
+ASSOC_SEPARATOR = ';'
+
+# Country name in parentheses at the end of an actor string
+HOME_COUNTRY_PATTERN = r'\(([^)]+)\)$'
+
+
+def resolve_home_countries(actors, countries):
+    """Home country of each actor string, or None when its trailing parentheses are not a known country"""
+    extracted = pd.Series(actors, dtype=object).str.extract(HOME_COUNTRY_PATTERN, expand=False)
+    return extracted.where(extracted.isin(countries), None).tolist()
+
+
+def split_actor_lists(values):
+    """
+    Split ';'-separated actor lists (an Arrow string array) into single names.
+
+    Returns (names, parents, positions) as Arrow/NumPy arrays: the stripped,
+    non-empty names, the index of the value each came from and its position
+    within that value's list. Null values yield no names.
+    """
+    if isinstance(values, pa.ChunkedArray):
+        values = values.combine_chunks()
+    lists = pc.split_pattern(values, ASSOC_SEPARATOR)
+    parents = pc.list_parent_indices(lists).to_numpy()
+    offsets = lists.offsets.to_numpy()
+    positions = np.arange(len(parents)) - (offsets[parents] - offsets[0])
+    names = pc.utf8_trim_whitespace(pc.list_flatten(lists))
+    keep = pc.not_equal(names, '').to_numpy(zero_copy_only=False)
+    return names.filter(pa.array(keep)), parents[keep], positions[keep]
+
+
+def assoc_actor_names(values):
+    """Distinct single actor names in a column of associate actor lists"""
+    return set(split_actor_lists(pa.array(list(_distinct(values)), pa.string()))[0].to_pylist())
+
+
+def _distinct(values):
+    """Distinct non-null strings of a column"""
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        return set(values.cat.remove_unused_categories().cat.categories)
+    return set(values.dropna().unique())
+
+
+def _write_dictionary(dictionary, countries, path):
+    """Atomically write the dictionary with the known event countries in the file metadata"""
+    table = pa.Table.from_pandas(dictionary, preserve_index=False)
+    table = table.replace_schema_metadata({
+        **(table.schema.metadata or {}),
+        b'countries': json.dumps(sorted(countries)).encode('utf-8')
+    })
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix('.parquet.tmp')
+    pq.write_table(table, tmp_path, compression='zstd')
+    os.replace(tmp_path, path)
+
+
+def extend_actor_dictionary(actors, countries, path=ACTOR_DICTIONARY_PATH):
+    """
+    Add new actor strings to the dictionary (creating it if needed).
+
+    Existing IDs never change; new strings get the next IDs in sorted order.
+    countries are event countries to add to the known set; home countries of
+    all entries are re-resolved when that set grows. Returns the number of
+    new actors.
+    """
+    path = Path(path)
+    if path.exists():
+        dictionary, known_countries = read_actor_dictionary(path)
+    else:
+        dictionary = pd.DataFrame({'actor_id': pd.Series(dtype='int32'), 'actor': pd.Series(dtype=object),
+                                   'home_country': pd.Series(dtype=object)})
+        known_countries = []
+    countries = set(known_countries) | set(countries)
+
+    new_actors = sorted(set(actors) - set(dictionary['actor']))
+    if not new_actors and len(countries) == len(known_countries) and path.exists():
+        return 0
+
+    added = pd.DataFrame({
+        'actor_id': np.arange(len(dictionary), len(dictionary) + len(new_actors), dtype='int32'),
+        'actor': new_actors,
+    })
+    dictionary = pd.concat([dictionary[['actor_id', 'actor']], added], ignore_index=True)
+    dictionary['home_country'] = resolve_home_countries(dictionary['actor'], countries)
+    _write_dictionary(dictionary, countries, path)
+    return len(new_actors)
+
+
+def build_actor_dictionary(snapshot_dir=ACLED_SNAPSHOT_DIR, path=ACTOR_DICTIONARY_PATH):
+    """Collect every distinct actor string of the snapshot, one year at a time, into the dictionary"""
+    first_year, last_year = acled_year_range(snapshot_dir)
+    actors, countries = set(), set()
+    for year in range(first_year, last_year + 1):
+        events = load_acled(columns=ACTOR_COLUMNS + ['country'], years=(year, year), snapshot_dir=snapshot_dir)
+        for col in ACTOR_COLUMNS:
+            actors |= _distinct(events[col])
+        for col in ASSOC_COLUMNS:
+            actors |= assoc_actor_names(events[col])
+        countries |= _distinct(events['country'])
+
+    added = extend_actor_dictionary(actors, countries, path)
+    dictionary, _ = read_actor_dictionary(path)
+    resolved = dictionary['home_country'].notna().sum()
+    print(f'[OK] Actor dictionary: {path} ({len(dictionary):,} actors, {added:,} new, '
+          f'{resolved:,} with a home country)')
+    return path
+
+
+def read_actor_dictionary(path=ACTOR_DICTIONARY_PATH):
+    """
+    Load the actor dictionary and its known event countries.
+
+    Returns a frame ordered by actor_id (so actor_id is also the row position)
+    with actor and home_country columns, and the sorted country list.
+    """
+    path = require_artifact(path, 'python acled_actors.py build')
+    table = pq.read_table(path)
+    countries = json.loads(table.schema.metadata[b'countries'])
+    dictionary = table.to_pandas().sort_values('actor_id').reset_index(drop=True)
+    dictionary['actor'] = dictionary['actor'].astype(object)
+    dictionary['home_country'] = dictionary['home_country'].astype(object).where(dictionary['home_country'].notna(), None)
+    return dictionary, countries
+
+
+def _codes(values, index):
+    """Positions of values in index (-1 where missing or unknown), resolving each distinct value once"""
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        codes, uniques = values.cat.codes.to_numpy(), values.cat.categories
+    else:
+        codes, uniques = pd.factorize(values)
+    positions = np.append(index.get_indexer(uniques), -1).astype('int32')
+    return positions[codes]
+
+
+def actor_ids(values, dictionary):
+    """Integer actor IDs of a column of actor strings (-1 where missing or not in the dictionary)"""
+    return _codes(values, pd.Index(dictionary['actor']))
+
+
+def country_codes(values, countries):
+    """Integer codes of a column of country names: positions in countries, -1 where missing or unknown"""
+    return _codes(values, pd.Index(countries))
+
+
+def home_country_codes(ids, dictionary, countries):
+    """Country codes (see country_codes) of the home countries of actor IDs, -1 where there is none"""
+    home_codes = np.append(country_codes(dictionary['home_country'], countries), -1).astype('int32')
+    return home_codes[ids]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build the ACLED actor dictionary')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    build_parser = subparsers.add_parser('build', help='Assign IDs and home countries to all actor strings')
+    build_parser.add_argument('--snapshot', type=Path, default=ACLED_SNAPSHOT_DIR, help='ACLED snapshot directory')
+    build_parser.add_argument('--out', type=Path, default=ACTOR_DICTIONARY_PATH, help='Dictionary file')
+
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        build_actor_dictionary(args.snapshot, args.out)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,204 @@
+"""
+ACLED Associate Actor Bridge
+
+assoc_actor_1 and assoc_actor_2 hold ';'-separated lists of actors. This table
+explodes them once into one row per (event, side, associate actor) with integer
+IDs from the actor dictionary, stored beside the snapshot with one file per
+year (intermediate/acled/assoc_actors/assoc_YYYY.parquet):
+
+    event_id_cnty | year | side (1 or 2) | position (in the list) | actor_id
+
+Associate actor counts and co-occurrences are then groupbys and joins on this
+table instead of splitting strings per row.
+
+Usage:
+    python acled_actors.py build        # actor dictionary first
+    python acled_assoc.py build
+
+acled_ingest.py rewrites the bridge files of the years it touches.
+"""
+
+import argparse
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from acled_actors import (
+    ACTOR_DICTIONARY_PATH, ASSOC_COLUMNS, actor_ids, extend_actor_dictionary, read_actor_dictionary,
+    split_actor_lists
+)
+from acled_store import ACLED_SNAPSHOT_DIR, acled_year_range, intermediate_path, require_artifact, year_file_path
+
+ASSOC_BRIDGE_DIR = intermediate_path / 'acled' / 'assoc_actors'
+
+ASSOC_BRIDGE_SCHEMA = pa.schema([
+    ('event_id_cnty', pa.string()),
+    ('year', pa.int16()),
+    ('side', pa.int8()),
+    ('position', pa.int16()),
+    ('actor_id', pa.int32()),
+])
+
+
+def bridge_file_path(year, bridge_dir=ASSOC_BRIDGE_DIR):
+    """Path of the bridge file for one snapshot year"""
+    return Path(bridge_dir) / f'assoc_{year}.parquet'
+
+
+def _bridge_year(path):
+    """Year of a bridge file"""
+    return int(path.stem.split('_')[1])
+
+
+def explode_assoc_actors(events):
+    """
+    Split the associate actor lists of an Arrow table of events.
+
+    Returns one frame per side with event_id_cnty, year, side, position and the
+    single actor name, in event order.
+    """
+    parts = []
+    for side, col in enumerate(ASSOC_COLUMNS, start=1):
+        names, parents, positions = split_actor_lists(events.column(col))
+        parts.append(pd.DataFrame({
+            'event_id_cnty': events.column('event_id_cnty').take(pa.array(parents)).to_numpy(zero_copy_only=False),
+            'year': events.column('year').take(pa.array(parents)).to_numpy(),
+            'side': np.int8(side),
+            'position': positions.astype('int16'),
+            'actor': names.to_numpy(zero_copy_only=False),
+        }))
+    return pd.concat(parts, ignore_index=True)
+
+
+def _read_year_events(year, snapshot_dir):
+    """The bridge source columns of one snapshot year"""
+    return pq.read_table(year_file_path(year, snapshot_dir), columns=['event_id_cnty', 'year'] + ASSOC_COLUMNS)
+
+
+def _write_bridge(exploded, dictionary, path):
+    """Map names to actor IDs and atomically write one bridge file (side, then event order)"""
+    bridge = exploded.assign(actor_id=actor_ids(exploded['actor'], dictionary))
+    missing = int((bridge['actor_id'] < 0).sum())
+    if missing:
+        raise ValueError(f'{missing:,} associate actors are not in the actor dictionary')
+    bridge = bridge.sort_values('side', kind='stable')
+    table = pa.Table.from_pandas(bridge[ASSOC_BRIDGE_SCHEMA.names], schema=ASSOC_BRIDGE_SCHEMA, preserve_index=False)
+    tmp_path = Path(path).with_suffix('.parquet.tmp')
+    pq.write_table(table, tmp_path, compression='zstd')
+    os.replace(tmp_path, path)
+
+
+def build_assoc_bridge(snapshot_dir=ACLED_SNAPSHOT_DIR, dictionary_path=ACTOR_DICTIONARY_PATH,
+                       bridge_dir=ASSOC_BRIDGE_DIR):
+    """Explode every snapshot year into the bridge, adding unseen names to the dictionary"""
+    first_year, last_year = acled_year_range(snapshot_dir)
+    exploded = {}
+    for year in range(first_year, last_year + 1):
+        if year_file_path(year, snapshot_dir).exists():
+            exploded[year] = explode_assoc_actors(_read_year_events(year, snapshot_dir))
+
+    names = set()
+    for frame in exploded.values():
+        names.update(frame['actor'].unique())
+    added = extend_actor_dictionary(names, [], dictionary_path)
+    dictionary, _ = read_actor_dictionary(dictionary_path)
+
+    bridge_dir = Path(bridge_dir)
+    bridge_dir.mkdir(parents=True, exist_ok=True)
+    for stale in bridge_dir.glob('assoc_*.parquet'):
+        stale.unlink()
+    for year, frame in exploded.items():
+        _write_bridge(frame, dictionary, bridge_file_path(year, bridge_dir))
+
+    rows = sum(len(frame) for frame in exploded.values())
+    print(f'[OK] Associate actor bridge: {bridge_dir} ({rows:,} rows, {len(names):,} actors, '
+          f'{added:,} new in the dictionary)')
+    return bridge_dir
+
+
+def update_assoc_bridge(years, snapshot_dir=ACLED_SNAPSHOT_DIR, dictionary_path=ACTOR_DICTIONARY_PATH,
+                        bridge_dir=ASSOC_BRIDGE_DIR):
+    """Rewrite the bridge files of the given (ingested) years from the snapshot"""
+    dictionary, _ = read_actor_dictionary(dictionary_path)
+    for year in sorted(years):
+        path = bridge_file_path(year, bridge_dir)
+        if year_file_path(year, snapshot_dir).exists():
+            _write_bridge(explode_assoc_actors(_read_year_events(year, snapshot_dir)), dictionary, path)
+        elif path.exists():
+            path.unlink()
+    print(f'[OK] Associate actor bridge: {len(years)} year files rewritten')
+
+
+def load_assoc_bridge(years=None, sides=None, bridge_dir=ASSOC_BRIDGE_DIR):
+    """
+    Load bridge rows, optionally only some years (inclusive (start, end) tuple,
+    either end may be None) and sides (1 and/or 2).
+
+    Rows keep the snapshot event order within each year and side.
+    """
+    bridge_dir = require_artifact(bridge_dir, 'python acled_assoc.py build')
+    paths = sorted(bridge_dir.glob('assoc_*.parquet'), key=_bridge_year)
+    if years is not None:
+        start, end = years
+        paths = [p for p in paths
+                 if (start is None or _bridge_year(p) >= start) and (end is None or _bridge_year(p) <= end)]
+    filters = [('side', 'in', [int(s) for s in sides])] if sides is not None else None
+    tables = [pq.read_table(p, filters=filters) for p in paths]
+    return pa.concat_tables(tables).to_pandas() if tables else ASSOC_BRIDGE_SCHEMA.empty_table().to_pandas()
+
+
+def assoc_actor_counts(bridge, dictionary):
+    """
+    Mentions per associate actor, most frequent first.
+
+    Ties keep the order in which actors first appear in the bridge, like
+    collections.Counter.most_common over the split lists.
+    """
+    ids, first_row, mentions = np.unique(bridge['actor_id'].to_numpy(), return_index=True, return_counts=True)
+    order = np.lexsort((first_row, -mentions))
+    return pd.DataFrame({
+        'actor_id': ids[order],
+        'actor': dictionary['actor'].to_numpy()[ids[order]],
+        'mentions': mentions[order],
+    })
+
+
+def assoc_cooccurrence(bridge, dictionary):
+    """
+    Events per pair of associate actors named together in one event.
+
+    A self-join of the bridge on event_id_cnty; each unordered pair is counted
+    once per event (actor_a has the lower ID). Most frequent pairs first.
+    """
+    members = bridge[['event_id_cnty', 'actor_id']].drop_duplicates()
+    pairs = members.merge(members, on='event_id_cnty', suffixes=('_a', '_b'))
+    pairs = pairs[pairs['actor_id_a'] < pairs['actor_id_b']]
+    counts = pairs.groupby(['actor_id_a', 'actor_id_b']).size().rename('events').reset_index()
+    counts = counts.sort_values(['events', 'actor_id_a', 'actor_id_b'], ascending=[False, True, True])
+    names = dictionary['actor'].to_numpy()
+    counts['actor_a'] = names[counts['actor_id_a'].to_numpy()]
+    counts['actor_b'] = names[counts['actor_id_b'].to_numpy()]
+    return counts[['actor_id_a', 'actor_a', 'actor_id_b', 'actor_b', 'events']].reset_index(drop=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build the ACLED associate actor bridge table')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    build_parser = subparsers.add_parser('build', help='Explode the associate actor lists of the snapshot')
+    build_parser.add_argument('--snapshot', type=Path, default=ACLED_SNAPSHOT_DIR, help='ACLED snapshot directory')
+    build_parser.add_argument('--actors', type=Path, default=ACTOR_DICTIONARY_PATH, help='Actor dictionary')
+    build_parser.add_argument('--out', type=Path, default=ASSOC_BRIDGE_DIR, help='Bridge output directory')
+
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        build_assoc_bridge(args.snapshot, args.actors, args.out)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+"""
+ACLED Conflict Cube
+
+Pre-aggregates the ACLED snapshot to country x year x month x event_type x
+sub_event_type with event counts and fatality sums. Country-level charts
+(viz1, viz3, viz4, viz5, viz6, viz8) read this cube instead of the 2.37M
+event rows.
+
+Usage:
+    python acled_store.py convert   # once per full ACLED export
+    python acled_cube.py build
+
+Weekly updates are folded in by acled_ingest.py via apply_cube_delta.
+"""
+
+import argparse
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from acled_store import (
+    ACLED_SNAPSHOT_DIR, acled_filter, acled_year_range, intermediate_path,
+    load_acled, read_parquet_frame, require_artifact
+)
+
+CUBE_PATH = intermediate_path / 'acled' / 'conflict_cube.parquet'
+
+CUBE_KEYS = ['country', 'year', 'month', 'event_type', 'sub_event_type']
+CUBE_MEASURES = ['event_count', 'fatalities']
+
+
+def aggregate_events(events):
+    """Aggregate event-level rows to cube grain"""
+    events = events.assign(month=events['event_date'].dt.month.astype('int8'))
+    cube = events.groupby(CUBE_KEYS, observed=True).agg(
+        event_count=('event_date', 'size'),
+        fatalities=('fatalities', 'sum')
+    ).reset_index()
+    cube['event_count'] = cube['event_count'].astype('int32')
+    cube['fatalities'] = cube['fatalities'].astype('int32')
+    return cube
+
+
+def _write_cube(cube, cube_path):
+    """Write the cube sorted by its keys, dimension columns stored as plain strings"""
+    cube = cube.sort_values(CUBE_KEYS).reset_index(drop=True)
+    for col in ['country', 'event_type', 'sub_event_type']:
+        cube[col] = cube[col].astype(str)
+    pq.write_table(pa.Table.from_pandas(cube, preserve_index=False), cube_path, compression='zstd')
+
+
+def build_conflict_cube(snapshot_dir=ACLED_SNAPSHOT_DIR, cube_path=CUBE_PATH):
+    """Build the cube from the snapshot one year at a time"""
+    first_year, last_year = acled_year_range(snapshot_dir)
+    parts = []
+    for year in range(first_year, last_year + 1):
+        events = load_acled(
+            columns=['country', 'year', 'event_date', 'event_type', 'sub_event_type', 'fatalities'],
+            years=(year, year),
+            snapshot_dir=snapshot_dir
+        )
+        if len(events):
+            parts.append(aggregate_events(events))
+
+    cube = pd.concat(parts, ignore_index=True)
+    cube_path = Path(cube_path)
+    cube_path.parent.mkdir(parents=True, exist_ok=True)
+    _write_cube(cube, cube_path)
+
+    print(f'[OK] Conflict cube: {cube_path} ({len(cube):,} cells, {cube["event_count"].sum():,} events)')
+    return cube_path
+
+
+def apply_cube_delta(removed_events, added_events, cube_path=CUBE_PATH):
+    """
+    Update the cube in place for an ingested ACLED delta.
+
+    removed_events are the old versions of changed and deleted events,
+    added_events the new and changed events. Their aggregates are subtracted
+    and added cell by cell, and cells that drop to zero events are removed.
+    """
+    cube_path = require_artifact(cube_path, 'python acled_cube.py build')
+    parts = [pq.read_table(cube_path).to_pandas()]
+    if len(removed_events):
+        removed = aggregate_events(removed_events)
+        removed[CUBE_MEASURES] = -removed[CUBE_MEASURES]
+        parts.append(removed)
+    if len(added_events):
+        parts.append(aggregate_events(added_events))
+
+    for part in parts:
+        for col in ['country', 'event_type', 'sub_event_type']:
+            part[col] = part[col].astype(str)
+    cube = pd.concat(parts, ignore_index=True).groupby(CUBE_KEYS)[CUBE_MEASURES].sum().reset_index()
+    cube = cube[cube['event_count'] > 0]
+    cube[CUBE_MEASURES] = cube[CUBE_MEASURES].astype('int32')
+    _write_cube(cube, cube_path)
+
+    print(f'[OK] Conflict cube: {cube_path} ({len(cube):,} cells, {cube["event_count"].sum():,} events)')
+    return cube_path
+
+
+def load_conflict_cube(columns=None, years=None, countries=None, event_types=None,
+                       cube_path=CUBE_PATH):
+    """
+    Load the conflict cube, optionally filtered like load_acled.
+
+    Dimension columns are categoricals; group by them with observed=True.
+    """
+    cube_path = require_artifact(cube_path, 'python acled_cube.py build')
+    return read_parquet_frame(cube_path, columns, acled_filter(years, countries, event_types))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build the ACLED conflict cube')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    build_parser = subparsers.add_parser('build', help='Aggregate the snapshot into the cube')
+    build_parser.add_argument('--snapshot', type=Path, default=ACLED_SNAPSHOT_DIR, help='ACLED snapshot directory')
+    build_parser.add_argument('--out', type=Path, default=CUBE_PATH, help='Cube output file')
+
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        build_conflict_cube(args.snapshot, args.out)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,205 @@
+"""
+ACLED Incremental Ingestion
+
+Folds a weekly ACLED update into the columnar snapshot and the conflict cube
+without re-converting the full export. Events are matched by event_id_cnty:
+
+- added:   id not in the snapshot yet
+- changed: id present with a different `timestamp` (ACLED's last-modified stamp)
+- deleted: id listed in the deleted-events export, or (snapshot mode) missing
+           from the newer full export
+
+Only the snapshot years that contain added, changed or deleted events are
+rewritten, and the cube is adjusted by the aggregates of the removed and added
+rows, so a weekly refresh costs O(changed events) plus the touched year files.
+New actor strings are appended to the actor dictionary, the actor statistics
+index is adjusted like the cube and the associate actor bridge files of the
+touched years are rewritten, if they have been built.
+
+Usage:
+    python acled_ingest.py delta PATH [--deleted PATH]   # delta export (+ deleted ids)
+    python acled_ingest.py snapshot PATH                 # newer full export
+"""
+
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from acled_actor_stats import ACTOR_STATS_PATH, ACTOR_STATS_SOURCE_COLUMNS, apply_actor_stats_delta
+from acled_actors import ACTOR_COLUMNS, ACTOR_DICTIONARY_PATH, ASSOC_COLUMNS, extend_actor_dictionary, split_actor_lists
+from acled_assoc import ASSOC_BRIDGE_DIR, update_assoc_bridge
+from acled_cube import CUBE_PATH, apply_cube_delta
+from acled_store import (
+    ACLED_SCHEMA, ACLED_SNAPSHOT_DIR, iter_acled_csv, require_artifact,
+    write_year_file, year_file_path
+)
+
+# Columns needed to update the conflict cube and the actor statistics index
+CUBE_SOURCE_COLUMNS = ['country', 'year', 'event_date', 'event_type', 'sub_event_type', 'fatalities']
+DELTA_COLUMNS = CUBE_SOURCE_COLUMNS + [col for col in ACTOR_STATS_SOURCE_COLUMNS if col not in CUBE_SOURCE_COLUMNS]
+
+# Stands in for a missing timestamp when comparing the export with the snapshot
+NULL_TIMESTAMP = -1
+
+
+def load_snapshot_keys(snapshot_dir=ACLED_SNAPSHOT_DIR):
+    """Read the (event_id_cnty, timestamp, year) key columns of the snapshot (empty for a fresh snapshot)"""
+    snapshot_dir = require_artifact(snapshot_dir)
+    key_schema = pa.schema([ACLED_SCHEMA.field(col) for col in ['event_id_cnty', 'timestamp', 'year']])
+    if any(snapshot_dir.glob('*.parquet')):
+        keys = pq.read_table(snapshot_dir, columns=key_schema.names).to_pandas()
+    else:
+        keys = key_schema.empty_table().to_pandas()
+    return keys.drop_duplicates('event_id_cnty', keep='last').set_index('event_id_cnty')
+
+
+def collect_upserts(csv_path, existing):
+    """
+    Stream an ACLED export and keep only rows that are new or changed.
+
+    Returns the upsert rows as an Arrow table (one row per id, latest timestamp
+    wins) and a boolean mask over `existing` marking the ids seen in the export.
+    """
+    seen = np.zeros(len(existing), dtype=bool)
+    # Missing timestamps compare equal (NaN never equals NaN, so they would always look changed)
+    existing_timestamps = existing['timestamp'].fillna(NULL_TIMESTAMP).to_numpy('int64')
+    parts = []
+    for table in iter_acled_csv(csv_path):
+        ids = table.column('event_id_cnty').to_pandas()
+        positions = existing.index.get_indexer(ids)
+        seen[positions[positions >= 0]] = True
+
+        # Position -1 (id not in the snapshot) picks the appended placeholder, so this also works
+        # when the snapshot is empty
+        old_timestamps = np.append(existing_timestamps, NULL_TIMESTAMP)[positions]
+        new_timestamps = pc.fill_null(table.column('timestamp'), NULL_TIMESTAMP).to_numpy()
+        upsert = (positions < 0) | (old_timestamps != new_timestamps)
+        if upsert.any():
+            parts.append(table.filter(pa.array(upsert)))
+
+    if not parts:
+        return ACLED_SCHEMA.empty_table(), seen
+
+    upserts = pa.concat_tables(parts)
+    if pc.count_distinct(upserts.column('event_id_cnty')).as_py() < upserts.num_rows:
+        df = upserts.to_pandas().sort_values('timestamp', kind='stable')
+        df = df.drop_duplicates('event_id_cnty', keep='last')
+        upserts = pa.Table.from_pandas(df, schema=ACLED_SCHEMA, preserve_index=False)
+    return upserts, seen
+
+
+def apply_changes(upserts, deleted_ids, existing, snapshot_dir=ACLED_SNAPSHOT_DIR, cube_path=CUBE_PATH,
+                  dictionary_path=ACTOR_DICTIONARY_PATH, stats_path=ACTOR_STATS_PATH, bridge_dir=ASSOC_BRIDGE_DIR):
+    """
+    Rewrite the affected snapshot years, update the conflict cube, the actor
+    dictionary and statistics index and the associate actor bridge.
+
+    upserts are the new and changed rows; deleted_ids the ids to drop.
+    """
+    upsert_ids = upserts.column('event_id_cnty').to_pandas()
+    deleted_ids = pd.Index(deleted_ids).difference(upsert_ids)
+    replaced_ids = pd.Index(upsert_ids).intersection(existing.index)
+    remove_ids = deleted_ids.intersection(existing.index).union(replaced_ids)
+
+    upsert_years = upserts.column('year').to_numpy()
+    affected_years = set(existing.loc[remove_ids, 'year'].tolist()) | set(upsert_years.tolist())
+
+    removed_parts, added_parts = [], []
+    for year in sorted(affected_years):
+        path = year_file_path(year, snapshot_dir)
+        old = pq.read_table(path, schema=ACLED_SCHEMA) if path.exists() else ACLED_SCHEMA.empty_table()
+        remove_mask = pc.is_in(old.column('event_id_cnty'), value_set=pa.array(list(remove_ids), pa.string()))
+        removed = old.filter(remove_mask)
+        added = upserts.filter(pa.array(upsert_years == year))
+        table = pa.concat_tables([old.filter(pc.invert(remove_mask)), added])
+
+        if table.num_rows:
+            write_year_file(table, path)
+        elif path.exists():
+            path.unlink()
+        removed_parts.append(removed.select(DELTA_COLUMNS))
+        added_parts.append(added.select(DELTA_COLUMNS))
+        print(f'  {year}: -{removed.num_rows:,} +{added.num_rows:,} events')
+
+    removed_events = pa.concat_tables(removed_parts).to_pandas() if removed_parts else None
+    added_events = pa.concat_tables(added_parts).to_pandas() if added_parts else None
+    if Path(cube_path).exists() and affected_years:
+        apply_cube_delta(removed_events[CUBE_SOURCE_COLUMNS], added_events[CUBE_SOURCE_COLUMNS], cube_path)
+
+    if Path(dictionary_path).exists() and upserts.num_rows:
+        actors = set()
+        for col in ACTOR_COLUMNS:
+            actors |= set(pc.unique(upserts.column(col).drop_null()).to_pylist())
+        for col in ASSOC_COLUMNS:
+            actors |= set(pc.unique(split_actor_lists(upserts.column(col))[0]).to_pylist())
+        countries = pc.unique(upserts.column('country').drop_null()).to_pylist()
+        added_actors = extend_actor_dictionary(actors, countries, dictionary_path)
+        print(f'[OK] Actor dictionary: {added_actors:,} new actors')
+
+    if Path(stats_path).exists() and Path(dictionary_path).exists() and affected_years:
+        apply_actor_stats_delta(removed_events, added_events, dictionary_path, stats_path)
+
+    if Path(bridge_dir).exists() and Path(dictionary_path).exists() and affected_years:
+        update_assoc_bridge(affected_years, snapshot_dir, dictionary_path, bridge_dir)
+
+    added_count = len(pd.Index(upsert_ids).difference(existing.index))
+    print(f'[OK] Ingested: {added_count:,} added, {len(replaced_ids):,} changed, '
+          f'{len(deleted_ids.intersection(existing.index)):,} deleted '
+          f'({len(affected_years)} year files rewritten)')
+
+
+def ingest_delta(csv_path, deleted_path=None, snapshot_dir=ACLED_SNAPSHOT_DIR, cube_path=CUBE_PATH,
+                 dictionary_path=ACTOR_DICTIONARY_PATH, stats_path=ACTOR_STATS_PATH, bridge_dir=ASSOC_BRIDGE_DIR):
+    """Ingest a delta export; deletions come from a CSV with an event_id_cnty column"""
+    existing = load_snapshot_keys(snapshot_dir)
+    upserts, _ = collect_upserts(csv_path, existing)
+    deleted_ids = []
+    if deleted_path is not None:
+        deleted_ids = pd.read_csv(deleted_path, usecols=['event_id_cnty'], dtype=str)['event_id_cnty']
+    apply_changes(upserts, deleted_ids, existing, snapshot_dir, cube_path, dictionary_path, stats_path, bridge_dir)
+
+
+def ingest_snapshot(csv_path, snapshot_dir=ACLED_SNAPSHOT_DIR, cube_path=CUBE_PATH,
+                    dictionary_path=ACTOR_DICTIONARY_PATH, stats_path=ACTOR_STATS_PATH, bridge_dir=ASSOC_BRIDGE_DIR):
+    """Ingest a newer full export; snapshot ids missing from it are deleted"""
+    existing = load_snapshot_keys(snapshot_dir)
+    upserts, seen = collect_upserts(csv_path, existing)
+    apply_changes(upserts, existing.index[~seen], existing, snapshot_dir, cube_path, dictionary_path, stats_path,
+                  bridge_dir)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Ingest an ACLED update into the snapshot')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    delta_parser = subparsers.add_parser('delta', help='Apply a delta export of added/changed events')
+    delta_parser.add_argument('csv', type=Path, help='Delta export CSV')
+    delta_parser.add_argument('--deleted', type=Path, help='CSV of deleted events (event_id_cnty column)')
+
+    snapshot_parser = subparsers.add_parser('snapshot', help='Diff a newer full export against the snapshot')
+    snapshot_parser.add_argument('csv', type=Path, help='Full export CSV')
+
+    for sub in (delta_parser, snapshot_parser):
+        sub.add_argument('--snapshot-dir', type=Path, default=ACLED_SNAPSHOT_DIR, help='ACLED snapshot directory')
+        sub.add_argument('--cube', type=Path, default=CUBE_PATH, help='Conflict cube to update')
+        sub.add_argument('--actors', type=Path, default=ACTOR_DICTIONARY_PATH, help='Actor dictionary to extend')
+        sub.add_argument('--actor-stats', type=Path, default=ACTOR_STATS_PATH, help='Actor statistics index to update')
+        sub.add_argument('--assoc-bridge', type=Path, default=ASSOC_BRIDGE_DIR, help='Associate actor bridge to update')
+
+    args = parser.parse_args()
+
+    print(f'Ingesting {args.csv}...')
+    if args.command == 'delta':
+        ingest_delta(args.csv, args.deleted, args.snapshot_dir, args.cube, args.actors, args.actor_stats,
+                     args.assoc_bridge)
+    elif args.command == 'snapshot':
+        ingest_snapshot(args.csv, args.snapshot_dir, args.cube, args.actors, args.actor_stats, args.assoc_bridge)
+
+
+if __name__ == '__main__':
+    main()
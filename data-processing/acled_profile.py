@@ -0,0 +1,248 @@
+"""
+ACLED Column Profiling
+
+Profiles any set of snapshot columns, one column per worker of a process pool:
+non-null and distinct counts, the top-N values, list detection (';'-separated
+columns such as assoc_actor_1 are counted per element) and a suggested dtype.
+Counts are Arrow value counts over the column, dictionary-encoded for the
+categorical columns, so a full profile takes seconds instead of a Python
+Counter per column.
+
+Writes a Markdown report and the same profile as JSON.
+
+Usage:
+    python acled_profile.py profile                              # all columns
+    python acled_profile.py profile --columns actor1 assoc_actor_1 --top 50 --jobs 4
+"""
+
+import argparse
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from acled_actors import ASSOC_COLUMNS, ASSOC_SEPARATOR, split_actor_lists
+from acled_store import ACLED_SCHEMA, ACLED_SNAPSHOT_DIR, CATEGORICAL_COLUMNS, intermediate_path, require_artifact
+
+PROFILE_MD_PATH = intermediate_path / 'acled' / 'profile.md'
+PROFILE_JSON_PATH = intermediate_path / 'acled' / 'profile.json'
+
+PROFILE_TOP_N = 20
+
+# A text column is a list when the elements of its ';'-separated values recur
+# across values or mostly occur as values on their own (true for assoc_actor_*,
+# disorder_type, source, tags, but not for free text such as notes)
+LIST_ELEMENT_SHARE = 0.5
+
+# Suggest a categorical when at most this share of the non-null values is distinct
+CATEGORY_DISTINCT_SHARE = 0.5
+
+INTEGER_TYPES = [('int8', np.int8), ('int16', np.int16), ('int32', np.int32), ('int64', np.int64)]
+
+
+def _read_column(column, snapshot_dir):
+    """One snapshot column as a single Arrow array (dictionary-encoded for categorical columns)"""
+    table = pq.read_table(snapshot_dir, columns=[column],
+                          read_dictionary=[column] if column in CATEGORICAL_COLUMNS else None)
+    return table.column(column).combine_chunks()
+
+
+def _ranked(values, counts):
+    """(values, counts) by count descending; ties keep their first-occurrence order"""
+    order = np.argsort(-counts, kind='stable')
+    return values[order], counts[order]
+
+
+def _is_list_column(distinct):
+    """Whether the ';'-separated elements of a text column recur or occur as values of their own"""
+    multi = distinct.filter(pc.match_substring(distinct, ASSOC_SEPARATOR))
+    if not len(multi):
+        return False
+    elements = split_actor_lists(multi)[0]
+    if not len(elements):
+        return False
+    recurring = pc.count_distinct(elements).as_py() <= LIST_ELEMENT_SHARE * len(elements)
+    standalone = pc.mean(pc.is_in(elements, value_set=distinct)).as_py() > LIST_ELEMENT_SHARE
+    return recurring or standalone
+
+
+def _integer_type(low, high, nullable):
+    """Smallest integer dtype holding [low, high] (pandas nullable spelling when there are nulls)"""
+    for name, numpy_type in INTEGER_TYPES:
+        info = np.iinfo(numpy_type)
+        if info.min <= low and high <= info.max:
+            return name.capitalize() if nullable else name
+    return 'Int64' if nullable else 'int64'
+
+
+def suggest_dtype(column_type, non_null, distinct, is_list, low=None, high=None, integral=False, has_nulls=False):
+    """Narrowest sensible pandas dtype for a profiled column"""
+    if non_null == 0:
+        return 'null'
+    if is_list:
+        return 'list<category>' if distinct <= CATEGORY_DISTINCT_SHARE * non_null else 'list<string>'
+    if pa.types.is_string(column_type) or pa.types.is_dictionary(column_type):
+        return 'category' if distinct <= CATEGORY_DISTINCT_SHARE * non_null else 'string'
+    if pa.types.is_integer(column_type) or (pa.types.is_floating(column_type) and integral):
+        return _integer_type(low, high, has_nulls)
+    if pa.types.is_floating(column_type):
+        return 'float32' if pa.types.is_float32(column_type) else 'float64'
+    if pa.types.is_timestamp(column_type):
+        return 'datetime64[ms]'
+    return str(column_type)
+
+
+def _json_value(value):
+    """A top value as a JSON scalar"""
+    if isinstance(value, (pd.Timestamp, np.datetime64)):
+        return pd.Timestamp(value).isoformat()
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def profile_column(column, top_n=PROFILE_TOP_N, snapshot_dir=ACLED_SNAPSHOT_DIR):
+    """
+    Profile one snapshot column.
+
+    Returns a dict with the stored dtype, non-null and distinct counts, whether
+    it is a ';'-separated list (then distinct and top count list elements),
+    the top_n values with counts and a suggested dtype.
+    """
+    values = _read_column(column, snapshot_dir)
+    non_null = len(values) - values.null_count
+    counts = pc.value_counts(values.drop_null())
+    distinct_values, distinct_counts = counts.field('values'), counts.field('counts').to_numpy()
+    if pa.types.is_dictionary(distinct_values.type):
+        distinct_values = distinct_values.cast(distinct_values.type.value_type)
+
+    is_list = pa.types.is_string(distinct_values.type) and (column in ASSOC_COLUMNS or _is_list_column(distinct_values))
+    low = high = None
+    integral = False
+    if is_list:
+        # Each list element counts once per occurrence, weighted by how often its list occurs
+        elements, parents, _ = split_actor_lists(distinct_values)
+        element_counts = pd.Series(distinct_counts[parents]).groupby(
+            elements.to_numpy(zero_copy_only=False), sort=False).sum()
+        top_values, top_counts = _ranked(element_counts.index.to_numpy(), element_counts.to_numpy())
+    else:
+        top_values, top_counts = _ranked(distinct_values.to_numpy(zero_copy_only=False), distinct_counts)
+        if non_null and (pa.types.is_integer(values.type) or pa.types.is_floating(values.type)):
+            low, high = pc.min(values).as_py(), pc.max(values).as_py()
+            integral = pa.types.is_integer(values.type) or bool(
+                pc.all(pc.equal(pc.floor(values), values)).as_py())
+
+    stored_type = values.type.value_type if pa.types.is_dictionary(values.type) else values.type
+    return {
+        'column': column,
+        'dtype': 'category' if column in CATEGORICAL_COLUMNS else str(stored_type),
+        'non_null': int(non_null),
+        'distinct': int(len(top_values)),
+        'is_list': bool(is_list),
+        'min': _json_value(low),
+        'max': _json_value(high),
+        'suggested_dtype': suggest_dtype(values.type, non_null, len(top_values), is_list, low, high, integral,
+                                         values.null_count > 0),
+        'top': [[_json_value(v), int(c)] for v, c in zip(top_values[:top_n], top_counts[:top_n])],
+    }
+
+
+def profile_columns(columns=None, top_n=PROFILE_TOP_N, jobs=None, snapshot_dir=ACLED_SNAPSHOT_DIR):
+    """
+    Profile columns of the snapshot (all by default) on a pool of jobs workers
+    (one per CPU by default).
+
+    Unknown column names get an entry with only their name, so reports can flag them.
+    """
+    snapshot_dir = require_artifact(snapshot_dir)
+    columns = list(columns) if columns is not None else ACLED_SCHEMA.names
+    known = [col for col in columns if col in ACLED_SCHEMA.names]
+    total_rows = sum(pq.ParquetFile(path).metadata.num_rows for path in Path(snapshot_dir).glob('*.parquet'))
+
+    jobs = jobs or os.cpu_count()
+    if jobs == 1 or len(known) <= 1:
+        profiles = [profile_column(col, top_n, snapshot_dir) for col in known]
+    else:
+        with ProcessPoolExecutor(max_workers=min(jobs, len(known))) as pool:
+            profiles = list(pool.map(profile_column, known, [top_n] * len(known), [snapshot_dir] * len(known)))
+    by_column = dict(zip(known, profiles))
+
+    return {
+        'rows': total_rows,
+        'columns_in_dataset': len(ACLED_SCHEMA.names),
+        'columns': [by_column.get(col, {'column': col}) for col in columns],
+    }
+
+
+def profile_markdown(profile, top_n=PROFILE_TOP_N):
+    """Render a profile as the Markdown report (one section per column)"""
+    md_lines = ["# ACLED Data Analysis\n"]
+    md_lines.append(f"**Total rows in dataset:** {profile['rows']:,}\n")
+    md_lines.append(f"**Columns in dataset:** {profile['columns_in_dataset']}\n")
+    md_lines.append("---\n")
+
+    for column in profile['columns']:
+        md_lines.append(f"## {column['column']}\n")
+        if 'non_null' not in column:
+            md_lines.append("**Column not found in dataset**\n\n")
+            continue
+
+        md_lines.append(f"- **Field type:** {'List (semicolon-separated)' if column['is_list'] else 'Simple value'}\n")
+        md_lines.append(f"- **Non-null values:** {column['non_null']:,}\n")
+        md_lines.append(f"- **Total unique values:** {column['distinct']:,}\n")
+        md_lines.append(f"- **Stored as:** {column['dtype']} (suggested: {column['suggested_dtype']})\n")
+        if column['distinct'] > top_n:
+            md_lines.append(f"- **Showing:** Top {top_n} most frequent\n")
+
+        md_lines.append("\n| Value | Count |\n|-------|-------|\n")
+        for value, count in column['top'][:top_n]:
+            # Escape pipe characters and truncate very long values
+            safe_value = str(value).replace('|', '\\|')
+            if len(safe_value) > 80:
+                safe_value = safe_value[:77] + "..."
+            md_lines.append(f"| {safe_value} | {count:,} |\n")
+
+        md_lines.append("\n---\n")
+    return md_lines
+
+
+def write_profile(profile, md_path=PROFILE_MD_PATH, json_path=PROFILE_JSON_PATH, top_n=PROFILE_TOP_N):
+    """Write the Markdown report and/or the JSON profile (either path may be None)"""
+    if md_path is not None:
+        Path(md_path).parent.mkdir(parents=True, exist_ok=True)
+        with open(md_path, 'w', encoding='utf-8') as f:
+            f.writelines(profile_markdown(profile, top_n))
+    if json_path is not None:
+        Path(json_path).parent.mkdir(parents=True, exist_ok=True)
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump(profile, f, indent=2, ensure_ascii=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Profile columns of the ACLED snapshot')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    profile_parser = subparsers.add_parser('profile', help='Profile snapshot columns in parallel')
+    profile_parser.add_argument('--columns', nargs='+', help='Columns to profile (default: all)')
+    profile_parser.add_argument('--top', type=int, default=PROFILE_TOP_N, help='Most frequent values per column')
+    profile_parser.add_argument('--jobs', type=int, help='Worker processes (default: one per CPU)')
+    profile_parser.add_argument('--snapshot', type=Path, default=ACLED_SNAPSHOT_DIR, help='ACLED snapshot directory')
+    profile_parser.add_argument('--md', type=Path, default=PROFILE_MD_PATH, help='Markdown report')
+    profile_parser.add_argument('--json', type=Path, default=PROFILE_JSON_PATH, help='JSON profile')
+
+    args = parser.parse_args()
+
+    if args.command == 'profile':
+        profile = profile_columns(args.columns, args.top, args.jobs, args.snapshot)
+        write_profile(profile, args.md, args.json, args.top)
+        print(f'[OK] Profile: {args.md}, {args.json} ({len(profile["columns"])} columns, {profile["rows"]:,} rows)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""
+Shared ACLED Frame
+
+Loads snapshot columns once into an Arrow IPC file in shared memory (/dev/shm
+where available) that worker processes memory-map zero-copy, so N parallel
+workers hold one copy of the events instead of N. Rows are stored year by
+year; each worker converts only the year slices it works on to pandas.
+
+    with share_acled(['country', 'year', 'fatalities'], years=(2015, None)) as shared:
+        with ProcessPoolExecutor(initializer=attach_shared_acled, initargs=(shared,)) as pool:
+            results = pool.map(work_on_year, range(2015, 2025))
+
+    def work_on_year(year):         # runs in a worker
+        events = shared_acled_year(year)
+"""
+
+import shutil
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from acled_store import (
+    ACLED_SCHEMA, ACLED_SNAPSHOT_DIR, CATEGORICAL_COLUMNS, acled_year_range, frame_from_arrow, year_file_path
+)
+
+# tmpfs, so the IPC file lives in memory; elsewhere the OS page cache is shared instead
+SHARED_MEMORY_DIR = Path('/dev/shm') if Path('/dev/shm').is_dir() else None
+
+# Table and year row ranges attached in this (worker) process
+_attached = {}
+
+
+@contextmanager
+def share_acled(columns, years=None, snapshot_dir=ACLED_SNAPSHOT_DIR):
+    """
+    Write snapshot columns to a shared IPC file, one snapshot year at a time.
+
+    years is an inclusive (start, end) tuple where either end may be None.
+    Yields a small picklable handle for attach_shared_acled; the file is
+    removed on exit.
+    """
+    columns = list(dict.fromkeys(list(columns) + ['year']))
+    first_year, last_year = acled_year_range(snapshot_dir)
+    start, end = years if years is not None else (None, None)
+    start = first_year if start is None else max(start, first_year)
+    end = last_year if end is None else min(end, last_year)
+
+    shared_dir = Path(tempfile.mkdtemp(prefix='acled-shared-', dir=SHARED_MEMORY_DIR))
+    path = shared_dir / 'events.arrow'
+    ranges, offset = {}, 0
+    schema = pa.schema([
+        pa.field(col, pa.dictionary(pa.int32(), pa.string()) if col in CATEGORICAL_COLUMNS
+                 else ACLED_SCHEMA.field(col).type)
+        for col in columns
+    ])
+    try:
+        # Stream format: each year keeps its own dictionaries, so no unification pass is needed
+        with pa.OSFile(str(path), 'wb') as sink, pa.ipc.new_stream(sink, schema) as writer:
+            for year in range(start, end + 1):
+                year_path = year_file_path(year, snapshot_dir)
+                if not year_path.exists():
+                    continue
+                table = pq.read_table(year_path, columns=columns,
+                                      read_dictionary=[c for c in columns if c in CATEGORICAL_COLUMNS])
+                writer.write_table(table.cast(schema))
+                ranges[year] = (offset, table.num_rows)
+                offset += table.num_rows
+        yield {'path': str(path), 'years': ranges}
+    finally:
+        shutil.rmtree(shared_dir, ignore_errors=True)
+
+
+def attach_shared_acled(shared):
+    """Memory-map a shared ACLED file in this process (ProcessPoolExecutor initializer)"""
+    _attached['table'] = pa.ipc.open_stream(pa.memory_map(shared['path'])).read_all()
+    _attached['years'] = shared['years']
+
+
+def shared_acled_year(year):
+    """One year of the attached events as a frame, typed like load_acled(years=(year, year))"""
+    start, count = _attached['years'].get(year, (0, 0))
+    return frame_from_arrow(_attached['table'].slice(start, count), drop_unused=True)
@@ -0,0 +1,303 @@
+"""
+ACLED Columnar Snapshot
+
+Converts the raw ACLED CSV export into a typed, zstd-compressed Parquet snapshot
+under intermediate/acled/ and provides the shared loader used by every builder.
+
+Usage:
+    python acled_store.py convert [--csv PATH]
+
+Builders then load only the columns and rows they need:
+    from acled_store import load_acled
+    df = load_acled(columns=['country', 'year', 'event_type', 'fatalities'],
+                    years=(2015, None), countries=['Mexico', 'India'])
+"""
+
+import argparse
+import os
+import shutil
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+# Paths
+data_processing_path = Path(__file__).parent
+raw_data_path = data_processing_path / 'raw-data'
+intermediate_path = data_processing_path / 'intermediate'
+
+ACLED_CSV = raw_data_path / 'ACLED' / 'ACLED_2025-10-29.csv'
+ACLED_SNAPSHOT_DIR = intermediate_path / 'acled' / 'events'
+
+# Rows per CSV chunk during conversion and per Parquet row group in the snapshot
+CSV_CHUNK_ROWS = 250_000
+ROW_GROUP_ROWS = 64_000
+
+# Typed schema of the snapshot (column order matches the ACLED export)
+ACLED_SCHEMA = pa.schema([
+    ('event_id_cnty', pa.string()),
+    ('event_date', pa.timestamp('ms')),
+    ('year', pa.int16()),
+    ('time_precision', pa.int8()),
+    ('disorder_type', pa.string()),
+    ('event_type', pa.string()),
+    ('sub_event_type', pa.string()),
+    ('actor1', pa.string()),
+    ('assoc_actor_1', pa.string()),
+    ('inter1', pa.string()),
+    ('actor2', pa.string()),
+    ('assoc_actor_2', pa.string()),
+    ('inter2', pa.string()),
+    ('interaction', pa.string()),
+    ('civilian_targeting', pa.string()),
+    ('iso', pa.int16()),
+    ('region', pa.string()),
+    ('country', pa.string()),
+    ('admin1', pa.string()),
+    ('admin2', pa.string()),
+    ('admin3', pa.string()),
+    ('location', pa.string()),
+    ('latitude', pa.float64()),
+    ('longitude', pa.float64()),
+    ('geo_precision', pa.int8()),
+    ('source', pa.string()),
+    ('source_scale', pa.string()),
+    ('notes', pa.string()),
+    ('fatalities', pa.int32()),
+    ('tags', pa.string()),
+    ('timestamp', pa.int64()),
+    ('population_1km', pa.float32()),
+    ('population_2km', pa.float32()),
+    ('population_5km', pa.float32()),
+    ('population_best', pa.float32()),
+])
+
+# Low-cardinality text columns, loaded as pandas categoricals
+CATEGORICAL_COLUMNS = [
+    'disorder_type', 'event_type', 'sub_event_type', 'actor1', 'inter1', 'actor2',
+    'inter2', 'interaction', 'civilian_targeting', 'region', 'country', 'admin1',
+    'source_scale'
+]
+
+INTEGER_COLUMNS = ['year', 'time_precision', 'iso', 'geo_precision', 'fatalities', 'timestamp']
+
+
+def _coerce_chunk(chunk, invalid):
+    """
+    Cast one raw CSV chunk to the snapshot schema.
+
+    Rows without a valid year are dropped (they belong to no year file); a
+    missing or invalid iso is kept as null. Both are counted in invalid.
+    Only fatalities default to 0; other unreadable integers stay null.
+    """
+    chunk['event_date'] = pd.to_datetime(chunk['event_date'])
+    for col in INTEGER_COLUMNS:
+        values = pd.to_numeric(chunk[col], errors='coerce')
+        chunk[col] = values.where(values == values.round())
+    chunk['fatalities'] = chunk['fatalities'].fillna(0)
+
+    bad_year = chunk['year'].isna()
+    invalid['year'] += int(bad_year.sum())
+    invalid['iso'] += int((chunk['iso'].isna() & ~bad_year).sum())
+    chunk = chunk[~bad_year]
+    return pa.Table.from_pandas(chunk, schema=ACLED_SCHEMA, preserve_index=False, safe=False)
+
+
+def iter_acled_csv(csv_path, chunk_rows=CSV_CHUNK_ROWS):
+    """
+    Stream a raw ACLED CSV export as Arrow tables in the snapshot schema, one per chunk.
+
+    Rows with a missing or invalid year or iso are reported once the CSV has been read.
+    """
+    text_columns = [f.name for f in ACLED_SCHEMA if pa.types.is_string(f.type)]
+    reader = pd.read_csv(
+        csv_path,
+        encoding='utf-8-sig',
+        usecols=ACLED_SCHEMA.names,
+        dtype={col: str for col in text_columns},
+        chunksize=chunk_rows
+    )
+    invalid = {'year': 0, 'iso': 0}
+    for chunk in reader:
+        yield _coerce_chunk(chunk, invalid)
+    if invalid['year']:
+        print(f'[WARN] {csv_path}: dropped {invalid["year"]:,} rows without a valid year')
+    if invalid['iso']:
+        print(f'[WARN] {csv_path}: {invalid["iso"]:,} rows without a valid iso (kept with iso null)')
+
+
+def year_file_path(year, snapshot_dir=ACLED_SNAPSHOT_DIR):
+    """Path of the snapshot file holding one year of events"""
+    return Path(snapshot_dir) / f'acled_{year}.parquet'
+
+
+def write_year_file(table, path):
+    """Sort one year of events by country and date, then atomically (re)write its snapshot file"""
+    table = table.sort_by([('country', 'ascending'), ('event_date', 'ascending')])
+    tmp_path = Path(path).with_suffix('.parquet.tmp')
+    pq.write_table(table, tmp_path, row_group_size=ROW_GROUP_ROWS, compression='zstd')
+    os.replace(tmp_path, path)
+
+
+def convert_acled_csv(csv_path=ACLED_CSV, snapshot_dir=ACLED_SNAPSHOT_DIR):
+    """
+    Convert the raw ACLED CSV into one sorted Parquet file per year.
+
+    The CSV is streamed in chunks and staged per year, so peak memory stays at
+    roughly one chunk plus the largest single year.
+    """
+    snapshot_dir = Path(snapshot_dir)
+    staging_dir = snapshot_dir.parent / '_staging'
+    if staging_dir.exists():
+        shutil.rmtree(staging_dir)
+    staging_dir.mkdir(parents=True)
+
+    total_rows = 0
+    for i, table in enumerate(iter_acled_csv(csv_path)):
+        total_rows += table.num_rows
+        years = table.column('year').to_numpy()
+        for year in sorted(set(years)):
+            year_dir = staging_dir / str(year)
+            year_dir.mkdir(exist_ok=True)
+            pq.write_table(table.filter(pa.array(years == year)), year_dir / f'chunk-{i:04d}.parquet')
+        print(f'  Staged {total_rows:,} rows...')
+
+    # Replace the previous snapshot only once every year has been staged
+    if snapshot_dir.exists():
+        shutil.rmtree(snapshot_dir)
+    snapshot_dir.mkdir(parents=True)
+    for year_dir in sorted(staging_dir.iterdir()):
+        write_year_file(pq.read_table(year_dir, schema=ACLED_SCHEMA), year_file_path(year_dir.name, snapshot_dir))
+    shutil.rmtree(staging_dir)
+
+    size_mb = sum(f.stat().st_size for f in snapshot_dir.glob('*.parquet')) / 1024**2
+    print(f'[OK] Snapshot: {snapshot_dir} ({total_rows:,} events, {size_mb:.1f} MB)')
+    return snapshot_dir
+
+
+def require_artifact(path, build_command='python acled_store.py convert'):
+    """Fail with a helpful message if a derived artifact has not been built yet"""
+    path = Path(path)
+    if not path.exists():
+        raise FileNotFoundError(f'{path} not found. Run `{build_command}` first.')
+    return path
+
+
+def acled_filter(years=None, countries=None, event_types=None, actors=None):
+    """
+    Build the row filter for load_acled.
+
+    years is an inclusive (start, end) tuple where either end may be None;
+    actors filters on actor1. Returns None when no filter is requested.
+    """
+    conditions = []
+    if years is not None:
+        start, end = years
+        if start is not None:
+            conditions.append(ds.field('year') >= int(start))
+        if end is not None:
+            conditions.append(ds.field('year') <= int(end))
+    if countries is not None:
+        conditions.append(ds.field('country').isin(list(countries)))
+    if event_types is not None:
+        conditions.append(ds.field('event_type').isin(list(event_types)))
+    if actors is not None:
+        conditions.append(ds.field('actor1').isin(list(actors)))
+
+    if not conditions:
+        return None
+    expr = conditions[0]
+    for condition in conditions[1:]:
+        expr = expr & condition
+    return expr
+
+
+def acled_year_range(snapshot_dir=ACLED_SNAPSHOT_DIR):
+    """
+    Return the (first, last) event year from row-group statistics.
+
+    Works for the snapshot directory and for any single derived Parquet file
+    with a year column (e.g. the conflict cube).
+    """
+    snapshot_dir = require_artifact(snapshot_dir)
+    paths = sorted(snapshot_dir.glob('*.parquet')) if snapshot_dir.is_dir() else [snapshot_dir]
+    first, last = None, None
+    for path in paths:
+        parquet_file = pq.ParquetFile(path)
+        year_idx = parquet_file.schema_arrow.get_field_index('year')
+        metadata = parquet_file.metadata
+        for i in range(metadata.num_row_groups):
+            stats = metadata.row_group(i).column(year_idx).statistics
+            first = stats.min if first is None else min(first, stats.min)
+            last = stats.max if last is None else max(last, stats.max)
+    return first, last
+
+
+def load_acled(columns=None, years=None, countries=None, event_types=None, actors=None,
+               snapshot_dir=ACLED_SNAPSHOT_DIR):
+    """
+    Load ACLED events from the columnar snapshot.
+
+    Only the requested columns are read. Year, country, event type and actor1
+    filters are pushed down into the scan: row groups whose statistics cannot match are
+    skipped and the rest are filtered batch by batch, so memory grows with the
+    rows kept rather than with the whole file.
+
+    Low-cardinality text columns come back as categoricals, event_date as
+    datetime64 and year/fatalities as narrow ints. Group by categorical columns
+    with observed=True.
+    """
+    snapshot_dir = require_artifact(snapshot_dir)
+    return read_parquet_frame(snapshot_dir, columns, acled_filter(years, countries, event_types, actors))
+
+
+def read_parquet_frame(path, columns=None, filters=None):
+    """
+    Read a Parquet file or directory written by this pipeline into pandas.
+
+    ACLED dimension columns are dictionary-decoded straight into categoricals
+    with sorted categories.
+    """
+    table = pq.read_table(
+        path,
+        columns=list(columns) if columns is not None else None,
+        filters=filters,
+        read_dictionary=CATEGORICAL_COLUMNS
+    )
+    return frame_from_arrow(table)
+
+
+def frame_from_arrow(table, drop_unused=False):
+    """
+    Convert an Arrow table of snapshot columns to pandas, dictionary columns as
+    categoricals with sorted categories (optionally only the categories in use).
+    """
+    df = table.to_pandas()
+
+    # Sorted categories keep groupby/pivot output in the same order as plain strings
+    for col in df.select_dtypes('category').columns:
+        if drop_unused:
+            df[col] = df[col].cat.remove_unused_categories()
+        df[col] = df[col].cat.reorder_categories(sorted(df[col].cat.categories))
+    return df
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build the ACLED columnar snapshot')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    convert_parser = subparsers.add_parser('convert', help='Convert the raw ACLED CSV into the snapshot')
+    convert_parser.add_argument('--csv', type=Path, default=ACLED_CSV, help='Path to the raw ACLED CSV')
+    convert_parser.add_argument('--out', type=Path, default=ACLED_SNAPSHOT_DIR, help='Snapshot output directory')
+
+    args = parser.parse_args()
+
+    if args.command == 'convert':
+        print(f'Converting {args.csv}...')
+        convert_acled_csv(args.csv, args.out)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+"""
+Build Manifest
+
+Fingerprints of the inputs and code that produced each derived file, so
+builders can skip targets whose inputs and code are unchanged.
+
+File fingerprints are checked cheaply first: when size and mtime match the
+recorded entry, the recorded content hash is reused. Only files whose stat
+changed are re-hashed, so touching a file without changing it does not
+trigger a rebuild.
+"""
+
+import hashlib
+import inspect
+import json
+import types
+from pathlib import Path
+
+data_processing_path = Path(__file__).parent
+
+HASH_CHUNK_BYTES = 8 * 1024 * 1024
+
+# Module-level values that are hashed by value in code_version
+VALUE_TYPES = (str, int, float, bool, tuple, list, dict, set, frozenset, Path, type(None))
+
+
+def content_hash(path):
+    """SHA-256 of a file's contents, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_BYTES), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def file_fingerprint(path, previous=None):
+    """
+    Fingerprint a file as {'size', 'mtime_ns', 'sha256'}.
+
+    previous is the fingerprint recorded last time; its hash is reused when
+    size and mtime are unchanged.
+    """
+    stat = Path(path).stat()
+    if previous and previous['size'] == stat.st_size and previous['mtime_ns'] == stat.st_mtime_ns:
+        return previous
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': content_hash(path)}
+
+
+def _stable_repr(value):
+    """repr of a constant with any functions inside it replaced by their source"""
+    if isinstance(value, types.FunctionType):
+        return inspect.getsource(value)
+    if isinstance(value, dict):
+        return '{' + ', '.join(f'{_stable_repr(k)}: {_stable_repr(v)}' for k, v in value.items()) + '}'
+    if isinstance(value, (list, tuple)):
+        return '[' + ', '.join(_stable_repr(v) for v in value) + ']'
+    if isinstance(value, (set, frozenset)):
+        return '{' + ', '.join(sorted(_stable_repr(v) for v in value)) + '}'
+    return repr(value)
+
+
+def _code_objects(code):
+    """A code object and the nested code objects of its lambdas and comprehensions"""
+    yield code
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            yield from _code_objects(const)
+
+
+def code_version(*funcs):
+    """
+    Hash the source of funcs and of everything they reference in this folder.
+
+    Functions defined in data-processing modules are followed recursively,
+    sibling modules imported inside a function are hashed as whole files, and
+    module-level constants (mappings, lists, paths) are hashed by value.
+    """
+    digest = hashlib.sha256()
+    seen = set()
+    stack = list(funcs)
+    while stack:
+        func = stack.pop()
+        if id(func) in seen:
+            continue
+        seen.add(id(func))
+        digest.update(inspect.getsource(func).encode('utf-8'))
+
+        names = sorted({name for code in _code_objects(func.__code__) for name in code.co_names})
+        for name in names:
+            if name in func.__globals__:
+                value = func.__globals__[name]
+                if isinstance(value, types.FunctionType):
+                    if Path(inspect.getsourcefile(value)).parent == data_processing_path:
+                        stack.append(value)
+                elif isinstance(value, VALUE_TYPES):
+                    digest.update(f'{name}={_stable_repr(value)}'.encode('utf-8'))
+            elif (data_processing_path / f'{name}.py').exists():
+                digest.update(content_hash(data_processing_path / f'{name}.py').encode('utf-8'))
+    return digest.hexdigest()
+
+
+def load_manifest(path):
+    """Load a manifest, or an empty one if it does not exist yet"""
+    path = Path(path)
+    if not path.exists():
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_manifest(manifest, path):
+    """Write a manifest"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
@@ -0,0 +1,621 @@
+"""
+Country Registry
+
+One canonical country table keyed by the UN M.49 code (the ISO 3166-1 numeric
+code for countries) and alias tables that map the country names of every
+source to it:
+
+    acled       ACLED `country` names, resolved through the snapshot's `iso` column
+    un_sna      UN national accounts names (GDP sectoral workbook, `CountryID`),
+                the names of the economics master
+    un_tourism  UN Tourism SDG 8.9.1 names (`GeoAreaCode`)
+    world_bank  World Bank names and country IDs (master_country_mapping.csv)
+    ucdp        UCDP names (curated, see COUNTRY_ALIASES)
+    topology    world-atlas countries-110m names used by the map components
+
+The registry also caches one centroid (lat, lon) per country for the maps:
+the area-weighted centroid of the country's largest polygon in the topology.
+Only the small states the 110m topology leaves out are placed at the
+fatality-weighted mean position of their ACLED events.
+
+Builders resolve each distinct country name to an int16 code once and join on
+the codes, so two sources spelling a country differently no longer drop rows
+silently. Names missing from the registry are reported; names of aggregates
+(World Bank income groups, UN regions) resolve to -1 without a warning.
+
+A name missing from a source's own aliases resolves through the other sources
+when they all agree on its code, so only real exceptions need curating.
+
+Without processed-data/master_country_mapping.csv the registry cannot be
+built; `build` then says so and leaves no registry. join_countries and
+rename_countries fall back to matching names exactly after the renames the
+builders used before the registry (FALLBACK_NAMES), so the existing builders
+keep working, with the old name matching.
+
+Usage:
+    python notebooks/build-country-mapping.py build   # master_country_mapping.csv
+    python country_registry.py build
+
+    from country_registry import country_centroids, join_countries, m49_codes, rename_countries
+    merged = join_countries(conflict, econ_latest, 'country', 'Country', 'acled', 'un_sna')
+    map_names = rename_countries(econ['Country'], 'un_sna', 'topology')
+    positions = country_centroids(m49_codes(names, 'ucdp'))      # lat, lon columns
+"""
+
+import argparse
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from acled_store import ACLED_SNAPSHOT_DIR, data_processing_path, intermediate_path, raw_data_path, require_artifact
+from economics_store import GDP_SECTORAL_XLSX, TOURISM_SHEET, TOURISM_XLSX, read_excel_cached
+
+COUNTRY_REGISTRY_DIR = intermediate_path / 'country_registry'
+MASTER_MAPPING_CSV = data_processing_path / 'processed-data' / 'master_country_mapping.csv'
+
+# world-atlas countries-110m.json, the topology the map components draw (feature ids are
+# M.49 codes): a local copy in raw-data/ if there is one, else the npm package the website
+# depends on (installed by `npm install` at the repository root)
+WORLD_ATLAS_TOPOLOGY = raw_data_path / 'world-atlas' / 'countries-110m.json'
+WORLD_ATLAS_PACKAGE_TOPOLOGY = data_processing_path.parent / 'node_modules' / 'world-atlas' / 'countries-110m.json'
+
+ALIAS_SOURCES = ['canonical', 'acled', 'un_sna', 'un_tourism', 'world_bank', 'ucdp', 'topology']
+
+# Countries used by the sources that the UN M.49 list leaves out
+# (Taiwan keeps its ISO 3166-1 code, Kosovo the code UN statistics report it under)
+EXTRA_COUNTRIES = [
+    {'m49': 158, 'iso3': 'TWN', 'iso2': 'TW', 'name': 'Taiwan'},
+    {'m49': 412, 'iso3': 'XKX', 'iso2': 'XK', 'name': 'Kosovo'},
+]
+
+# Source codes that differ from the registry code of the same country
+# (the national accounts report mainland Tanzania only, under 835)
+CODE_OVERRIDES = {
+    'un_sna': {835: 834},
+}
+
+# Curated names per source (name -> ISO3) for sources without codes and for
+# names the other sources do not share
+COUNTRY_ALIASES = {
+    # Names of the committed economics master that no other source shares, so the
+    # maps still resolve them when the national accounts workbook is not downloaded
+    'un_sna': {
+        'United States': 'USA',
+        'Russian Federation': 'RUS',
+        'Venezuela (Bolivarian Republic of)': 'VEN',
+        'Bolivia (Plurinational State of)': 'BOL',
+        'D.R. of the Congo': 'COD',
+        'Iran (Islamic Republic of)': 'IRN',
+        'Türkiye': 'TUR',
+        'Republic of Korea': 'KOR',
+        'D.P.R. of Korea': 'PRK',
+        'Viet Nam': 'VNM',
+        "Lao People's DR": 'LAO',
+        'U.R. of Tanzania: Mainland': 'TZA',
+        'State of Palestine': 'PSE',
+        'Syrian Arab Republic': 'SYR',
+        'Republic of Moldova': 'MDA',
+        'Brunei Darussalam': 'BRN',
+        'China, Hong Kong SAR': 'HKG',
+        'China, Macao SAR': 'MAC',
+        'Micronesia (FS of)': 'FSM',
+        'Netherlands': 'NLD',
+        'St. Vincent and the Grenadines': 'VCT',
+    },
+    'ucdp': {
+        'Russia (Soviet Union)': 'RUS',
+        'DR Congo (Zaire)': 'COD',
+        'Cambodia (Kampuchea)': 'KHM',
+        'Vietnam (North Vietnam)': 'VNM',
+        'Yemen (North Yemen)': 'YEM',
+        'Zimbabwe (Rhodesia)': 'ZWE',
+        'Serbia (Yugoslavia)': 'SRB',
+        'Myanmar (Burma)': 'MMR',
+        'Madagascar (Malagasy)': 'MDG',
+        'Kingdom of eSwatini (Swaziland)': 'SWZ',
+        'Ivory Coast': 'CIV',
+        'United States of America': 'USA',
+        'United Kingdom': 'GBR',
+        'United Arab Emirates': 'ARE',
+        'Bosnia-Herzegovina': 'BIH',
+        'Central African Republic': 'CAF',
+        'DR Congo': 'COD',
+        'Congo': 'COG',
+        'Russia': 'RUS',
+        'Iran': 'IRN',
+        'Syria': 'SYR',
+        'Laos': 'LAO',
+        'North Korea': 'PRK',
+        'South Korea': 'KOR',
+        'Tanzania': 'TZA',
+        'Turkey': 'TUR',
+        'Bolivia': 'BOL',
+        'Venezuela': 'VEN',
+        'Moldova': 'MDA',
+        # Display names of the intervention map (viz9)
+        'USA': 'USA',
+        'UK': 'GBR',
+        'UAE': 'ARE',
+        'Bosnia': 'BIH',
+        'CAR': 'CAF',
+    },
+    'topology': {
+        'United States of America': 'USA',
+        'Russia': 'RUS',
+        'Venezuela': 'VEN',
+        'Bolivia': 'BOL',
+        'Dem. Rep. Congo': 'COD',
+        'S. Sudan': 'SSD',
+        'Central African Rep.': 'CAF',
+        'Iran': 'IRN',
+        'Turkey': 'TUR',
+        'South Korea': 'KOR',
+        'North Korea': 'PRK',
+        'Vietnam': 'VNM',
+        'Laos': 'LAO',
+        'Tanzania': 'TZA',
+        'Dominican Rep.': 'DOM',
+        'Eq. Guinea': 'GNQ',
+        'Palestine': 'PSE',
+        'Syria': 'SYR',
+        'Moldova': 'MDA',
+        'Solomon Is.': 'SLB',
+        'Brunei': 'BRN',
+        'Bosnia and Herz.': 'BIH',
+        'Macedonia': 'MKD',
+        "Côte d'Ivoire": 'CIV',
+        'Czechia': 'CZE',
+        'eSwatini': 'SWZ',
+        'W. Sahara': 'ESH',
+        'Falkland Is.': 'FLK',
+        'Fr. S. Antarctic Lands': 'ATF',
+        'Timor-Leste': 'TLS',
+        'Kosovo': 'XKX',
+        'Taiwan': 'TWN',
+    },
+}
+
+# Renames (from source, to source) -> {name: name} of the builders before the
+# registry, used when it is not built; all other names are matched as they are
+FALLBACK_NAMES = {
+    ('un_tourism', 'un_sna'): {
+        'United States of America': 'United States',
+    },
+    ('world_bank', 'un_sna'): {
+        'Yemen, Rep.': 'Yemen',
+        'Egypt, Arab Rep.': 'Egypt',
+        'Bahamas, The': 'Bahamas',
+        'Gambia, The': 'Gambia',
+        'Kyrgyz Republic': 'Kyrgyzstan',
+        'Slovak Republic': 'Slovakia',
+        'Bolivia': 'Bolivia (Plurinational State of)',
+        'Hong Kong SAR, China': 'China, Hong Kong SAR',
+        'Macao SAR, China': 'China, Macao SAR',
+        'Congo, Rep.': 'Congo',
+        'Congo, Dem. Rep.': 'D.R. of the Congo',
+        'Curacao': 'Curaçao',
+        "Cote d'Ivoire": "Côte d'Ivoire",
+        "Korea, Dem. People's Rep.": 'D.P.R. of Korea',
+        'Iran, Islamic Rep.': 'Iran (Islamic Republic of)',
+        'Lao PDR': "Lao People's DR",
+        'Micronesia, Fed. Sts.': 'Micronesia (FS of)',
+        'Korea, Rep.': 'Republic of Korea',
+        'Moldova': 'Republic of Moldova',
+        'St. Kitts and Nevis': 'Saint Kitts and Nevis',
+        'St. Lucia': 'Saint Lucia',
+        'West Bank and Gaza': 'State of Palestine',
+        'Turkiye': 'Türkiye',
+        'Tanzania': 'U.R. of Tanzania: Mainland',
+        'Venezuela, RB': 'Venezuela (Bolivarian Republic of)',
+    },
+    ('un_sna', 'topology'): {
+        'United States': 'United States of America',
+        'Russian Federation': 'Russia',
+        'Venezuela (Bolivarian Republic of)': 'Venezuela',
+        'Bolivia (Plurinational State of)': 'Bolivia',
+        'D.R. of the Congo': 'Dem. Rep. Congo',
+        'South Sudan': 'S. Sudan',
+        'Central African Republic': 'Central African Rep.',
+        'Iran (Islamic Republic of)': 'Iran',
+        'Türkiye': 'Turkey',
+        'Republic of Korea': 'South Korea',
+        'D.P.R. of Korea': 'North Korea',
+        'Viet Nam': 'Vietnam',
+        "Lao People's DR": 'Laos',
+        'U.R. of Tanzania: Mainland': 'Tanzania',
+        'Dominican Republic': 'Dominican Rep.',
+        'Equatorial Guinea': 'Eq. Guinea',
+        'State of Palestine': 'Palestine',
+        'Syrian Arab Republic': 'Syria',
+        'Republic of Moldova': 'Moldova',
+        'Solomon Islands': 'Solomon Is.',
+        'Brunei Darussalam': 'Brunei',
+        'Bosnia and Herzegovina': 'Bosnia and Herz.',
+        'North Macedonia': 'Macedonia',
+    },
+}
+
+# Registry tables and name lookups loaded in this process, per registry directory
+_loaded = {}
+
+# Registry directories already reported as not built
+_unbuilt_reported = set()
+
+
+def world_atlas_topology():
+    """Path of the world-atlas topology to read: the raw-data copy if present, else the npm package's"""
+    return WORLD_ATLAS_TOPOLOGY if WORLD_ATLAS_TOPOLOGY.exists() else WORLD_ATLAS_PACKAGE_TOPOLOGY
+
+
+def _write_table(frame, path):
+    """Write a registry table atomically"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix('.parquet.tmp')
+    pq.write_table(pa.Table.from_pandas(frame, preserve_index=False), tmp_path)
+    os.replace(tmp_path, path)
+
+
+def read_master_mapping(mapping_path=MASTER_MAPPING_CSV):
+    """master_country_mapping.csv as written by notebooks/build-country-mapping.py"""
+    mapping_path = require_artifact(mapping_path, 'python notebooks/build-country-mapping.py build')
+    # 'NA' is Namibia's ISO2 code, not a missing value
+    return pd.read_csv(mapping_path, keep_default_na=False, na_values=[''])
+
+
+def build_countries(mapping):
+    """The canonical country table: one row per M.49 code"""
+    listed = mapping[mapping['UN_M49_Code'].notna()]
+    countries = pd.DataFrame({
+        'm49': listed['UN_M49_Code'].astype('int16'),
+        'iso3': listed['ISO3'],
+        'iso2': listed['ISO2'],
+        'name': listed['Country_Name_Standard'],
+        'un_region': listed['UN_Region'],
+        'un_subregion': listed['UN_Subregion'],
+        'wb_region': listed['WB_Region'],
+        'wb_income_level': listed['WB_IncomeLevel'],
+    })
+    extras = pd.DataFrame(EXTRA_COUNTRIES).astype({'m49': 'int16'})
+    countries = pd.concat([countries, extras[~extras['m49'].isin(countries['m49'])]], ignore_index=True)
+    return countries.drop_duplicates('m49').sort_values('m49').reset_index(drop=True)
+
+
+def _coded_aliases(source, names, codes, known):
+    """Alias rows of a source that carries its own codes; codes outside the registry become -1"""
+    codes = pd.Series(codes).map(lambda code: CODE_OVERRIDES.get(source, {}).get(code, code))
+    return pd.DataFrame({
+        'source': source,
+        'alias': pd.Series(names).astype(str).str.strip().to_numpy(),
+        'm49': codes.where(codes.isin(known), -1).to_numpy(),
+    })
+
+
+def build_aliases(mapping, countries, snapshot_dir=ACLED_SNAPSHOT_DIR, topology_path=None):
+    """
+    Alias rows (source, alias, m49) of every source.
+
+    Curated aliases come first, so they win over a derived alias of the same
+    name and give a country's preferred name in that source.
+    """
+    known = set(countries['m49'])
+    by_iso3 = countries.set_index('iso3')['m49']
+    parts = []
+    for source, aliases in COUNTRY_ALIASES.items():
+        parts.append(pd.DataFrame({
+            'source': source, 'alias': list(aliases), 'm49': by_iso3.reindex(list(aliases.values())).to_numpy()
+        }).dropna(subset=['m49']))
+
+    for column in ['name', 'iso3', 'iso2']:
+        parts.append(_coded_aliases('canonical', countries[column], countries['m49'], known))
+
+    # Rows without an M.49 code are aggregates (regions, income groups)
+    world_bank = mapping[mapping['country_name_wb'].notna()]
+    wb_codes = world_bank['UN_M49_Code'].fillna(-1).astype(int)
+    for column in ['country_name_wb', 'WorldBank_ID']:
+        parts.append(_coded_aliases('world_bank', world_bank[column], wb_codes, known))
+
+    if Path(snapshot_dir).exists():
+        acled = pq.read_table(snapshot_dir, columns=['country', 'iso']).group_by(['country', 'iso']).aggregate([])
+        acled = acled.to_pandas()
+        # iso is 0 where ACLED has no code; those names resolve through the other sources
+        acled = acled[acled['iso'].isin(known)]
+        parts.append(_coded_aliases('acled', acled['country'], acled['iso'], known))
+
+    if GDP_SECTORAL_XLSX.exists():
+        sna = read_excel_cached(GDP_SECTORAL_XLSX, sheet_name=0, header=2)[['CountryID', 'Country']].drop_duplicates()
+        parts.append(_coded_aliases('un_sna', sna['Country'], sna['CountryID'].astype(int), known))
+
+    if TOURISM_XLSX.exists():
+        tourism = read_excel_cached(TOURISM_XLSX, sheet_name=TOURISM_SHEET, header=0)
+        tourism = tourism[['GeoAreaCode', 'GeoAreaName']].drop_duplicates()
+        parts.append(_coded_aliases('un_tourism', tourism['GeoAreaName'], tourism['GeoAreaCode'].astype(int), known))
+
+    topology_path = topology_path or world_atlas_topology()
+    if Path(topology_path).exists():
+        with open(topology_path, 'r', encoding='utf-8') as f:
+            geometries = json.load(f)['objects']['countries']['geometries']
+        features = [(g['properties']['name'], int(g['id'])) for g in geometries if g.get('id') is not None]
+        parts.append(_coded_aliases('topology', [name for name, _ in features], [code for _, code in features], known))
+
+    aliases = pd.concat(parts, ignore_index=True).astype({'m49': 'int16'})
+    aliases = aliases[aliases['alias'].ne('') & aliases['alias'].ne('nan')]
+    aliases = aliases.drop_duplicates(['source', 'alias'])
+    return aliases.reset_index(drop=True)
+
+
+def _topology_centroids(topology_path):
+    """
+    {M.49 code: (lat, lon)} of the topology features: the area-weighted
+    centroid of each feature's largest polygon (its outer ring, in lon/lat),
+    so overseas territories do not pull a country's centroid into the sea.
+    """
+    with open(topology_path, 'r', encoding='utf-8') as f:
+        topology = json.load(f)
+    transform = topology.get('transform')
+    arcs = []
+    for arc in topology['arcs']:
+        points = np.asarray(arc, dtype='float64')
+        if transform:
+            # Quantized topologies store delta-encoded integer positions
+            points = np.cumsum(points, axis=0) * transform['scale'] + transform['translate']
+        arcs.append(points)
+
+    def ring(indices):
+        # Negative indices are reversed arcs (~i); consecutive arcs share their end point
+        parts = [arcs[i] if i >= 0 else arcs[~i][::-1] for i in indices]
+        return np.concatenate([parts[0]] + [part[1:] for part in parts[1:]])
+
+    centroids = {}
+    for geometry in topology['objects']['countries']['geometries']:
+        if geometry.get('id') is None or geometry['type'] not in ('Polygon', 'MultiPolygon'):
+            continue
+        polygons = [geometry['arcs']] if geometry['type'] == 'Polygon' else geometry['arcs']
+        largest = None
+        for polygon in polygons:
+            points = ring(polygon[0])
+            x, y = points[:, 0], points[:, 1]
+            cross = x[:-1] * y[1:] - x[1:] * y[:-1]
+            area = cross.sum() / 2
+            if area != 0 and (largest is None or abs(area) > largest[0]):
+                lon = ((x[:-1] + x[1:]) * cross).sum() / (6 * area)
+                lat = ((y[:-1] + y[1:]) * cross).sum() / (6 * area)
+                largest = (abs(area), lat, lon)
+        if largest is not None:
+            centroids[int(geometry['id'])] = largest[1:]
+    return centroids
+
+
+def _acled_centroids(snapshot_dir):
+    """
+    {ACLED iso code: (lat, lon)}: the mean event position weighted by
+    fatalities (unweighted for countries without fatalities)
+    """
+    events = pq.read_table(snapshot_dir, columns=['iso', 'latitude', 'longitude', 'fatalities']).to_pandas()
+    events = events[events['latitude'].notna() & events['longitude'].notna()]
+    weights = events['fatalities'].fillna(0).astype('float64')
+    sums = pd.DataFrame({
+        'iso': events['iso'],
+        'events': 1.0,
+        'lat': events['latitude'],
+        'lon': events['longitude'],
+        'weight': weights,
+        'weighted_lat': events['latitude'] * weights,
+        'weighted_lon': events['longitude'] * weights,
+    }).groupby('iso').sum()
+    weighted = sums['weight'] > 0
+    lat = (sums['weighted_lat'] / sums['weight']).where(weighted, sums['lat'] / sums['events'])
+    lon = (sums['weighted_lon'] / sums['weight']).where(weighted, sums['lon'] / sums['events'])
+    return {int(iso): (lat[iso], lon[iso]) for iso in sums.index}
+
+
+def build_centroids(countries, snapshot_dir=ACLED_SNAPSHOT_DIR, topology_path=None):
+    """
+    Centroid table (m49, lat, lon, source) from the topology geometry.
+
+    ACLED event positions only place the countries the topology leaves out:
+    fatality weighting pulls a large country's centroid towards its front lines.
+    Without a topology the table is empty and callers use their own fallback.
+    """
+    topology_path = topology_path or world_atlas_topology()
+    known = set(countries['m49'])
+    rows = {}
+    if not Path(topology_path).exists():
+        print(f'[WARN] {topology_path} not found, no centroids built (run `npm install` at the repository root)')
+    else:
+        rows.update({code: (lat, lon, 'topology') for code, (lat, lon) in _topology_centroids(topology_path).items()
+                     if code in known})
+        if Path(snapshot_dir).exists():
+            rows.update({code: (lat, lon, 'acled') for code, (lat, lon) in _acled_centroids(snapshot_dir).items()
+                         if code in known and code not in rows})
+    centroids = pd.DataFrame([(code, *row) for code, row in rows.items()], columns=['m49', 'lat', 'lon', 'source'])
+    return centroids.astype({'m49': 'int16'}).sort_values('m49').reset_index(drop=True)
+
+
+def build_country_registry(mapping_path=MASTER_MAPPING_CSV, snapshot_dir=ACLED_SNAPSHOT_DIR,
+                           registry_dir=COUNTRY_REGISTRY_DIR, topology_path=None):
+    """Build and write countries.parquet, aliases.parquet and centroids.parquet; returns the three frames"""
+    mapping = read_master_mapping(mapping_path)
+    countries = build_countries(mapping)
+    aliases = build_aliases(mapping, countries, snapshot_dir, topology_path)
+    centroids = build_centroids(countries, snapshot_dir, topology_path)
+    _write_table(countries, Path(registry_dir) / 'countries.parquet')
+    _write_table(aliases, Path(registry_dir) / 'aliases.parquet')
+    _write_table(centroids, Path(registry_dir) / 'centroids.parquet')
+    _loaded.pop(str(registry_dir), None)
+    return countries, aliases, centroids
+
+
+def registry_available(registry_dir=COUNTRY_REGISTRY_DIR):
+    """
+    Whether the registry has been built. Reports it (once per process) when
+    not, as the callers then fall back to matching names.
+    """
+    registry_dir = Path(registry_dir)
+    if str(registry_dir) in _loaded or all((registry_dir / name).exists() for name in ['countries.parquet',
+                                                                                      'aliases.parquet']):
+        return True
+    if str(registry_dir) not in _unbuilt_reported:
+        _unbuilt_reported.add(str(registry_dir))
+        print(f'[WARN] Country registry not built ({registry_dir}): matching country names exactly '
+              f'(run `python country_registry.py build`)')
+    return False
+
+
+def load_country_registry(registry_dir=COUNTRY_REGISTRY_DIR):
+    """(countries, aliases) frames of the built registry, loaded once per process"""
+    key = str(registry_dir)
+    if key not in _loaded:
+        registry_dir = require_artifact(registry_dir, 'python country_registry.py build')
+        _loaded[key] = {
+            'countries': pq.read_table(registry_dir / 'countries.parquet').to_pandas(),
+            'aliases': pq.read_table(registry_dir / 'aliases.parquet').to_pandas(),
+            'lookups': {},
+            'reported': set(),
+        }
+    return _loaded[key]['countries'], _loaded[key]['aliases']
+
+
+def _name_lookup(source, registry_dir):
+    """{casefolded name: code} for a source: its own aliases, then the names all other sources agree on"""
+    countries, aliases = load_country_registry(registry_dir)
+    lookups = _loaded[str(registry_dir)]['lookups']
+    if source not in lookups:
+        if source not in ALIAS_SOURCES:
+            raise ValueError(f'Unknown country source {source!r} (one of {", ".join(ALIAS_SOURCES)})')
+        keys = aliases['alias'].str.casefold().to_numpy()
+        codes = aliases['m49'].to_numpy()
+        own = (aliases['source'] == source).to_numpy()
+        other = ~own & (codes >= 0)
+        agreed = pd.Series(codes[other]).groupby(keys[other])
+        lookup = dict.fromkeys(keys[~own & (codes < 0)], -1)
+        lookup.update(agreed.first()[agreed.nunique() == 1].to_dict())
+        lookup.update(zip(keys[own], codes[own]))
+        lookups[source] = lookup
+    return lookups[source]
+
+
+def m49_codes(names, source, warn=True, registry_dir=COUNTRY_REGISTRY_DIR):
+    """
+    M.49 codes (int16) of a column of country names from source, resolving
+    each distinct name once.
+
+    Missing names, aggregates and names not in the registry get -1; the last
+    are printed (once per process) unless warn is False.
+    """
+    names = pd.Series(names)
+    positions, uniques = pd.factorize(names)
+    lookup = _name_lookup(source, registry_dir)
+    keys = [str(name).strip().casefold() for name in uniques]
+    reported = _loaded[str(registry_dir)]['reported']
+    unknown = sorted({str(name) for name, key in zip(uniques, keys) if key not in lookup} - reported)
+    if warn and unknown:
+        reported.update(unknown)
+        print(f'[WARN] {len(unknown)} {source} country names not in the registry: {", ".join(unknown)}')
+    codes = np.append([lookup.get(key, -1) for key in keys], -1).astype('int16')
+    return pd.Series(codes[positions], index=names.index)
+
+
+def country_names(codes, source='canonical', registry_dir=COUNTRY_REGISTRY_DIR):
+    """Names of M.49 codes as spelled by source (its preferred alias), NaN where it has none"""
+    countries, aliases = load_country_registry(registry_dir)
+    if source == 'canonical':
+        names = countries.set_index('m49')['name']
+    else:
+        names = aliases[(aliases['source'] == source) & (aliases['m49'] >= 0)].drop_duplicates('m49')
+        names = names.set_index('m49')['alias']
+    return pd.Series(codes).map(names)
+
+
+def country_centroids(codes, registry_dir=COUNTRY_REGISTRY_DIR):
+    """lat and lon columns of M.49 codes (aligned to codes), NaN where the registry has no centroid"""
+    load_country_registry(registry_dir)
+    loaded = _loaded[str(registry_dir)]
+    if 'centroids' not in loaded:
+        path = require_artifact(Path(registry_dir) / 'centroids.parquet', 'python country_registry.py build')
+        loaded['centroids'] = pq.read_table(path).to_pandas().set_index('m49')
+    codes = pd.Series(codes)
+    positions = loaded['centroids'][['lat', 'lon']].reindex(codes.to_numpy())
+    return positions.set_index(codes.index)
+
+
+def rename_countries(names, source, target, registry_dir=COUNTRY_REGISTRY_DIR):
+    """
+    Country names of source as target spells them; names target has no
+    spelling for are kept. Without a built registry, FALLBACK_NAMES renames.
+    """
+    names = pd.Series(names)
+    if not registry_available(registry_dir):
+        return names.replace(FALLBACK_NAMES.get((source, target), {}))
+    renamed = country_names(m49_codes(names, source, registry_dir=registry_dir), target, registry_dir)
+    return renamed.set_axis(names.index).fillna(names)
+
+
+def join_countries(left, right, left_on, right_on, left_source, right_source, on=None, how='left',
+                   registry_dir=COUNTRY_REGISTRY_DIR):
+    """
+    left.merge(right) on the M.49 codes of two country name columns (plus the
+    extra keys in on) instead of on the names.
+
+    Only the first right row per key is used, and right rows whose country does
+    not resolve never match. When both name columns have the same name, the
+    left one is kept. Without a built registry the names are matched exactly,
+    after the FALLBACK_NAMES renames of right_source to left_source.
+    """
+    if registry_available(registry_dir):
+        key = '_m49'
+        right = right.assign(_m49=m49_codes(right[right_on], right_source, registry_dir=registry_dir))
+        right = right[right['_m49'] >= 0]
+        left = left.assign(_m49=m49_codes(left[left_on], left_source, registry_dir=registry_dir))
+    else:
+        key = '_name'
+        rename = FALLBACK_NAMES.get((right_source, left_source), {})
+        right = right.assign(_name=right[right_on].astype(object).replace(rename))
+        left = left.assign(_name=left[left_on].astype(object))
+    keys = [key] + list(on or [])
+    right = right.drop_duplicates(keys)
+    if right_on == left_on:
+        right = right.drop(columns=right_on)
+    return left.merge(right, on=keys, how=how).drop(columns=key)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build the canonical country registry')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    build_parser = subparsers.add_parser('build', help='Build the country table and the alias tables')
+    build_parser.add_argument('--mapping', type=Path, default=MASTER_MAPPING_CSV, help='master_country_mapping.csv')
+    build_parser.add_argument('--snapshot', type=Path, default=ACLED_SNAPSHOT_DIR, help='ACLED snapshot directory')
+    build_parser.add_argument('--topology', type=Path, default=None,
+                              help='world-atlas countries-110m.json (default: raw-data/world-atlas/, '
+                                   'else node_modules/world-atlas/)')
+    build_parser.add_argument('--out', type=Path, default=COUNTRY_REGISTRY_DIR, help='Registry directory')
+
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        if not Path(args.mapping).exists():
+            print(f'[WARN] {args.mapping} not found, no registry built: builders match country names exactly '
+                  f'(run `python notebooks/build-country-mapping.py build` first)')
+            return
+        countries, aliases, centroids = build_country_registry(args.mapping, args.snapshot, args.out, args.topology)
+        counts = aliases.groupby('source').size().reindex(ALIAS_SOURCES, fill_value=0)
+        print(f'[OK] Country registry: {len(countries)} countries, '
+              + ', '.join(f'{source} {count}' for source, count in counts.items()) + ' aliases')
+        placed = centroids.groupby('source').size()
+        print(f'[OK] Centroids: {len(centroids)} countries ('
+              + ', '.join(f'{count} from {source}' for source, count in placed.items()) + ')')
+
+        # Report ACLED countries the registry cannot place
+        if Path(args.snapshot).exists():
+            acled = pq.read_table(args.snapshot, columns=['country']).column('country').unique()
+            m49_codes(acled.to_pandas(), 'acled', registry_dir=args.out)
+
+
+if __name__ == '__main__':
+    main()
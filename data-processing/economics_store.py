@@ -0,0 +1,163 @@
+"""
+Economics Store
+
+Typed columnar copies of the economics master and of the workbooks it is
+built from.
+
+Parsing the World Bank and UN Tourism workbooks through openpyxl is the
+slowest step of run_create_economics_master.py. read_excel_cached parses a
+sheet once and keeps it as Parquet under intermediate/excel_cache/, keyed by
+the SHA-256 of the workbook and the read options, so replacing a workbook
+makes the next run parse it again. Sheets whose header row sits among the
+numbers (the GDP workbook) are cached as text cells by read_sheet_cells and
+re-headed by the caller.
+
+The master table is written twice: the committed CSV and a Parquet file with
+fixed dtypes next to it, which records the hash of the CSV it was written
+with. load_economics_master reads the Parquet file while it matches the CSV
+and falls back to the CSV (parsed with the same dtypes) when the CSV changed
+without it, e.g. after a git pull.
+
+    from economics_store import load_economics_master
+    df_econ = load_economics_master()
+"""
+
+import hashlib
+import json
+import os
+import re
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from acled_store import data_processing_path, intermediate_path, raw_data_path
+from build_manifest import content_hash
+
+EXCEL_CACHE_DIR = intermediate_path / 'excel_cache'
+
+# Inputs of the economics master
+GDP_SECTORAL_XLSX = raw_data_path / 'World_Bank' / 'Download-GDPcurrent-NCU-countries.xlsx'
+TOURISM_XLSX = raw_data_path / 'UN_Tourism' / 'UN_Tourism_8_9_1_TDGDP_04_2025.xlsx'
+TOURISM_SHEET = 'SDG 8.9.1'
+DEV_INDICATORS_CSV = raw_data_path / 'World_Bank' / 'world_bank_development_indicators.csv'
+
+ECONOMICS_MASTER_CSV = data_processing_path / 'processed-data' / 'economics-countries-master.csv'
+ECONOMICS_MASTER_PARQUET = data_processing_path / 'processed-data' / 'economics-countries-master.parquet'
+
+# Dtypes of the master table; every other column (sector shares, GDP, population,
+# inflation, debt) is float64, so a column never flips type with its null pattern
+ECONOMICS_DTYPES = {'Country': 'str', 'Year': 'int64'}
+ECONOMICS_VALUE_DTYPE = 'float64'
+
+# Text of a cell read with dtype=str that held a number (str() of an int or a float)
+NUMBER_TEXT = re.compile(r'[+-]?(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?')
+
+# Parquet key-value metadata
+CACHE_COLUMNS_KEY = b'excel_columns'
+SOURCE_HASH_KEY = b'source_csv_sha256'
+
+
+def _write_parquet(table, path):
+    """Write a table atomically (readers never see a partial file)"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix('.parquet.tmp')
+    pq.write_table(table, tmp_path, compression='zstd')
+    os.replace(tmp_path, path)
+
+
+def excel_cache_path(path, cache_dir=EXCEL_CACHE_DIR, **read_options):
+    """Cache file of one parsed sheet: workbook name plus a hash of its contents and the read options"""
+    key = hashlib.sha256(
+        f'{content_hash(path)}|{sorted(read_options.items())!r}'.encode('utf-8')).hexdigest()
+    return Path(cache_dir) / f'{Path(path).stem}-{key[:16]}.parquet'
+
+
+def read_excel_cached(path, cache_dir=EXCEL_CACHE_DIR, **read_options):
+    """
+    pd.read_excel(path, **read_options), parsed once per workbook version.
+
+    Header cells keep their Excel types (year headers stay numbers). Sheets
+    with columns Arrow cannot type (mixed numbers and text) are returned
+    without being cached.
+    """
+    cache_path = excel_cache_path(path, cache_dir, **read_options)
+    if cache_path.exists():
+        table = pq.read_table(cache_path)
+        columns = json.loads(table.schema.metadata[CACHE_COLUMNS_KEY])
+        df = table.to_pandas()
+        df.columns = columns
+        return df
+
+    df = pd.read_excel(path, **read_options)
+    columns = [col.item() if hasattr(col, 'item') else col for col in df.columns]
+    try:
+        table = pa.Table.from_pandas(df.set_axis([str(col) for col in columns], axis=1), preserve_index=False)
+        columns_json = json.dumps(columns)
+    except (pa.ArrowInvalid, pa.ArrowTypeError, TypeError) as err:
+        print(f'[WARN] Not caching {Path(path).name}: {err}')
+        return df
+    table = table.replace_schema_metadata({**table.schema.metadata, CACHE_COLUMNS_KEY: columns_json.encode('utf-8')})
+    _write_parquet(table, cache_path)
+    return df
+
+
+def _cell_value(text):
+    """The number a cell read as text held (int or float), or the text itself"""
+    if not isinstance(text, str) or not NUMBER_TEXT.fullmatch(text):
+        return text
+    return int(text) if text.lstrip('+-').isdigit() else float(text)
+
+
+def read_sheet_cells(path, cache_dir=EXCEL_CACHE_DIR, **read_options):
+    """
+    Every cell of a sheet (no header row) as the Python value it holds, parsed once per workbook version.
+
+    For sheets that mix numbers and text in a column, which read_excel_cached
+    cannot cache typed: the cells are cached as text and read back as int,
+    float or str, so re-inferring the dtypes of a slice of rows (e.g. from the
+    real header row on) gives what pd.read_excel would. Text cells that spell a
+    number come back as numbers.
+    """
+    cells = read_excel_cached(path, cache_dir, header=None, dtype=str, **read_options)
+    values = cells.to_numpy(dtype=object, na_value=np.nan)
+    return pd.DataFrame([[_cell_value(value) for value in row] for row in values], dtype=object)
+
+
+def economics_dtypes(columns):
+    """Dtype of every master column"""
+    return {col: ECONOMICS_DTYPES.get(col, ECONOMICS_VALUE_DTYPE) for col in columns}
+
+
+def write_economics_master(df, csv_path=ECONOMICS_MASTER_CSV, parquet_path=ECONOMICS_MASTER_PARQUET):
+    """Write the master table as CSV and as typed Parquet; returns the typed frame"""
+    df = df.astype(economics_dtypes(df.columns))
+    df.to_csv(csv_path, index=False)
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    table = table.replace_schema_metadata({
+        **table.schema.metadata, SOURCE_HASH_KEY: content_hash(csv_path).encode('utf-8')
+    })
+    _write_parquet(table, parquet_path)
+    return df
+
+
+def load_economics_master(columns=None, csv_path=ECONOMICS_MASTER_CSV, parquet_path=ECONOMICS_MASTER_PARQUET):
+    """
+    The economics master table (one row per country-year) with fixed dtypes.
+
+    Reads the Parquet copy when it was written from the current CSV, otherwise
+    the CSV itself.
+    """
+    csv_path, parquet_path = Path(csv_path), Path(parquet_path)
+    if parquet_path.exists():
+        source_hash = pq.read_schema(parquet_path).metadata.get(SOURCE_HASH_KEY, b'').decode('utf-8')
+        if not csv_path.exists() or source_hash == content_hash(csv_path):
+            return pq.read_table(parquet_path, columns=columns).to_pandas()
+
+    header = pd.read_csv(csv_path, nrows=0).columns
+    df = pd.read_csv(csv_path, usecols=columns, dtype=economics_dtypes(header))
+    return df[columns] if columns is not None else df
@@ -1,94 +1,230 @@
 """
 Build a Master Country Mapping Table
 Combines: UN M.49 + World Bank metadata (+ optional Gleditsch & Ward codes)
+
+The build reads local snapshots of both sources, so it runs offline. `fetch`
+downloads new versions of them into raw-data/Country_Mapping/ (one dated file
+per version; snapshots.json names the current one of each source). `build`
+rewrites master_country_mapping.csv only when a snapshot or this script
+changed since the last build (recorded in intermediate/country_mapping_manifest.json).
+The snapshots are meant to be committed with the repository: after `fetch`,
+commit raw-data/Country_Mapping/. Without them `build` warns and leaves the
+mapping as it is (the committed one is seeded from the HDX country taxonomy,
+see processed-data/README.md).
+
+Usage:
+    python build-country-mapping.py fetch    # needs network; refreshes the snapshots
+    python build-country-mapping.py build    # offline
 """
 
+import argparse
+import json
+import sys
+from datetime import date
+from pathlib import Path
+
 import pandas as pd
-import requests
-
-# ------------------------------------------------------------
-# 1. Get UN M.49 table (official list of countries and areas)
-# ------------------------------------------------------------
-un_url = "https://unstats.un.org/unsd/methodology/m49/overview/"
-# UN provides an HTML table — we'll read it directly with pandas
-un_tables = pd.read_html(un_url)
-un_df = un_tables[0].copy()
-
-# Standardize columns (replace spaces and dashes with underscores)
-un_df.columns = [c.lower().strip().replace(" ", "_").replace("-", "_") for c in un_df.columns]
-
-un_df.rename(
-    columns={
-        "country_or_area": "country_name_standard",
-        "m49_code": "un_m49_code",
-        "iso_alpha2_code": "iso2",
-        "iso_alpha3_code": "iso3",
-    },
-    inplace=True,
-)
-
-un_df = un_df[
-    ["country_name_standard", "iso2", "iso3", "un_m49_code", "region_name", "sub_region_name"]
-]
-
-# ------------------------------------------------------------
-# 2. Get World Bank country metadata via API
-# ------------------------------------------------------------
-wb_url = "https://api.worldbank.org/v2/country?format=json&per_page=400"
-wb_data = requests.get(wb_url).json()[1]
-wb_df = pd.DataFrame(wb_data)
-
-wb_df = wb_df.rename(
-    columns={
-        "id": "world_bank_code",
-        "name": "country_name_wb",
+
+# Paths relative to this file, so the script runs from any directory
+data_processing_path = Path(__file__).resolve().parent.parent
+
+sys.path.insert(0, str(data_processing_path))
+from acled_store import intermediate_path, raw_data_path, require_artifact
+from build_manifest import content_hash, file_fingerprint, load_manifest, save_manifest
+
+SNAPSHOT_DIR = raw_data_path / 'Country_Mapping'
+SNAPSHOT_INDEX = 'snapshots.json'
+OUTPUT_PATH = data_processing_path / 'processed-data' / 'master_country_mapping.csv'
+MANIFEST_PATH = intermediate_path / 'country_mapping_manifest.json'
+
+# Snapshot sources: URL and file name prefix and suffix of their versions
+SOURCES = {
+    'un_m49': {'url': 'https://unstats.un.org/unsd/methodology/m49/overview/', 'prefix': 'un_m49_overview',
+               'suffix': '.html'},
+    'world_bank': {'url': 'https://api.worldbank.org/v2/country?format=json&per_page=400',
+                   'prefix': 'world_bank_countries', 'suffix': '.json'},
+}
+
+
+def fetch_snapshots(snapshot_dir=SNAPSHOT_DIR):
+    """
+    Download every source and make it the current snapshot.
+
+    A download identical to the current snapshot keeps the existing file;
+    older versions stay on disk.
+    """
+    import requests
+
+    snapshot_dir = Path(snapshot_dir)
+    snapshot_dir.mkdir(parents=True, exist_ok=True)
+    index = load_manifest(snapshot_dir / SNAPSHOT_INDEX)
+    for source, spec in SOURCES.items():
+        response = requests.get(spec['url'], timeout=60)
+        response.raise_for_status()
+
+        tmp_path = snapshot_dir / f"{spec['prefix']}.download"
+        tmp_path.write_bytes(response.content)
+        sha256 = content_hash(tmp_path)
+        current = index.get(source)
+        if current and current['sha256'] == sha256 and (snapshot_dir / current['file']).exists():
+            tmp_path.unlink()
+            print(f'  {source}: unchanged since {current["fetched"]}')
+            continue
+
+        fetched = date.today().isoformat()
+        path = snapshot_dir / f"{spec['prefix']}_{fetched}{spec['suffix']}"
+        tmp_path.replace(path)
+        index[source] = {'file': path.name, 'url': spec['url'], 'fetched': fetched, 'sha256': sha256}
+        print(f'  {source}: {path.name} ({path.stat().st_size / 1024:.1f} KB)')
+    save_manifest(index, snapshot_dir / SNAPSHOT_INDEX)
+    print(f'[OK] Snapshots: {snapshot_dir / SNAPSHOT_INDEX}')
+
+
+def snapshot_paths(snapshot_dir=SNAPSHOT_DIR):
+    """{source: path of its current snapshot}"""
+    snapshot_dir = Path(snapshot_dir)
+    index_path = snapshot_dir / SNAPSHOT_INDEX
+    require_artifact(index_path, 'python notebooks/build-country-mapping.py fetch')
+    index = load_manifest(index_path)
+    missing = [source for source in SOURCES if source not in index]
+    if missing:
+        raise ValueError(f'No snapshot of {", ".join(missing)} in {index_path} '
+                         f'(run `python notebooks/build-country-mapping.py fetch`)')
+    return {source: snapshot_dir / index[source]['file'] for source in SOURCES}
+
+
+def build_mapping(paths):
+    """Merge the UN M.49 and World Bank snapshots into the mapping table"""
+    # ------------------------------------------------------------
+    # 1. UN M.49 table (official list of countries and areas)
+    # ------------------------------------------------------------
+    # The UN page holds one table per language; the first one is English
+    # (only empty cells are missing: Namibia's ISO2 code is 'NA')
+    un_tables = pd.read_html(paths['un_m49'], keep_default_na=False, na_values=[''])
+    un_df = un_tables[0].copy()
+
+    # Standardize columns (replace spaces and dashes with underscores)
+    un_df.columns = [c.lower().strip().replace(" ", "_").replace("-", "_") for c in un_df.columns]
+
+    un_df.rename(
+        columns={
+            "country_or_area": "country_name_standard",
+            "m49_code": "un_m49_code",
+            "iso_alpha2_code": "iso2",
+            "iso_alpha3_code": "iso3",
+        },
+        inplace=True,
+    )
+
+    un_df = un_df[
+        ["country_name_standard", "iso2", "iso3", "un_m49_code", "region_name", "sub_region_name"]
+    ]
+
+    # ------------------------------------------------------------
+    # 2. World Bank country metadata (API response: [paging, countries])
+    # ------------------------------------------------------------
+    with open(paths['world_bank'], 'r', encoding='utf-8') as f:
+        wb_data = json.load(f)[1]
+    wb_df = pd.DataFrame(wb_data)
+
+    wb_df = wb_df.rename(
+        columns={
+            "id": "world_bank_code",
+            "name": "country_name_wb",
+        }
+    )
+    wb_df = wb_df[
+        ["country_name_wb", "iso2Code", "region", "incomeLevel", "world_bank_code"]
+    ].rename(columns={"iso2Code": "iso2"})
+
+    # Extract readable values from dict objects
+    wb_df['region'] = wb_df['region'].apply(lambda x: x.get('value', '') if isinstance(x, dict) else '')
+    wb_df['incomeLevel'] = wb_df['incomeLevel'].apply(lambda x: x.get('value', '') if isinstance(x, dict) else '')
+
+    # ------------------------------------------------------------
+    # 3. Merge UN + World Bank metadata
+    # ------------------------------------------------------------
+    merged = pd.merge(un_df, wb_df, on="iso2", how="outer", validate="1:1")
+
+    # ------------------------------------------------------------
+    # 4. Optionally merge Gleditsch & Ward codes (if you have a CSV)
+    # ------------------------------------------------------------
+    # Example:
+    # gw_df = pd.read_csv("gleditsch_ward_codes.csv")
+    # merged = pd.merge(merged, gw_df[["iso3", "gwno"]], on="iso3", how="left")
+
+    # ------------------------------------------------------------
+    # 5. Clean
+    # ------------------------------------------------------------
+    merged.rename(
+        columns={
+            "country_name_standard": "Country_Name_Standard",
+            "iso2": "ISO2",
+            "iso3": "ISO3",
+            "un_m49_code": "UN_M49_Code",
+            "world_bank_code": "WorldBank_ID",
+            "region_name": "UN_Region",
+            "sub_region_name": "UN_Subregion",
+            "region": "WB_Region",
+            "incomeLevel": "WB_IncomeLevel",
+        },
+        inplace=True,
+    )
+
+    # Sort for clarity
+    return merged.sort_values(by="Country_Name_Standard")
+
+
+def build_country_mapping(snapshot_dir=SNAPSHOT_DIR, output_path=OUTPUT_PATH, manifest_path=MANIFEST_PATH,
+                          force=False):
+    """Write the mapping table unless the snapshots and this script are unchanged since the last build"""
+    if not (Path(snapshot_dir) / SNAPSHOT_INDEX).exists():
+        print(f'[WARN] No country mapping snapshots in {snapshot_dir}: {Path(output_path).name} not built '
+              f'(run `python notebooks/build-country-mapping.py fetch` once and commit the snapshots)')
+        return
+    paths = snapshot_paths(snapshot_dir)
+    manifest = load_manifest(manifest_path)
+    manifest.setdefault('files', {})
+    for source, path in paths.items():
+        manifest['files'][source] = file_fingerprint(path, manifest['files'].get(source))
+    signature = {
+        'code': content_hash(__file__),
+        'inputs': {source: manifest['files'][source]['sha256'] for source in paths},
     }
-)
-wb_df = wb_df[
-    ["country_name_wb", "iso2Code", "region", "incomeLevel", "world_bank_code"]
-].rename(columns={"iso2Code": "iso2"})
-
-# Extract readable values from dict objects
-wb_df['region'] = wb_df['region'].apply(lambda x: x.get('value', '') if isinstance(x, dict) else '')
-wb_df['incomeLevel'] = wb_df['incomeLevel'].apply(lambda x: x.get('value', '') if isinstance(x, dict) else '')
-
-# ------------------------------------------------------------
-# 3. Merge UN + World Bank metadata
-# ------------------------------------------------------------
-merged = pd.merge(un_df, wb_df, on="iso2", how="outer", validate="1:1")
-
-# ------------------------------------------------------------
-# 4. Optionally merge Gleditsch & Ward codes (if you have a CSV)
-# ------------------------------------------------------------
-# Example:
-# gw_df = pd.read_csv("gleditsch_ward_codes.csv")
-# merged = pd.merge(merged, gw_df[["iso3", "gwno"]], on="iso3", how="left")
-
-# ------------------------------------------------------------
-# 5. Clean and export
-# ------------------------------------------------------------
-merged.rename(
-    columns={
-        "country_name_standard": "Country_Name_Standard",
-        "iso2": "ISO2",
-        "iso3": "ISO3",
-        "un_m49_code": "UN_M49_Code",
-        "world_bank_code": "WorldBank_ID",
-        "region_name": "UN_Region",
-        "sub_region_name": "UN_Subregion",
-        "region": "WB_Region",
-        "incomeLevel": "WB_IncomeLevel",
-    },
-    inplace=True,
-)
-
-# Sort for clarity
-merged.sort_values(by="Country_Name_Standard", inplace=True)
-
-# Save to CSV in processed-data folder
-output_path = "../processed-data/master_country_mapping.csv"
-merged.to_csv(output_path, index=False, encoding="utf-8")
-
-print(f"[SUCCESS] Master mapping table saved as '{output_path}'")
-print(f"Total entries: {len(merged)}")
-print(merged.head(10))
+    if not force and manifest.get('target') == signature and Path(output_path).exists():
+        save_manifest(manifest, manifest_path)
+        print(f'[OK] {Path(output_path).name}: up to date')
+        return
+
+    merged = build_mapping(paths)
+    merged.to_csv(output_path, index=False, encoding="utf-8")
+    manifest['target'] = signature
+    save_manifest(manifest, manifest_path)
+
+    print(f"[SUCCESS] Master mapping table saved as '{output_path}'")
+    print(f"Total entries: {len(merged)}")
+    print(merged.head(10))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build the master country mapping from local source snapshots')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    fetch_parser = subparsers.add_parser('fetch', help='Download new snapshots of the UN M.49 and World Bank lists')
+    fetch_parser.add_argument('--snapshots', type=Path, default=SNAPSHOT_DIR, help='Snapshot directory')
+
+    build_parser = subparsers.add_parser('build', help='Build master_country_mapping.csv from the snapshots (offline)')
+    build_parser.add_argument('--snapshots', type=Path, default=SNAPSHOT_DIR, help='Snapshot directory')
+    build_parser.add_argument('--out', type=Path, default=OUTPUT_PATH, help='Output CSV')
+    build_parser.add_argument('--force', action='store_true', help='Rebuild even if the snapshots are unchanged')
+
+    args = parser.parse_args()
+
+    if args.command == 'fetch':
+        fetch_snapshots(args.snapshots)
+    elif args.command == 'build':
+        build_country_mapping(args.snapshots, args.out, force=args.force)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,139 +1,142 @@
+import argparse
 import pandas as pd
 import numpy as np
+import sys
+import tempfile
 import warnings
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 
 warnings.filterwarnings('ignore')
 
-print("="*80)
-print("ECONOMICS COUNTRIES MASTER DATASET GENERATOR")
-print("="*80)
+parser = argparse.ArgumentParser(description='Build processed-data/economics-countries-master.csv')
+parser.add_argument('--check', action='store_true',
+                    help='Build into a temporary directory and compare with the committed CSV byte for byte '
+                         '(writes nothing; exits 1 on differences)')
+args = parser.parse_args()
 
-# [1/8] Load World Bank GDP sectoral data
-print("\n[1/8] Loading World Bank GDP sectoral data...")
-df_gdp_sectoral_raw = pd.read_excel('../raw-data/World_Bank/Download-GDPcurrent-NCU-countries.xlsx', header=1)
-new_columns = df_gdp_sectoral_raw.iloc[0].tolist()
-df_gdp_sectoral = df_gdp_sectoral_raw.copy()
-df_gdp_sectoral.columns = new_columns
-df_gdp_sectoral = df_gdp_sectoral.drop(0).reset_index(drop=True)
-
-if "Country" not in df_gdp_sectoral.columns or "IndicatorName" not in df_gdp_sectoral.columns:
-    raise KeyError("Expected columns 'Country' or 'IndicatorName' not found.")
-
-print(f"Loaded {len(df_gdp_sectoral):,} rows covering {df_gdp_sectoral['Country'].nunique()} countries")
-
-# [2/8] Reshape from wide to long format
-print("\n[2/8] Reshaping data...")
-year_columns = sorted([col for col in df_gdp_sectoral.columns
-                       if isinstance(col, (int, float)) and float(col) >= 1970 and float(col).is_integer()],
-                      key=lambda x: float(x))
-
-df_long = df_gdp_sectoral.melt(
-    id_vars=['CountryID', 'Country', 'Currency', 'IndicatorName'],
-    value_vars=year_columns,
-    var_name='Year',
-    value_name='Value'
-)
-df_long['Year'] = df_long['Year'].astype(float).astype(int)
-print(f"Reshaped to {len(df_long):,} rows")
-
-# [3/8] Pivot indicators to columns
-print("\n[3/8] Pivoting indicators...")
-df_pivot = df_long.pivot_table(
-    index=['CountryID', 'Country', 'Currency', 'Year'],
-    columns='IndicatorName',
-    values='Value',
-    aggfunc='first'
-).reset_index()
-
-print(f"Created {len(df_pivot):,} country-year records")
-
-# [4/8] Calculate sector percentages
-print("\n[4/8] Calculating sector percentages...")
-df_pivot.columns = df_pivot.columns.str.strip()
-
-col_map = {
-    'Agriculture, hunting, forestry, fishing (ISIC A-B)': 'Agriculture',
-    'Mining, Manufacturing, Utilities (ISIC C-E)': 'Mining_Manuf_Util',
-    'Manufacturing (ISIC D)': 'Manufacturing',
-    'Construction (ISIC F)': 'Construction',
-    'Wholesale, retail trade, restaurants and hotels (ISIC G-H)': 'Trade_Retail',
-    'Transport, storage and communication (ISIC I)': 'Transport',
-    'Other Activities (ISIC J-P)': 'Other_Activities',
-    'Total Value Added': 'Total_Value_Added',
-    'Gross Domestic Product (GDP)': 'GDP'
-}
-df_pivot = df_pivot.rename(columns=col_map)
-
-df_pivot['Mining'] = df_pivot['Mining_Manuf_Util'] - df_pivot['Manufacturing']
-df_pivot['Primary_Value'] = df_pivot['Agriculture'] + df_pivot['Mining']
-df_pivot['Secondary_Value'] = df_pivot['Manufacturing'] + df_pivot['Construction']
-df_pivot['Tertiary_Value'] = df_pivot['Trade_Retail'] + df_pivot['Transport'] + df_pivot['Other_Activities']
-
-df_pivot['Primary_%'] = (df_pivot['Primary_Value'] / df_pivot['Total_Value_Added']) * 100
-df_pivot['Secondary_%'] = (df_pivot['Secondary_Value'] / df_pivot['Total_Value_Added']) * 100
-df_pivot['Tertiary_%'] = (df_pivot['Tertiary_Value'] / df_pivot['Total_Value_Added']) * 100
-
-# [5/8] Load UN Tourism data
-print("\n[5/8] Loading UN Tourism data...")
-df_tourism = pd.read_excel(
-    '../raw-data/UN_Tourism/UN_Tourism_8_9_1_TDGDP_04_2025.xlsx',
-    sheet_name='SDG 8.9.1'
+# Paths relative to this file, so the script runs from any directory
+data_processing_path = Path(__file__).resolve().parent.parent
+
+sys.path.insert(0, str(data_processing_path))
+from country_registry import join_countries
+from economics_store import (
+    DEV_INDICATORS_CSV, ECONOMICS_MASTER_PARQUET, GDP_SECTORAL_XLSX, TOURISM_SHEET, TOURISM_XLSX, read_excel_cached,
+    read_sheet_cells, write_economics_master
 )
 
-df_tourism_clean = df_tourism[['GeoAreaName', 'TimePeriod', 'Value']].copy()
-df_tourism_clean.columns = ['Country', 'Year', 'Tourism_%']
-df_tourism_clean['Country'] = df_tourism_clean['Country'].replace({
-    'United States of America': 'United States'
-})
+print("="*80)
+print("ECONOMICS COUNTRIES MASTER DATASET GENERATOR")
+print("="*80)
 
-print(f"Loaded {len(df_tourism_clean):,} tourism records")
-
-# [6/8] Merge tourism data
-print("\n[6/8] Merging tourism data...")
-df_master = df_pivot.merge(df_tourism_clean, on=['Country', 'Year'], how='left')
-print(f"Merged: {df_master['Tourism_%'].notna().sum():,} records have tourism data")
-
-# [7/8] Load and merge GDP USD, Population, Inflation, and Debt
-print("\n[7/8] Loading GDP, population, inflation, and debt data...")
-df_dev_ind = pd.read_csv('../raw-data/World_Bank/world_bank_development_indicators.csv')
-df_dev_ind['Year'] = pd.to_datetime(df_dev_ind['date']).dt.year
-
-df_gdp_usd = df_dev_ind[['country', 'Year', 'GDP_current_US', 'population', 'inflation_annual%', 'central_goverment_debt%']].copy()
-df_gdp_usd.columns = ['Country', 'Year', 'GDP_USD', 'Population', 'Inflation_%', 'Debt_%']
-
-country_name_map = {
-    'Yemen, Rep.': 'Yemen',
-    'Egypt, Arab Rep.': 'Egypt',
-    'Bahamas, The': 'Bahamas',
-    'Gambia, The': 'Gambia',
-    'Kyrgyz Republic': 'Kyrgyzstan',
-    'Slovak Republic': 'Slovakia',
-    'Bolivia': 'Bolivia (Plurinational State of)',
-    'Hong Kong SAR, China': 'China, Hong Kong SAR',
-    'Macao SAR, China': 'China, Macao SAR',
-    'Congo, Rep.': 'Congo',
-    'Congo, Dem. Rep.': 'D.R. of the Congo',
-    'Curacao': 'Curaçao',
-    'Cote d\'Ivoire': 'Côte d\'Ivoire',
-    'Korea, Dem. People\'s Rep.': 'D.P.R. of Korea',
-    'Iran, Islamic Rep.': 'Iran (Islamic Republic of)',
-    'Lao PDR': 'Lao People\'s DR',
-    'Micronesia, Fed. Sts.': 'Micronesia (FS of)',
-    'Korea, Rep.': 'Republic of Korea',
-    'Moldova': 'Republic of Moldova',
-    'St. Kitts and Nevis': 'Saint Kitts and Nevis',
-    'St. Lucia': 'Saint Lucia',
-    'West Bank and Gaza': 'State of Palestine',
-    'Turkiye': 'Türkiye',
-    'Tanzania': 'U.R. of Tanzania: Mainland',
-    'Venezuela, RB': 'Venezuela (Bolivarian Republic of)',
-}
-df_gdp_usd['Country'] = df_gdp_usd['Country'].replace(country_name_map)
-
-df_master = df_master.merge(df_gdp_usd, on=['Country', 'Year'], how='left')
-print(f"Merged: {df_master['GDP_USD'].notna().sum():,} records have GDP data")
-print(f"Merged: {df_master['Inflation_%'].notna().sum():,} records have inflation data")
-print(f"Merged: {df_master['Debt_%'].notna().sum():,} records have debt data")
+# The three inputs are independent reads: start them all at once, each stage
+# below waits only for the input it needs (both workbooks are parsed once per
+# version and then read from the Parquet cache, see economics_store.py; the GDP
+# sheet mixes its header row with the numbers, so it is cached as cells and
+# re-headed here). Leaving the block waits for every read, also when a stage
+# fails.
+with ThreadPoolExecutor(max_workers=3) as loader:
+    gdp_sectoral_future = loader.submit(read_sheet_cells, GDP_SECTORAL_XLSX)
+    tourism_future = loader.submit(read_excel_cached, TOURISM_XLSX, sheet_name=TOURISM_SHEET, header=0)
+    dev_ind_future = loader.submit(pd.read_csv, DEV_INDICATORS_CSV)
+
+    # [1/8] Load World Bank GDP sectoral data (title rows above the headers)
+    print("\n[1/8] Loading World Bank GDP sectoral data...")
+    gdp_cells = gdp_sectoral_future.result()
+    header_row = gdp_cells.index[gdp_cells.isin(['Country', 'IndicatorName']).sum(axis=1) == 2]
+    if header_row.empty:
+        raise KeyError("Expected columns 'Country' or 'IndicatorName' not found.")
+    # Column dtypes as pd.read_excel infers them with the header row included (year headers are floats)
+    df_gdp_sectoral_raw = gdp_cells.iloc[header_row[0]:].reset_index(drop=True).infer_objects()
+    new_columns = df_gdp_sectoral_raw.iloc[0].tolist()
+    df_gdp_sectoral = df_gdp_sectoral_raw.copy()
+    df_gdp_sectoral.columns = new_columns
+    df_gdp_sectoral = df_gdp_sectoral.drop(0).reset_index(drop=True)
+
+    if "Country" not in df_gdp_sectoral.columns or "IndicatorName" not in df_gdp_sectoral.columns:
+        raise KeyError("Expected columns 'Country' or 'IndicatorName' not found.")
+
+    print(f"Loaded {len(df_gdp_sectoral):,} rows covering {df_gdp_sectoral['Country'].nunique()} countries")
+
+    # [2/8] Reshape from wide to long format
+    print("\n[2/8] Reshaping data...")
+    year_columns = sorted([col for col in df_gdp_sectoral.columns
+                           if isinstance(col, (int, float)) and float(col) >= 1970 and float(col).is_integer()],
+                          key=lambda x: float(x))
+
+    df_long = df_gdp_sectoral.melt(
+        id_vars=['CountryID', 'Country', 'Currency', 'IndicatorName'],
+        value_vars=year_columns,
+        var_name='Year',
+        value_name='Value'
+    )
+    df_long['Year'] = df_long['Year'].astype(float).astype(int)
+    print(f"Reshaped to {len(df_long):,} rows")
+
+    # [3/8] Pivot indicators to columns
+    print("\n[3/8] Pivoting indicators...")
+    df_pivot = df_long.pivot_table(
+        index=['CountryID', 'Country', 'Currency', 'Year'],
+        columns='IndicatorName',
+        values='Value',
+        aggfunc='first'
+    ).reset_index()
+
+    print(f"Created {len(df_pivot):,} country-year records")
+
+    # [4/8] Calculate sector percentages
+    print("\n[4/8] Calculating sector percentages...")
+    df_pivot.columns = df_pivot.columns.str.strip()
+
+    col_map = {
+        'Agriculture, hunting, forestry, fishing (ISIC A-B)': 'Agriculture',
+        'Mining, Manufacturing, Utilities (ISIC C-E)': 'Mining_Manuf_Util',
+        'Manufacturing (ISIC D)': 'Manufacturing',
+        'Construction (ISIC F)': 'Construction',
+        'Wholesale, retail trade, restaurants and hotels (ISIC G-H)': 'Trade_Retail',
+        'Transport, storage and communication (ISIC I)': 'Transport',
+        'Other Activities (ISIC J-P)': 'Other_Activities',
+        'Total Value Added': 'Total_Value_Added',
+        'Gross Domestic Product (GDP)': 'GDP'
+    }
+    df_pivot = df_pivot.rename(columns=col_map)
+
+    df_pivot['Mining'] = df_pivot['Mining_Manuf_Util'] - df_pivot['Manufacturing']
+    df_pivot['Primary_Value'] = df_pivot['Agriculture'] + df_pivot['Mining']
+    df_pivot['Secondary_Value'] = df_pivot['Manufacturing'] + df_pivot['Construction']
+    df_pivot['Tertiary_Value'] = df_pivot['Trade_Retail'] + df_pivot['Transport'] + df_pivot['Other_Activities']
+
+    df_pivot['Primary_%'] = (df_pivot['Primary_Value'] / df_pivot['Total_Value_Added']) * 100
+    df_pivot['Secondary_%'] = (df_pivot['Secondary_Value'] / df_pivot['Total_Value_Added']) * 100
+    df_pivot['Tertiary_%'] = (df_pivot['Tertiary_Value'] / df_pivot['Total_Value_Added']) * 100
+
+    # [5/8] Load UN Tourism data
+    print("\n[5/8] Loading UN Tourism data...")
+    df_tourism = tourism_future.result()
+
+    df_tourism_clean = df_tourism[['GeoAreaName', 'TimePeriod', 'Value']].copy()
+    df_tourism_clean.columns = ['Country', 'Year', 'Tourism_%']
+
+    print(f"Loaded {len(df_tourism_clean):,} tourism records")
+
+    # [6/8] Merge tourism data
+    print("\n[6/8] Merging tourism data...")
+    df_master = join_countries(df_pivot, df_tourism_clean, 'Country', 'Country', 'un_sna', 'un_tourism', on=['Year'])
+    print(f"Merged: {df_master['Tourism_%'].notna().sum():,} records have tourism data")
+
+    # [7/8] Load and merge GDP USD, Population, Inflation, and Debt
+    print("\n[7/8] Loading GDP, population, inflation, and debt data...")
+    df_dev_ind = dev_ind_future.result()
+    df_dev_ind['Year'] = pd.to_datetime(df_dev_ind['date']).dt.year
+
+    df_gdp_usd = df_dev_ind[['country', 'Year', 'GDP_current_US', 'population', 'inflation_annual%', 'central_goverment_debt%']].copy()
+    df_gdp_usd.columns = ['Country', 'Year', 'GDP_USD', 'Population', 'Inflation_%', 'Debt_%']
+
+    # World Bank names are matched to the national accounts names by M.49 code (see country_registry.py)
+    df_master = join_countries(df_master, df_gdp_usd, 'Country', 'Country', 'un_sna', 'world_bank', on=['Year'])
+    print(f"Merged: {df_master['GDP_USD'].notna().sum():,} records have GDP data")
+    print(f"Merged: {df_master['Inflation_%'].notna().sum():,} records have inflation data")
+    print(f"Merged: {df_master['Debt_%'].notna().sum():,} records have debt data")
 
 # [8/8] Create final dataset
 print("\n[8/8] Creating final dataset...")
@@ -202,13 +205,25 @@ for country in ['United States', 'Germany', 'China']:
 df_final = df_final.drop(columns=['Total_%'])
 
 # Export
-output_path = '../processed-data/economics-countries-master.csv'
-df_final.to_csv(output_path, index=False, na_rep='')
+output_path = data_processing_path / 'processed-data' / 'economics-countries-master.csv'
+if args.check:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        check_path = Path(tmp_dir) / output_path.name
+        write_economics_master(df_final, csv_path=check_path, parquet_path=Path(tmp_dir) / ECONOMICS_MASTER_PARQUET.name)
+        built, committed = check_path.read_bytes(), output_path.read_bytes()
+    if built != committed:
+        built_lines, committed_lines = built.splitlines(), committed.splitlines()
+        changed = sum(a != b for a, b in zip(built_lines, committed_lines)) + abs(len(built_lines) - len(committed_lines))
+        print(f"\n[FAIL] {output_path.name} differs from the build: {changed:,} of {len(committed_lines):,} lines")
+        sys.exit(1)
+    print(f"\n[OK] {output_path.name} is byte-identical to the build")
+    sys.exit(0)
+df_final = write_economics_master(df_final, csv_path=output_path)
 
 print("\n" + "="*80)
 print("EXPORT COMPLETED")
 print("="*80)
-print(f"\nFile: {output_path}")
+print(f"\nFile: {output_path} (+ {ECONOMICS_MASTER_PARQUET.name})")
 print(f"Size: {len(df_final):,} records")
 print(f"Countries: {df_final['Country'].nunique()}")
 print(f"Years: {df_final['Year'].min()}-{df_final['Year'].max()}")
@@ -0,0 +1,451 @@
+"""
+Data Processing Pipeline
+
+Runs the data-processing builders as one dependency graph. Every step is a
+script (or notebook) declared in PIPELINE_STEPS with the steps it depends on;
+steps whose dependencies are done run concurrently, up to --jobs at a time,
+each in its own process with its own directory as working directory, so the
+pipeline can be started from anywhere.
+
+Steps that write the same output file never run at the same time: the one
+declared later waits for the earlier one. The legacy per-week runners write
+the same files as viz_engine.py and are only run when named.
+
+Steps are incremental. Each step declares the files it reads (inputs,
+besides its own script and the outputs of the steps it depends on) and the
+files it writes (outputs); intermediate/pipeline_manifest.json records the
+content hashes of a step's inputs and outputs when it last succeeded. A step
+whose inputs are unchanged and whose outputs are still the ones it wrote is
+skipped, so a plain run after an edit only reruns the steps downstream of it
+(outputs a later default step overwrites are not compared).
+Hashes reuse the build_manifest fingerprints (size and mtime first), so
+unchanged files are not re-read. --force reruns every selected step.
+
+Each step's output goes to intermediate/logs/<step>.log.
+
+Usage:
+    python pipeline.py list
+    python pipeline.py run                          # all default steps, one job per CPU
+    python pipeline.py run --jobs 4
+    python pipeline.py run --force                  # rerun steps that are up to date
+    python pipeline.py run week3 week4 --with-deps  # named steps and everything they need
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+
+from acled_store import data_processing_path, intermediate_path
+from build_manifest import file_fingerprint, load_manifest, save_manifest
+
+LOG_DIR = intermediate_path / 'logs'
+PIPELINE_MANIFEST_PATH = intermediate_path / 'pipeline_manifest.json'
+NOTEBOOK_OUTPUT_DIR = intermediate_path / 'notebooks'
+
+VIZ_ENGINE_OUTPUTS = [
+    'viz1_bar_chart_sectors_conflicts.json', 'viz2_stacked_bar_sectors.json', 'viz3_event_types.json',
+    'viz4_heatmap_event_types_years.json', 'viz5_waffle_sectors_by_event_type.json',
+    'viz6_stream_mexico_india_timeline.json', 'viz7_maps.json', 'viz8_bubble_map_fatalities.json',
+    'viz9_intervention_flows.json',
+    # Typed-array copies of the specs that set 'binary' (a missing one reruns the step)
+    'viz8_bubble_map_fatalities.bin', 'viz9_intervention_flows.bin',
+]
+# Where publish puts them, so a missing published copy reruns publish
+PUBLISHED_BINARY_OUTPUTS = [f'../public/src/assets/data/{name}' for name in VIZ_ENGINE_OUTPUTS if name.endswith('.bin')]
+
+# Raw and code inputs shared by several steps
+ECONOMICS_RAW_INPUTS = ['raw-data/World_Bank/Download-GDPcurrent-NCU-countries.xlsx',
+                        'raw-data/UN_Tourism/UN_Tourism_8_9_1_TDGDP_04_2025.xlsx']
+ACLED_CODE_INPUTS = ['acled_store.py', 'acled_actors.py']
+CUBE_CODE_INPUTS = ['acled_cube.py', 'acled_store.py']
+VIZ_CODE_INPUTS = ['viz_specs.py', 'viz_output.py', 'country_registry.py', 'economics_store.py']
+
+# run: script or notebook, relative to data-processing/
+# deps: steps that must finish first
+# inputs: files or directories read besides the script and the deps' outputs (relative to data-processing/)
+# outputs: files or directories written (viz-datasets/ unless a path)
+# default: part of a plain `run` (False for runners that duplicate viz_engine.py)
+PIPELINE_STEPS = [
+    {
+        'name': 'acled-snapshot',
+        'run': 'acled_store.py',
+        'args': ['convert'],
+        'deps': [],
+        'inputs': ['raw-data/ACLED/ACLED_2025-10-29.csv'],
+        'outputs': ['intermediate/acled/events'],
+    },
+    {
+        'name': 'acled-cube',
+        'run': 'acled_cube.py',
+        'args': ['build'],
+        'deps': ['acled-snapshot'],
+        'inputs': ['acled_store.py'],
+        'outputs': ['intermediate/acled/conflict_cube.parquet'],
+    },
+    {
+        'name': 'acled-actors',
+        'run': 'acled_actors.py',
+        'args': ['build'],
+        'deps': ['acled-snapshot'],
+        'inputs': ['acled_store.py'],
+        'outputs': ['intermediate/acled/actor_dictionary.parquet'],
+    },
+    {
+        'name': 'acled-actor-stats',
+        'run': 'acled_actor_stats.py',
+        'args': ['build'],
+        'deps': ['acled-actors'],
+        'inputs': ['intermediate/acled/events'] + ACLED_CODE_INPUTS,
+        'outputs': ['intermediate/acled/actor_stats.parquet'],
+    },
+    {
+        'name': 'acled-assoc',
+        'run': 'acled_assoc.py',
+        'args': ['build'],
+        'deps': ['acled-actors'],
+        'inputs': ['intermediate/acled/events'] + ACLED_CODE_INPUTS,
+        'outputs': ['intermediate/acled/assoc_actors'],
+    },
+    {
+        'name': 'country-mapping',
+        'run': 'notebooks/build-country-mapping.py',
+        'args': ['build'],
+        'deps': [],
+        'inputs': ['raw-data/Country_Mapping', 'acled_store.py', 'build_manifest.py'],
+        'outputs': ['processed-data/master_country_mapping.csv'],
+    },
+    {
+        'name': 'country-registry',
+        'run': 'country_registry.py',
+        'args': ['build'],
+        'deps': ['acled-snapshot', 'country-mapping'],
+        'inputs': ECONOMICS_RAW_INPUTS + ['raw-data/world-atlas', '../node_modules/world-atlas/countries-110m.json',
+                                          'acled_store.py', 'economics_store.py'],
+        'outputs': ['intermediate/country_registry'],
+    },
+    {
+        'name': 'economics-master',
+        'run': 'notebooks/create-economics-master.py',
+        'deps': ['country-registry'],
+        'inputs': ECONOMICS_RAW_INPUTS + ['raw-data/World_Bank/world_bank_development_indicators.csv',
+                                          'economics_store.py', 'country_registry.py'],
+        'outputs': ['processed-data/economics-countries-master.csv',
+                    'processed-data/economics-countries-master.parquet'],
+    },
+    {
+        'name': 'viz-datasets',
+        'run': 'viz_engine.py',
+        'args': ['build'],
+        'deps': ['acled-snapshot', 'country-registry', 'economics-master'],
+        'inputs': ['raw-data/UCDP/BattleDeaths_v25_1.csv', 'process_interventions.py', 'acled_shared.py',
+                   'acled_cube.py', 'build_manifest.py'] + ACLED_CODE_INPUTS + VIZ_CODE_INPUTS,
+        'outputs': VIZ_ENGINE_OUTPUTS,
+    },
+    {
+        'name': 'week2',
+        'run': 'notebooks/week2-visualisations.ipynb',
+        'deps': ['acled-cube', 'country-registry', 'economics-master'],
+        'inputs': CUBE_CODE_INPUTS + VIZ_CODE_INPUTS,
+        'outputs': ['viz2-2_pyramid_gdp_per_capita.json', 'viz2-3_ridge_inflation.json',
+                    'viz2-3b_violin_debt_per_capita.json'],
+    },
+    {
+        'name': 'sankey-dates',
+        'run': 'scripts/regenerate_sankey_with_dates.py',
+        'deps': ['acled-snapshot', 'acled-actor-stats'],
+        'inputs': ['acled_actor_stats.py', 'publish.py'] + ACLED_CODE_INPUTS + VIZ_CODE_INPUTS,
+        'outputs': ['viz10_actor_sankey.json'],
+    },
+    {
+        'name': 'publish',
+        'run': 'publish.py',
+        'args': ['publish'],
+        'deps': ['viz-datasets', 'week2', 'sankey-dates'],
+        'inputs': ['viz-datasets', 'acled_store.py', 'build_manifest.py'],
+        'outputs': ['../public/src/assets/data/manifest.json'] + PUBLISHED_BINARY_OUTPUTS,
+    },
+    {
+        'name': 'fix-viz2',
+        'run': 'scripts/fix_viz2.py',
+        'deps': ['acled-cube', 'country-registry', 'economics-master'],
+        'inputs': ['publish.py'] + CUBE_CODE_INPUTS + VIZ_CODE_INPUTS,
+        'outputs': ['viz2_stacked_bar_sectors.json'],
+        'default': False,
+    },
+    {
+        'name': 'week3',
+        'run': 'notebooks/week3-visualisations.py',
+        'deps': ['acled-cube'],
+        'inputs': CUBE_CODE_INPUTS + VIZ_CODE_INPUTS,
+        'outputs': ['viz6_stream_mexico_india_timeline.json'],
+        'default': False,
+    },
+    {
+        'name': 'week4',
+        'run': 'notebooks/week4-visualisations.ipynb',
+        'deps': ['acled-cube', 'country-registry', 'economics-master'],
+        'inputs': CUBE_CODE_INPUTS + VIZ_CODE_INPUTS,
+        'outputs': ['viz7_maps.json', 'viz8_bubble_map_fatalities.json'],
+        'default': False,
+    },
+    {
+        'name': 'interventions',
+        'run': 'process_interventions.py',
+        'deps': ['country-registry'],
+        'inputs': ['raw-data/UCDP/BattleDeaths_v25_1.csv'] + VIZ_CODE_INPUTS,
+        'outputs': ['viz9_intervention_flows.json', 'viz9_intervention_flows.bin'],
+        'default': False,
+    },
+    {
+        'name': 'sankey',
+        'run': '../temp/regenerate_sankey_data.py',
+        'deps': ['acled-snapshot', 'acled-actor-stats'],
+        'inputs': ['acled_actor_stats.py', 'publish.py'] + ACLED_CODE_INPUTS + VIZ_CODE_INPUTS,
+        'outputs': ['viz10_actor_sankey.json'],
+        'default': False,
+    },
+]
+
+STEPS_BY_NAME = {step['name']: step for step in PIPELINE_STEPS}
+
+
+def step_command(step):
+    """Command line and working directory of a step"""
+    path = (data_processing_path / step['run']).resolve()
+    if path.suffix == '.ipynb':
+        command = [sys.executable, '-m', 'jupyter', 'nbconvert', '--to', 'notebook', '--execute', str(path),
+                   '--output-dir', str(NOTEBOOK_OUTPUT_DIR)]
+    else:
+        command = [sys.executable, str(path)] + step.get('args', [])
+    return command, path.parent
+
+
+def step_path(entry):
+    """Path of a step input or output: relative to data-processing/, bare file names in viz-datasets/"""
+    return data_processing_path / (entry if '/' in entry or entry.endswith('.py') else f'viz-datasets/{entry}')
+
+
+def step_inputs(step):
+    """Paths a step reads: its script, its declared inputs and the outputs of the steps it depends on"""
+    entries = [step['run']] + step.get('inputs', [])
+    for dep in step['deps']:
+        entries += STEPS_BY_NAME[dep]['outputs']
+    return list(dict.fromkeys(step_path(entry) for entry in entries))
+
+
+def path_fingerprints(paths, previous=None):
+    """
+    {relative path: fingerprint} of every file under paths.
+
+    Directories are expanded to their files; a missing path is recorded as
+    None, so its later appearance makes the step stale.
+    """
+    previous = previous or {}
+    fingerprints = {}
+    for path in paths:
+        files = sorted(p for p in path.rglob('*') if p.is_file()) if path.is_dir() else [path]
+        if path.is_dir() and not files:
+            fingerprints[os.path.relpath(path, data_processing_path)] = None
+        for file in files:
+            key = os.path.relpath(file, data_processing_path)
+            fingerprints[key] = file_fingerprint(file, previous.get(key)) if file.exists() else None
+    return fingerprints
+
+
+def _hashes(fingerprints):
+    return {key: fingerprint and fingerprint['sha256'] for key, fingerprint in fingerprints.items()}
+
+
+def checked_outputs(step):
+    """Outputs of a step that no later default step overwrites (those are expected to change)"""
+    later = PIPELINE_STEPS[PIPELINE_STEPS.index(step) + 1:]
+    overwritten = {output for other in later if other.get('default', True) for output in other['outputs']}
+    return [step_path(output) for output in step['outputs'] if output not in overwritten]
+
+
+def step_fingerprints(step, previous=None):
+    """{'inputs': ..., 'outputs': ...} fingerprints of a step's files"""
+    previous = previous or {}
+    return {'inputs': path_fingerprints(step_inputs(step), previous.get('inputs')),
+            'outputs': path_fingerprints(checked_outputs(step), previous.get('outputs'))}
+
+
+def step_is_current(step, fingerprints, manifest):
+    """
+    True when the step last succeeded with the same command and inputs and
+    its outputs are still what it wrote (not missing, nor overwritten by a
+    step sharing them)
+    """
+    entry = manifest.get(step['name'])
+    return (entry is not None
+            and entry['command'] == [step['run']] + step.get('args', [])
+            and all(step_path(output).exists() for output in step['outputs'])
+            and all(_hashes(entry[kind]) == _hashes(fingerprints[kind]) for kind in ('inputs', 'outputs')))
+
+
+def select_steps(targets=None, with_deps=False):
+    """
+    Names of the steps to run, in declaration order.
+
+    No targets means every default step; with_deps adds everything the targets
+    depend on, transitively.
+    """
+    if targets is None:
+        selected = {step['name'] for step in PIPELINE_STEPS if step.get('default', True)}
+    else:
+        unknown = [name for name in targets if name not in STEPS_BY_NAME]
+        if unknown:
+            raise ValueError(f'Unknown steps: {", ".join(unknown)} (see `python pipeline.py list`)')
+        selected = set(targets)
+    if with_deps:
+        pending = list(selected)
+        while pending:
+            for dep in STEPS_BY_NAME[pending.pop()]['deps']:
+                if dep not in selected:
+                    selected.add(dep)
+                    pending.append(dep)
+    return [step['name'] for step in PIPELINE_STEPS if step['name'] in selected]
+
+
+def plan_dependencies(names):
+    """
+    {step: set of selected steps it waits for}.
+
+    Declared dependencies outside the selection are assumed to be built
+    already; selected steps sharing an output wait for the earlier-declared one
+    (ordering only: that one failing does not skip them).
+    """
+    selected = set(names)
+    waits_for = {name: set(STEPS_BY_NAME[name]['deps']) & selected for name in names}
+    writers = {}
+    for name in names:
+        for output in STEPS_BY_NAME[name]['outputs']:
+            if output in writers:
+                waits_for[name].add(writers[output])
+            writers[output] = name
+
+    # Kahn's algorithm, only to reject cycles before anything runs
+    remaining = {name: set(deps) for name, deps in waits_for.items()}
+    while remaining:
+        ready = [name for name, deps in remaining.items() if not deps]
+        if not ready:
+            raise ValueError(f'Dependency cycle between: {", ".join(sorted(remaining))}')
+        for name in ready:
+            del remaining[name]
+        for deps in remaining.values():
+            deps.difference_update(ready)
+    return waits_for
+
+
+def run_step(name, log_dir=LOG_DIR, manifest=None, force=False):
+    """
+    Run one step in its own process unless it is up to date in manifest;
+    returns (name, return code, seconds, whether it ran).
+
+    manifest is updated in place: the step's input and output fingerprints on
+    success, no entry on failure.
+    """
+    step = STEPS_BY_NAME[name]
+    manifest = {} if manifest is None else manifest
+    start = time.perf_counter()
+    previous = manifest.get(name)
+    if not force and step_is_current(step, step_fingerprints(step, previous), manifest):
+        return name, 0, time.perf_counter() - start, False
+
+    manifest.pop(name, None)
+    command, cwd = step_command(step)
+    with open(Path(log_dir) / f'{name}.log', 'w', encoding='utf-8') as log:
+        returncode = subprocess.run(command, cwd=cwd, stdout=log, stderr=subprocess.STDOUT).returncode
+    if returncode == 0:
+        manifest[name] = {'command': [step['run']] + step.get('args', []), **step_fingerprints(step, previous)}
+    return name, returncode, time.perf_counter() - start, True
+
+
+def run_pipeline(targets=None, jobs=None, with_deps=False, log_dir=LOG_DIR, force=False,
+                 manifest_path=PIPELINE_MANIFEST_PATH):
+    """
+    Run the selected steps, each as soon as the steps it waits for succeeded,
+    with at most jobs (default: one per CPU) running at once.
+
+    Steps that are up to date are skipped unless force; steps downstream of a
+    failure are skipped too. Returns the names of the failed and skipped steps.
+    """
+    names = select_steps(targets, with_deps)
+    waits_for = plan_dependencies(names)
+    needs = {name: set(STEPS_BY_NAME[name]['deps']) & set(names) for name in names}
+    jobs = jobs or os.cpu_count()
+    Path(log_dir).mkdir(parents=True, exist_ok=True)
+    NOTEBOOK_OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    print(f'Running {len(names)} steps on {jobs} jobs (logs: {log_dir})')
+
+    manifest = load_manifest(manifest_path)
+    done, failed, running = set(), [], {}
+    pending = list(names)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        while pending or running:
+            blocked = [name for name in pending if needs[name] & set(failed)]
+            while blocked:
+                for name in blocked:
+                    pending.remove(name)
+                    failed.append(name)
+                    print(f'  [SKIPPED] {name} (needs a failed step)')
+                blocked = [name for name in pending if needs[name] & set(failed)]
+
+            for name in [name for name in pending if waits_for[name] <= done | set(failed)]:
+                if len(running) >= jobs:
+                    break
+                pending.remove(name)
+                running[pool.submit(run_step, name, log_dir, manifest, force)] = name
+            if not running:
+                continue
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                name, returncode, seconds, ran = future.result()
+                del running[future]
+                if returncode == 0:
+                    done.add(name)
+                    print(f'  [OK] {name} ({seconds:.1f}s)' if ran else f'  [UP TO DATE] {name}')
+                else:
+                    failed.append(name)
+                    print(f'  [FAILED] {name} (exit {returncode}, see {Path(log_dir) / f"{name}.log"})')
+
+    save_manifest(manifest, manifest_path)
+    print(f'[OK] Pipeline: {len(done)}/{len(names)} steps in {time.perf_counter() - start:.1f}s'
+          + (f', failed or skipped: {", ".join(failed)}' if failed else ''))
+    return failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the data-processing builders as a dependency graph')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    subparsers.add_parser('list', help='Show the steps and their dependencies')
+
+    run_parser = subparsers.add_parser('run', help='Run steps concurrently in dependency order')
+    run_parser.add_argument('steps', nargs='*', metavar='STEP', help='Steps to run (default: all default steps)')
+    run_parser.add_argument('--jobs', '-j', type=int, help='Steps to run at once (default: one per CPU)')
+    run_parser.add_argument('--with-deps', action='store_true', help='Also run the steps the named steps need')
+    run_parser.add_argument('--force', action='store_true', help='Rerun steps even when they are up to date')
+
+    args = parser.parse_args()
+
+    if args.command == 'list':
+        for step in PIPELINE_STEPS:
+            flag = '' if step.get('default', True) else '  (only when named)'
+            print(f'{step["name"]:<18} {step["run"]:<42} <- {", ".join(step["deps"]) or "-"}{flag}')
+    elif args.command == 'run':
+        try:
+            failed = run_pipeline(args.steps or None, args.jobs, args.with_deps, force=args.force)
+        except ValueError as err:
+            parser.error(str(err))
+        sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,12 +1,19 @@
-import pandas as pd
-import json
+import argparse
+import re
 from pathlib import Path
 
+import numpy as np
+import pandas as pd
+
+from country_registry import country_centroids, m49_codes, registry_available
+from viz_output import write_viz_json
+
 # Paths
 raw_data_path = Path(__file__).parent / 'raw-data'
 viz_datasets_path = Path(__file__).parent / 'viz-datasets'
+ucdp_battle_deaths_path = raw_data_path / 'UCDP' / 'BattleDeaths_v25_1.csv'
 
-# UCDP name -> Standard name for display and centroid lookup
+# UCDP name -> Standard name for display (the country registry knows both as ucdp aliases)
 ucdp_name_mapping = {
     'Russia (Soviet Union)': 'Russia',
     'DR Congo (Zaire)': 'DR Congo',
@@ -23,8 +30,9 @@ ucdp_name_mapping = {
     'Central African Republic': 'CAR',
 }
 
-# Country centroids (lat, lon) - approximate centers
-centroids = {
+# Approximate country centroids (lat, lon) by display name: the last resort for countries the
+# registry cannot place (no registry built yet, or no topology to take centroids from)
+FALLBACK_CENTROIDS = {
     'Afghanistan': [33.93, 67.71],
     'Albania': [41.15, 20.17],
     'Algeria': [28.03, 1.66],
@@ -146,13 +154,12 @@ centroids = {
 }
 
 def get_intervention_type(num_interveners):
-    """Categorize intervention by number of interveners"""
-    if num_interveners <= 3:
-        return 'direct'  # Direct military intervention
-    elif num_interveners <= 15:
-        return 'coalition'  # Military coalition
-    else:
-        return 'peacekeeping'  # UN peacekeeping mission
+    """Categorize interventions by number of interveners (a Series of counts)"""
+    return pd.Series(np.select(
+        [num_interveners <= 3, num_interveners <= 15],
+        ['direct', 'coalition'],  # Direct military intervention, military coalition
+        'peacekeeping'  # UN peacekeeping mission
+    ), index=num_interveners.index)
 
 # UCDP code mappings
 INCOMPATIBILITY_MAP = {
@@ -167,97 +174,114 @@ CONFLICT_TYPE_MAP = {
     4: 'Internationalized civil war'
 }
 
+# Intervention locations excluded as usually misattributed casualty counts
+WESTERN_LOCATIONS = ['United States of America', 'United Kingdom', 'France', 'Germany', 'Canada', 'Australia']
 
-def main():
+
+def as_text(values):
+    """Column as strings, missing values rendered as 'nan' like str() does"""
+    return values.fillna('nan').astype(str)
+
+
+def standard_names(names):
+    """Map UCDP names to the standard names used for display"""
+    return names.map(ucdp_name_mapping).fillna(names)
+
+
+def country_positions(names):
+    """
+    {name: [lat, lon]} of the distinct country names that can be placed:
+    the registry centroid, else FALLBACK_CENTROIDS
+    """
+    names = pd.Series(pd.unique(names))
+    positions = {}
+    if registry_available():
+        centroids = country_centroids(m49_codes(names, 'ucdp'))
+        placed = centroids['lat'].notna().to_numpy()
+        positions = {name: [round(float(lat), 2), round(float(lon), 2)]
+                     for name, lat, lon in zip(names[placed], centroids['lat'][placed], centroids['lon'][placed])}
+    for name in names:
+        if name not in positions and name in FALLBACK_CENTROIDS:
+            positions[name] = FALLBACK_CENTROIDS[name]
+    return positions
+
+
+def join_distinct(frame, keys, col):
+    """Sorted distinct values of col joined with ', ' per key group, indexed by keys"""
+    distinct = frame[keys + [col]].drop_duplicates().sort_values(keys + [col])
+    starts = np.flatnonzero(~distinct.duplicated(keys).to_numpy())
+    bounds = np.append(starts, len(distinct))
+    values = distinct[col].tolist()
+    joined = [', '.join(values[a:b]) for a, b in zip(bounds[:-1], bounds[1:])]
+    return pd.Series(joined, index=pd.MultiIndex.from_frame(distinct.iloc[starts][keys]))
+
+
+def build_intervention_flows(start_year=2015, end_year=2024):
+    """Build the viz9 intervention flow dataset from UCDP BattleDeaths"""
     # Load UCDP BattleDeaths
-    df = pd.read_csv(raw_data_path / 'UCDP' / 'BattleDeaths_v25_1.csv')
+    df = pd.read_csv(ucdp_battle_deaths_path)
 
-    # Filter to 2015-2024
-    df = df[(df['year'] >= 2015) & (df['year'] <= 2024)]
+    # Filter to the requested years
+    df = df[(df['year'] >= start_year) & (df['year'] <= end_year)]
 
     # Filter to records with interventions
-    df_int = df[df['side_a_2nd'].notna() & (df['side_a_2nd'] != '')].copy()
+    df_int = df[df['side_a_2nd'].notna() & (df['side_a_2nd'] != '')]
 
     # Exclude records where location is a Western country (these are usually misattributed casualty counts)
-    western_locations = ['United States of America', 'United Kingdom', 'France', 'Germany', 'Canada', 'Australia']
-    for loc in western_locations:
-        df_int = df_int[~df_int['location_inc'].str.contains(loc, na=False)]
+    western_pattern = '|'.join(re.escape(loc) for loc in WESTERN_LOCATIONS)
+    df_int = df_int[~df_int['location_inc'].str.contains(western_pattern, na=False)]
 
     print(f'Processing {len(df_int)} intervention records...')
 
-    # Build flow data
-    flows = []
-    missing_centroids = set()
+    # Conflict context shared by every intervener of a record
+    conflict_issue = df_int.get('incompatibility', pd.Series(0, index=df_int.index)).map(INCOMPATIBILITY_MAP).fillna('Unknown')
+    territory = as_text(df_int.get('territory_name', pd.Series('', index=df_int.index))).str.strip()
+    has_territory = (territory != '') & (territory != 'nan')
+    conflict_issue = conflict_issue.where(~has_territory, conflict_issue + ' (' + territory + ')')
 
-    for _, row in df_int.iterrows():
+    records = pd.DataFrame({
         # Parse interveners
-        interveners_raw = [x.strip().replace('Government of ', '') for x in str(row['side_a_2nd']).split(',')]
-        num_interveners = len(interveners_raw)
-        intervention_type = get_intervention_type(num_interveners)
-
+        'from': df_int['side_a_2nd'].astype(str).str.split(','),
         # Get location - handle multi-country locations by taking first
-        location_raw = str(row['location_inc']).split(',')[0].strip()
-
+        'to': standard_names(as_text(df_int['location_inc']).str.split(',').str[0].str.strip()),
+        'year': df_int['year'].astype(int),
+        'deaths': df_int['bd_best'].astype(int),
         # Get opponent (side_b) - clean up "Government of" prefix
-        opponent_raw = str(row['side_b']).replace('Government of ', '').strip()
-        opponent = ucdp_name_mapping.get(opponent_raw, opponent_raw)
-
-        # Get conflict context
-        incomp_code = row.get('incompatibility', 0)
-        conflict_type_code = row.get('type_of_conflict', 0)
-        conflict_issue = INCOMPATIBILITY_MAP.get(incomp_code, 'Unknown')
-        conflict_type = CONFLICT_TYPE_MAP.get(conflict_type_code, 'Armed conflict')
-
-        # Get territory name if available
-        territory = str(row.get('territory_name', '')).strip()
-        if territory and territory != 'nan':
-            conflict_issue = f'{conflict_issue} ({territory})'
-
-        # Clean names
-        interveners = [ucdp_name_mapping.get(i, i) for i in interveners_raw]
-        location = ucdp_name_mapping.get(location_raw, location_raw)
-
-        year = int(row['year'])
-        deaths = int(row['bd_best'])
-
-        for intervener in interveners:
-            # Skip if same country (domestic)
-            if intervener == location:
-                continue
-            # Check for missing centroids
-            if intervener not in centroids:
-                missing_centroids.add(intervener)
-                continue
-            if location not in centroids:
-                missing_centroids.add(location)
-                continue
-
-            flows.append({
-                'from': intervener,
-                'to': location,
-                'year': year,
-                'deaths': deaths,
-                'type': intervention_type,
-                'num_interveners': num_interveners,
-                'opponent': opponent,
-                'issue': conflict_issue,
-                'conflict_type': conflict_type
-            })
-
-    if missing_centroids:
-        print(f'Missing centroids for: {missing_centroids}')
-
-    print(f'Raw flows: {len(flows)}')
+        'opponent': standard_names(as_text(df_int['side_b']).str.replace('Government of ', '', regex=False).str.strip()),
+        'issue': conflict_issue,
+        'conflict_type': df_int.get('type_of_conflict', pd.Series(0, index=df_int.index)).map(CONFLICT_TYPE_MAP).fillna('Armed conflict'),
+    })
+    records['num_interveners'] = records['from'].str.len()
+    records['type'] = get_intervention_type(records['num_interveners'])
+
+    # One row per intervener, in record order
+    flow_df = records.explode('from')
+    flow_df['from'] = standard_names(flow_df['from'].str.strip().str.replace('Government of ', '', regex=False))
+
+    # Skip domestic rows
+    flow_df = flow_df[flow_df['from'] != flow_df['to']]
+
+    # Place every country from the registry centroids (resolved once per distinct name),
+    # falling back to FALLBACK_CENTROIDS; only countries neither knows are left out
+    positions = country_positions(pd.concat([flow_df['from'], flow_df['to']]))
+    placed = flow_df['from'].isin(positions) & flow_df['to'].isin(positions)
+    if not placed.all():
+        missing = set(flow_df.loc[~placed, 'from']) | set(flow_df.loc[~placed, 'to'])
+        print(f'Skipping {int((~placed).sum())} rows of countries without a centroid: {sorted(missing - set(positions))}')
+    flow_df = flow_df[placed]
+
+    print(f'Raw flows: {len(flow_df)}')
 
     # Aggregate by (from, to, year) - keep type info and collect opponents/issues
-    flow_df = pd.DataFrame(flows)
-    flow_agg = flow_df.groupby(['from', 'to', 'year', 'type']).agg({
-        'deaths': 'sum',
-        'num_interveners': 'first',
-        'opponent': lambda x: ', '.join(sorted(set(x))),
-        'issue': lambda x: ', '.join(sorted(set(x))),
-        'conflict_type': 'first'
-    }).reset_index()
+    flow_keys = ['from', 'to', 'year', 'type']
+    flow_agg = flow_df.groupby(flow_keys).agg(
+        deaths=('deaths', 'sum'),
+        num_interveners=('num_interveners', 'first'),
+        conflict_type=('conflict_type', 'first')
+    )
+    for col in ['opponent', 'issue']:
+        flow_agg[col] = join_distinct(flow_df, flow_keys, col)
+    flow_agg = flow_agg[['deaths', 'num_interveners', 'opponent', 'issue', 'conflict_type']].reset_index()
     flow_agg['deaths'] = flow_agg['deaths'].astype(int)
 
     print(f'Aggregated flows: {len(flow_agg)}')
@@ -266,28 +290,40 @@ def main():
     print('\nFlows by year:')
     print(flow_agg.groupby('year').size())
 
+    # Only the centroids the flows use
+    used = sorted(set(flow_agg['from']) | set(flow_agg['to']))
+
     # Build output JSON
     output = {
         'metadata': {
             'title': 'Military Interventions in Armed Conflicts',
             'source': 'UCDP Battle Deaths Dataset v25.1',
-            'date_range': '2015-2024',
+            'date_range': f'{start_year}-{end_year}',
             'note': 'Deaths in internationalized conflicts where foreign governments provided military support'
         },
-        'centroids': centroids,
+        'centroids': {name: positions[name] for name in used},
         'flows': flow_agg.to_dict(orient='records')
     }
+    return output
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build the viz9 intervention flow dataset')
+    parser.add_argument('--start-year', type=int, default=2015, help='First UCDP year to include')
+    parser.add_argument('--end-year', type=int, default=2024, help='Last UCDP year to include')
+    args = parser.parse_args()
+
+    output = build_intervention_flows(args.start_year, args.end_year)
 
     # Save
     output_file = viz_datasets_path / 'viz9_intervention_flows.json'
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(output, f, indent=2)
+    write_viz_json(output, output_file, ensure_ascii=True, columnar=['flows'], binary=True)
 
     print(f'\n[OK] Saved: {output_file} ({output_file.stat().st_size / 1024:.1f} KB)')
 
     # Show sample
     print('\nTop 10 flows by deaths:')
-    print(flow_agg.nlargest(10, 'deaths').to_string())
+    print(pd.DataFrame(output['flows']).nlargest(10, 'deaths').to_string())
 
 if __name__ == '__main__':
     main()
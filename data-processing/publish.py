@@ -0,0 +1,119 @@
+"""
+Publish Viz Datasets
+
+Copies the built datasets in viz-datasets/ (JSON files and their .bin
+copies) to the website's public/src/assets/data/. Precompressed .gz/.br
+companions are not published: Vite does not serve them from src/assets.
+
+Every file is hashed and only copied when its content differs from the
+published copy; copies are written to a temporary file and renamed, so the
+dev server never reads a partial file. public/src/assets/data/manifest.json
+records the SHA-256 and size of every published file (the frontend can
+cache-bust by hash, see datasetUrl() in public/src/utils/vizData.js). Files
+a previous publish wrote that no longer exist in viz-datasets/ are removed.
+
+Usage:
+    python publish.py publish                          # everything in viz-datasets/
+    python publish.py publish viz2_stacked_bar_sectors.json
+"""
+
+import argparse
+import fnmatch
+import os
+import shutil
+from pathlib import Path
+
+from acled_store import data_processing_path
+from build_manifest import content_hash, load_manifest, save_manifest
+
+viz_datasets_path = data_processing_path / 'viz-datasets'
+PUBLIC_DATA_PATH = data_processing_path.parent / 'public' / 'src' / 'assets' / 'data'
+PUBLISH_MANIFEST_NAME = 'manifest.json'
+
+# Files of a dataset: the JSON file and what viz_output.write_viz_json writes next to it
+PUBLISHED_PATTERNS = ['*.json', '*.bin']
+
+
+def dataset_files(src_dir=viz_datasets_path, names=None):
+    """
+    Publishable files in src_dir, sorted.
+
+    names selects datasets by file name; a JSON name also selects its binary copy.
+    """
+    files = sorted(path for path in Path(src_dir).iterdir()
+                   if path.is_file() and any(fnmatch.fnmatch(path.name, pattern) for pattern in PUBLISHED_PATTERNS))
+    if names is None:
+        return files
+    stems = {Path(name).name.split('.')[0] for name in names}
+    unknown = stems - {path.name.split('.')[0] for path in files}
+    if unknown:
+        raise ValueError(f'No built dataset for: {", ".join(sorted(unknown))} (in {src_dir})')
+    return [path for path in files if path.name.split('.')[0] in stems]
+
+
+def _copy_atomic(src, dest):
+    """Copy a file next to its destination, then rename it into place"""
+    tmp_path = dest.with_name(dest.name + '.tmp')
+    shutil.copyfile(src, tmp_path)
+    os.replace(tmp_path, dest)
+
+
+def publish_viz_datasets(names=None, src_dir=viz_datasets_path, dest_dir=PUBLIC_DATA_PATH):
+    """
+    Publish datasets (all by default) and update the manifest.
+
+    Returns the names of the copied and removed files. Removing stale files
+    only happens on a full publish.
+    """
+    dest_dir = Path(dest_dir)
+    dest_dir.mkdir(parents=True, exist_ok=True)
+    manifest_path = dest_dir / PUBLISH_MANIFEST_NAME
+    manifest = load_manifest(manifest_path)
+    published = manifest.setdefault('files', {})
+
+    copied = []
+    for src in dataset_files(src_dir, names):
+        dest = dest_dir / src.name
+        sha256 = content_hash(src)
+        if not dest.exists() or content_hash(dest) != sha256:
+            _copy_atomic(src, dest)
+            copied.append(src.name)
+        published[src.name] = {'sha256': sha256, 'size': src.stat().st_size}
+
+    removed = []
+    if names is None:
+        current = {path.name for path in dataset_files(src_dir)}
+        for name in sorted(set(published) - current):
+            (dest_dir / name).unlink(missing_ok=True)
+            del published[name]
+            removed.append(name)
+
+    save_manifest(manifest, manifest_path)
+    return copied, removed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Publish the viz datasets to the website assets')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    publish_parser = subparsers.add_parser('publish', help='Copy changed datasets and update the manifest')
+    publish_parser.add_argument('names', nargs='*', metavar='FILE', help='Dataset files to publish (default: all)')
+    publish_parser.add_argument('--src', type=Path, default=viz_datasets_path, help='Built datasets directory')
+    publish_parser.add_argument('--dest', type=Path, default=PUBLIC_DATA_PATH, help='Website data directory')
+
+    args = parser.parse_args()
+
+    if args.command == 'publish':
+        try:
+            copied, removed = publish_viz_datasets(args.names or None, args.src, args.dest)
+        except ValueError as err:
+            parser.error(str(err))
+        for name in copied:
+            print(f'  copied {name}')
+        for name in removed:
+            print(f'  removed {name}')
+        print(f'[OK] Published to {args.dest}: {len(copied)} changed, {len(removed)} removed')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,33 +1,41 @@
 import pandas as pd
 import numpy as np
-import json
+import sys
 from pathlib import Path
 
-# Set paths
-raw_data_path = Path('../raw-data')
-processed_data_path = Path('../processed-data')
-viz_datasets_path = Path('../viz-datasets')
-
-# Load data
-df_acled = pd.read_csv(raw_data_path / 'ACLED' / 'ACLED_2025-10-29.csv', encoding='utf-8-sig')
-df_econ = pd.read_csv(processed_data_path / 'economics-countries-master.csv')
-
-print(f"ACLED: {len(df_acled):,} events")
-print(f"Economics: {len(df_econ):,} country-years")
-
-# Get the current year from the data
-current_year = df_acled['year'].max()
+# Set paths (relative to this file, so the script runs from any directory)
+data_processing_path = Path(__file__).resolve().parent.parent
+processed_data_path = data_processing_path / 'processed-data'
+viz_datasets_path = data_processing_path / 'viz-datasets'
+
+sys.path.insert(0, str(data_processing_path))
+from acled_cube import CUBE_PATH, load_conflict_cube
+from acled_store import acled_year_range
+from country_registry import join_countries
+from economics_store import load_economics_master
+from publish import PUBLIC_DATA_PATH, publish_viz_datasets
+from viz_output import write_viz_json
+
+# Get the current year from the cube metadata
+_, current_year = acled_year_range(CUBE_PATH)
 print(f"Latest year in data: {current_year}")
 
-# Filter to last 10 years
+# Load data: country-year event counts and fatalities of the last 10 years from
+# the pre-aggregated conflict cube instead of the raw event CSV
 last_10_years_start = current_year - 9
-df_acled_recent = df_acled[df_acled['year'] >= last_10_years_start].copy()
+cube_recent = load_conflict_cube(
+    columns=['country', 'year', 'event_count', 'fatalities'],
+    years=(last_10_years_start, current_year)
+)
+df_econ = load_economics_master()
 
+print(f"ACLED: {cube_recent['event_count'].sum():,} events")
+print(f"Economics: {len(df_econ):,} country-years")
 print(f"Filtered to last 10 years: {last_10_years_start}-{current_year}")
 
 # Aggregate events by country-year
-conflict_summary = df_acled_recent.groupby(['country', 'year']).agg({
-    'event_id_cnty': 'count',
+conflict_summary = cube_recent.groupby(['country', 'year'], observed=True).agg({
+    'event_count': 'sum',
     'fatalities': 'sum'
 }).reset_index()
 conflict_summary.columns = ['country', 'year', 'event_count', 'total_fatalities']
@@ -35,16 +43,11 @@ conflict_summary.columns = ['country', 'year', 'event_count', 'total_fatalities'
 # Get latest economics data per country
 df_econ_latest = df_econ.sort_values('Year').groupby('Country').last().reset_index()
 
-# Join conflict + economics
-df_merged = conflict_summary.merge(
-    df_econ_latest,
-    left_on='country',
-    right_on='Country',
-    how='left'
-)
+# Join conflict + economics on the countries' M.49 codes (see country_registry.py)
+df_merged = join_countries(conflict_summary, df_econ_latest, 'country', 'Country', 'acled', 'un_sna')
 
 # Aggregate by country
-country_totals = df_merged.groupby('country').agg({
+country_totals = df_merged.groupby('country', observed=True).agg({
     'event_count': 'sum',
     'total_fatalities': 'sum',
     'Primary_%': 'first',
@@ -124,8 +127,7 @@ stacked_output = {
 
 # Save to JSON in viz-datasets
 output_file = viz_datasets_path / 'viz2_stacked_bar_sectors.json'
-with open(output_file, 'w', encoding='utf-8') as f:
-    json.dump(stacked_output, f, indent=2, ensure_ascii=False)
+write_viz_json(stacked_output, output_file)
 
 print(f'\n✓ Saved: {output_file.name} ({output_file.stat().st_size / 1024:.1f} KB)')
 print(f'Countries: {len(stacked_data)}')
@@ -133,9 +135,7 @@ print(f'Data records: {len(stacked_records)}')
 print('\nFirst country sample:')
 print([r for r in stacked_records if r['country'] == stacked_data.iloc[0]['country']])
 
-# Also copy to public assets
-public_output_file = Path('../../public/src/assets/data/viz2_stacked_bar_sectors.json')
-with open(public_output_file, 'w', encoding='utf-8') as f:
-    json.dump(stacked_output, f, indent=2, ensure_ascii=False)
+# Also publish to public assets (copied only if changed)
+publish_viz_datasets([output_file.name])
 
-print(f'\n✓ Also saved to: {public_output_file}')
+print(f'\n✓ Also published to: {PUBLIC_DATA_PATH}')
@@ -0,0 +1,69 @@
+"""
+Regenerate Sankey data with exact dates instead of just years
+
+Dates are written as compact per-flow day runs by default (see
+metadata.date_encoding; decoded by decodeFlowDates in SankeyChart.vue).
+--date-encoding strings writes the old one-string-per-event 'dates' lists.
+
+Usage:
+    python scripts/regenerate_sankey_with_dates.py [--top-n N] [--date-encoding {day-runs,strings}]
+"""
+import argparse
+import os
+import sys
+
+DATA_PROCESSING_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+sys.path.insert(0, DATA_PROCESSING_DIR)
+from acled_actor_stats import load_actor_stats, top_actors_by_type
+from acled_store import load_acled
+from publish import PUBLIC_DATA_PATH, publish_viz_datasets
+from viz_output import write_viz_json
+from viz_specs import SANKEY_TOP_ACTORS, sankey_dataset, sankey_flow_grain
+
+parser = argparse.ArgumentParser(description='Regenerate the actor Sankey dataset with event dates')
+parser.add_argument('--top-n', type=int, default=SANKEY_TOP_ACTORS,
+                    help=f'Actors per actor type (default: {SANKEY_TOP_ACTORS})')
+parser.add_argument('--date-encoding', choices=['day-runs', 'strings'], default='day-runs',
+                    help='Per-flow date format (default: day-runs)')
+args = parser.parse_args()
+
+# Select the top actors of each type from the actor statistics index (python acled_actor_stats.py build)
+actors_by_type = top_actors_by_type(load_actor_stats(), args.top_n)
+selected_actors = [actor for actors in actors_by_type.values() for actor in actors]
+
+# Load ACLED data of the selected actors only
+print("Loading ACLED events of the selected actors...")
+df = load_acled(columns=['event_date', 'year', 'event_type', 'sub_event_type', 'actor1', 'inter1', 'country', 'fatalities'],
+                actors=selected_actors)
+print(f"Dataset shape: {df.shape}")
+
+# Create flows with dates
+print("Aggregating flows with dates...")
+final_dataset = sankey_dataset(sankey_flow_grain(df), args.top_n, dates=df, date_encoding=args.date_encoding,
+                               actors_by_type=actors_by_type)
+
+print(f"Selected {final_dataset['metadata']['total_actors']} actors")
+print(f"Created {final_dataset['metadata']['total_flows']} flow records")
+
+# Sample to check dates
+sample = final_dataset['flows'][0]
+if args.date_encoding == 'strings':
+    print(f"\nSample flow dates: {sample['dates'][:5]}...")
+else:
+    print(f"\nSample flow date_days: {sample['date_days'][:5]}... (base {final_dataset['metadata']['date_encoding']['base_date']})")
+
+# Export
+output_file = os.path.join(DATA_PROCESSING_DIR, 'viz-datasets', 'viz10_actor_sankey.json')
+print(f"\nExporting to {output_file}...")
+
+write_viz_json(final_dataset, output_file)
+
+file_size = os.path.getsize(output_file) / 1024**2
+print(f"File size: {file_size:.1f} MB")
+
+# Also publish to public assets (copied only if changed)
+publish_viz_datasets([os.path.basename(output_file)])
+print(f"Published to {PUBLIC_DATA_PATH}")
+
+print("\nDone! Data now includes exact dates.")
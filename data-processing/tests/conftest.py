@@ -0,0 +1,84 @@
+"""
+Shared fixtures: small synthetic ACLED exports written in the raw CSV layout,
+so the tests exercise the same conversion path as the real 1.3 GB export.
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from acled_store import ACLED_SCHEMA  # noqa: E402
+
+COUNTRIES = {'Mexico': 484, 'India': 356, 'Brazil': 76, 'Nigeria': 566}
+EVENT_TYPES = {
+    'Battles': ['Armed clash', 'Government regains territory'],
+    'Protests': ['Peaceful protest', 'Protest with intervention'],
+    'Riots': ['Violent demonstration', 'Mob violence'],
+    'Violence against civilians': ['Attack', 'Abduction/forced disappearance'],
+    'Explosions/Remote violence': ['Air/drone strike', 'Shelling/artillery/missile attack'],
+    'Strategic developments': ['Arrests', 'Looting/property destruction'],
+}
+ACTORS = {
+    'State forces': ['Military Forces of Mexico', 'Police Forces of India', 'Military Forces of Nigeria'],
+    'Rebel group': ['Boko Haram', 'CJNG: Jalisco New Generation Cartel'],
+    'Protesters': ['Protesters (India)', 'Protesters (Brazil)', 'Protesters (Mexico)'],
+}
+
+
+def make_events(n, seed=0, first_id=0, years=(2018, 2024)):
+    """n synthetic events with every snapshot column, as the raw CSV holds them"""
+    rng = np.random.default_rng(seed)
+    countries = rng.choice(list(COUNTRIES), n)
+    event_types = rng.choice(list(EVENT_TYPES), n)
+    inter1 = rng.choice(list(ACTORS), n)
+    dates = (pd.to_datetime([f'{y}-01-01' for y in rng.integers(years[0], years[1] + 1, n)])
+             + pd.to_timedelta(rng.integers(0, 365, n), unit='D'))
+    events = pd.DataFrame({field.name: pd.Series([''] * n, dtype=object) for field in ACLED_SCHEMA})
+    events['event_id_cnty'] = [f'EVT{first_id + i:06d}' for i in range(n)]
+    events['event_date'] = dates.strftime('%Y-%m-%d')
+    events['year'] = dates.year
+    events['time_precision'] = 1
+    events['disorder_type'] = 'Political violence'
+    events['event_type'] = event_types
+    events['sub_event_type'] = [EVENT_TYPES[t][i % 2] for i, t in enumerate(event_types)]
+    events['actor1'] = [ACTORS[t][i % len(ACTORS[t])] for i, t in enumerate(inter1)]
+    events['assoc_actor_1'] = np.where(rng.random(n) < 0.3, 'Women (India); Students (India)', '')
+    events['inter1'] = inter1
+    events['actor2'] = 'Civilians (International)'
+    events['inter2'] = 'Civilians'
+    events['interaction'] = 'State forces-Civilians'
+    events['civilian_targeting'] = ''
+    events['country'] = countries
+    events['iso'] = [COUNTRIES[c] for c in countries]
+    events['region'] = 'Somewhere'
+    events['admin1'] = 'Region A'
+    events['location'] = 'Town'
+    events['latitude'] = rng.uniform(-30, 30, n).round(4)
+    events['longitude'] = rng.uniform(-100, 100, n).round(4)
+    events['geo_precision'] = 1
+    events['source'] = 'Press'
+    events['source_scale'] = 'National'
+    events['notes'] = 'Synthetic event'
+    events['fatalities'] = rng.poisson(1.5, n)
+    events['timestamp'] = 1_700_000_000 + np.arange(n)
+    for col in ['population_1km', 'population_2km', 'population_5km', 'population_best']:
+        events[col] = ''
+    return events
+
+
+def write_csv(events, path):
+    """Write events like ACLED exports them (UTF-8 with BOM)"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    events.to_csv(path, index=False, encoding='utf-8-sig')
+    return path
+
+
+@pytest.fixture
+def events():
+    return make_events(400)
@@ -0,0 +1,37 @@
+import pandas as pd
+
+from acled_cube import CUBE_KEYS, build_conflict_cube, load_conflict_cube
+from acled_store import convert_acled_csv
+from conftest import write_csv
+
+
+def expected_cube(events):
+    """The cube computed straight from the raw events"""
+    events = events.assign(month=pd.to_datetime(events['event_date']).dt.month)
+    return (events.groupby(CUBE_KEYS)
+            .agg(event_count=('event_id_cnty', 'size'), fatalities=('fatalities', 'sum'))
+            .reset_index())
+
+
+def normalized(cube):
+    cube = cube[CUBE_KEYS + ['event_count', 'fatalities']].copy()
+    for col in ['country', 'event_type', 'sub_event_type']:
+        cube[col] = cube[col].astype(str)
+    cube = cube.astype({'year': 'int64', 'month': 'int64', 'event_count': 'int64', 'fatalities': 'int64'})
+    return cube.sort_values(CUBE_KEYS).reset_index(drop=True)
+
+
+def test_cube_matches_the_events_it_aggregates(tmp_path, events):
+    snapshot = convert_acled_csv(write_csv(events, tmp_path / 'acled.csv'), tmp_path / 'events')
+    cube_path = build_conflict_cube(snapshot, tmp_path / 'cube.parquet')
+
+    pd.testing.assert_frame_equal(normalized(load_conflict_cube(cube_path=cube_path)), normalized(expected_cube(events)))
+
+
+def test_cube_filters_like_load_acled(tmp_path, events):
+    snapshot = convert_acled_csv(write_csv(events, tmp_path / 'acled.csv'), tmp_path / 'events')
+    cube_path = build_conflict_cube(snapshot, tmp_path / 'cube.parquet')
+
+    cube = load_conflict_cube(years=(2020, 2021), countries=['India'], cube_path=cube_path)
+    subset = events[events['year'].between(2020, 2021) & (events['country'] == 'India')]
+    pd.testing.assert_frame_equal(normalized(cube), normalized(expected_cube(subset)))
@@ -0,0 +1,109 @@
+import pandas as pd
+import pytest
+
+from acled_actor_stats import build_actor_stats, load_actor_stats
+from acled_actors import build_actor_dictionary
+from acled_cube import build_conflict_cube, load_conflict_cube
+from acled_ingest import ingest_delta, ingest_snapshot
+from acled_store import convert_acled_csv, load_acled
+from conftest import make_events, write_csv
+from test_acled_cube import normalized
+
+
+def build_all(csv_path, root):
+    """Snapshot, cube, actor dictionary and actor statistics built from scratch"""
+    paths = {
+        'snapshot_dir': root / 'events',
+        'cube_path': root / 'cube.parquet',
+        'dictionary_path': root / 'actor_dictionary.parquet',
+        'stats_path': root / 'actor_stats.parquet',
+        'bridge_dir': root / 'assoc_actors',
+    }
+    convert_acled_csv(csv_path, paths['snapshot_dir'])
+    build_conflict_cube(paths['snapshot_dir'], paths['cube_path'])
+    build_actor_dictionary(paths['snapshot_dir'], paths['dictionary_path'])
+    build_actor_stats(paths['snapshot_dir'], paths['dictionary_path'], paths['stats_path'])
+    return paths
+
+
+def state(paths):
+    """Comparable content of the artifacts (actor ids differ between builds, actor names do not)"""
+    events = load_acled(snapshot_dir=paths['snapshot_dir'])
+    events = events.astype({col: str for col in events.select_dtypes('category').columns})
+    stats = load_actor_stats(dictionary_path=paths['dictionary_path'], path=paths['stats_path'])
+    stats = stats.drop(columns='actor_id').sort_values(['inter1', 'actor', 'country', 'year'])
+    return {
+        'events': events.sort_values('event_id_cnty').reset_index(drop=True),
+        'files': sorted(path.name for path in paths['snapshot_dir'].glob('*.parquet')),
+        'cube': normalized(load_conflict_cube(cube_path=paths['cube_path'])),
+        'stats': stats.reset_index(drop=True),
+    }
+
+
+def assert_same_state(left, right):
+    assert left['files'] == right['files']
+    pd.testing.assert_frame_equal(left['events'], right['events'], check_dtype=False)
+    pd.testing.assert_frame_equal(left['cube'], right['cube'])
+    pd.testing.assert_frame_equal(left['stats'], right['stats'], check_dtype=False)
+
+
+@pytest.fixture
+def exports():
+    """An old export and a newer one with deleted, changed (one across years) and added events"""
+    old = make_events(300, seed=1)
+    new = old.drop(index=range(0, 40, 2)).copy()
+    changed = new.index[5:20]
+    new.loc[changed, 'fatalities'] += 3
+    new.loc[changed[:5], 'event_type'] = 'Riots'
+    new.loc[changed[:5], 'sub_event_type'] = 'Mob violence'
+    new.loc[changed[0], ['event_date', 'year']] = ['2017-06-01', 2017]
+    new.loc[changed, 'timestamp'] += 1_000_000
+    added = make_events(60, seed=2, first_id=1000)
+    added.loc[:9, 'actor1'] = 'New Militia (Nigeria)'
+    return old, pd.concat([new, added], ignore_index=True), changed, added
+
+
+def test_snapshot_ingest_equals_full_rebuild(tmp_path, exports):
+    old, new, _, _ = exports
+    paths = build_all(write_csv(old, tmp_path / 'old.csv'), tmp_path / 'ingested')
+    ingest_snapshot(write_csv(new, tmp_path / 'new.csv'), **paths)
+
+    rebuilt = build_all(tmp_path / 'new.csv', tmp_path / 'rebuilt')
+    assert_same_state(state(paths), state(rebuilt))
+
+
+def test_delta_ingest_equals_full_rebuild(tmp_path, exports):
+    old, new, changed, added = exports
+    paths = build_all(write_csv(old, tmp_path / 'old.csv'), tmp_path / 'ingested')
+    delta = new[new['event_id_cnty'].isin(set(old.loc[changed, 'event_id_cnty']) | set(added['event_id_cnty']))]
+    deleted = old.loc[~old['event_id_cnty'].isin(new['event_id_cnty']), ['event_id_cnty']]
+    ingest_delta(write_csv(delta, tmp_path / 'delta.csv'), write_csv(deleted, tmp_path / 'deleted.csv'), **paths)
+
+    rebuilt = build_all(write_csv(new, tmp_path / 'new.csv'), tmp_path / 'rebuilt')
+    assert_same_state(state(paths), state(rebuilt))
+
+
+def test_unchanged_export_rewrites_nothing(tmp_path, exports):
+    old, _, _, _ = exports
+    # Events without a last-modified stamp are unchanged too
+    old = old.astype({'timestamp': object})
+    old.loc[:5, 'timestamp'] = ''
+    paths = build_all(write_csv(old, tmp_path / 'old.csv'), tmp_path / 'ingested')
+    mtimes = {path: path.stat().st_mtime_ns for path in paths['snapshot_dir'].glob('*.parquet')}
+    ingest_snapshot(tmp_path / 'old.csv', **paths)
+
+    assert {path: path.stat().st_mtime_ns for path in paths['snapshot_dir'].glob('*.parquet')} == mtimes
+
+
+def test_first_ingest_into_an_empty_snapshot(tmp_path, exports):
+    old, _, _, _ = exports
+    snapshot_dir = tmp_path / 'events'
+    snapshot_dir.mkdir()
+    csv_path = write_csv(old, tmp_path / 'old.csv')
+    missing = {name: tmp_path / name for name in ['cube_path', 'dictionary_path', 'stats_path', 'bridge_dir']}
+    for _ in range(2):
+        ingest_delta(csv_path, snapshot_dir=snapshot_dir, **missing)
+
+    events = load_acled(columns=['event_id_cnty', 'fatalities'], snapshot_dir=snapshot_dir)
+    assert sorted(events['event_id_cnty']) == sorted(old['event_id_cnty'])
+    assert events['fatalities'].sum() == old['fatalities'].sum()
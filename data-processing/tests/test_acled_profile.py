@@ -0,0 +1,77 @@
+import json
+
+import pyarrow as pa
+import pytest
+
+from acled_profile import _is_list_column, profile_columns, profile_markdown, suggest_dtype, write_profile
+from acled_store import convert_acled_csv
+from conftest import make_events, write_csv
+
+ASSOC_LISTS = ['Women (India); Students (India)', 'Students (India)', 'Labor Group (India); Women (India)', '']
+
+
+@pytest.fixture
+def snapshot(tmp_path):
+    """Snapshot of 300 events whose assoc_actor_1 lists repeat with different frequencies"""
+    events = make_events(300, seed=3)
+    events['assoc_actor_1'] = [ASSOC_LISTS[i % 7 % len(ASSOC_LISTS)] for i in range(len(events))]
+    return events, convert_acled_csv(write_csv(events, tmp_path / 'acled.csv'), tmp_path / 'events')
+
+
+def test_lists_are_told_apart_from_free_text():
+    assert _is_list_column(pa.array(['A; B', 'A; C', 'B; C', 'A']))
+    # Elements that never recur still make a list when most of them are values of their own
+    assert _is_list_column(pa.array(['A; B', 'A', 'B', 'C']))
+    assert not _is_list_column(pa.array(['Shots fired; one injured', 'Crowd dispersed; arrests made', 'Quiet']))
+    assert not _is_list_column(pa.array(['A', 'B']))
+
+
+def test_suggested_dtypes():
+    assert suggest_dtype(pa.int64(), 10, 10, False, 0, 127) == 'int8'
+    assert suggest_dtype(pa.int64(), 10, 10, False, -1, 200) == 'int16'
+    # Integral floats with nulls narrow to pandas' nullable integers
+    assert suggest_dtype(pa.float64(), 10, 10, False, 0, 70_000, integral=True, has_nulls=True) == 'Int32'
+    assert suggest_dtype(pa.float64(), 10, 10, False, 0.5, 2.5) == 'float64'
+
+    # Categorical when at most half of the non-null values are distinct
+    assert suggest_dtype(pa.string(), 10, 5, False) == 'category'
+    assert suggest_dtype(pa.string(), 10, 6, False) == 'string'
+    assert suggest_dtype(pa.string(), 10, 5, True) == 'list<category>'
+    assert suggest_dtype(pa.string(), 0, 0, False) == 'null'
+
+
+def test_list_elements_are_counted_once_per_event(snapshot):
+    events, snapshot_dir = snapshot
+    profile = profile_columns(['assoc_actor_1', 'country', 'fatalities'], top_n=2, jobs=1,
+                              snapshot_dir=snapshot_dir)
+    assoc, country, fatalities = profile['columns']
+
+    names = events['assoc_actor_1'].str.split('; ').explode()
+    expected = names[names != ''].value_counts()
+    assert assoc['is_list'] and assoc['distinct'] == len(expected)
+    assert assoc['non_null'] == (events['assoc_actor_1'] != '').sum()
+    assert assoc['top'] == [[name, int(count)] for name, count in expected.items()][:2]
+
+    assert not country['is_list'] and country['suggested_dtype'] == 'category'
+    assert country['top'] == [[name, int(count)] for name, count in events['country'].value_counts().items()][:2]
+    assert (fatalities['min'], fatalities['max']) == (events['fatalities'].min(), events['fatalities'].max())
+    assert fatalities['suggested_dtype'] == 'int8'
+
+
+def test_reports_match_the_profile(snapshot, tmp_path):
+    _, snapshot_dir = snapshot
+    profile = profile_columns(['assoc_actor_1', 'notes', 'no_such_column'], top_n=5, jobs=2,
+                              snapshot_dir=snapshot_dir)
+    assert profile == profile_columns(['assoc_actor_1', 'notes', 'no_such_column'], top_n=5, jobs=1,
+                                      snapshot_dir=snapshot_dir)
+    assert profile['rows'] == 300 and profile['columns'][2] == {'column': 'no_such_column'}
+
+    md_path, json_path = tmp_path / 'profile.md', tmp_path / 'profile.json'
+    write_profile(profile, md_path, json_path, top_n=5)
+    assert json.loads(json_path.read_text(encoding='utf-8')) == profile
+
+    report = md_path.read_text(encoding='utf-8')
+    assert report == ''.join(profile_markdown(profile, 5))
+    assert '## assoc_actor_1\n' in report and '- **Field type:** List (semicolon-separated)\n' in report
+    assert '| Women (India) | ' in report
+    assert '## no_such_column\n**Column not found in dataset**' in report
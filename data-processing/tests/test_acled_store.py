@@ -0,0 +1,45 @@
+import pandas as pd
+import pyarrow.parquet as pq
+
+from acled_store import convert_acled_csv, load_acled
+from conftest import write_csv
+
+
+def test_convert_round_trips_every_event(tmp_path, events):
+    snapshot = convert_acled_csv(write_csv(events, tmp_path / 'acled.csv'), tmp_path / 'events')
+
+    loaded = load_acled(snapshot_dir=snapshot).sort_values('event_id_cnty').reset_index(drop=True)
+    assert sorted(path.name for path in snapshot.glob('*.parquet')) == \
+        [f'acled_{year}.parquet' for year in sorted(events['year'].unique())]
+    assert loaded['event_id_cnty'].tolist() == events['event_id_cnty'].tolist()
+    assert loaded['fatalities'].tolist() == events['fatalities'].tolist()
+    assert loaded['iso'].tolist() == events['iso'].tolist()
+
+
+def test_convert_drops_rows_without_a_year_and_keeps_bad_iso_as_null(tmp_path, events, capsys):
+    events = events.head(20).astype(object)
+    events.loc[0, 'year'] = ''
+    events.loc[1, 'year'] = 'n/a'
+    events.loc[2, 'iso'] = 'XX'
+    events.loc[3, 'fatalities'] = ''
+
+    snapshot = convert_acled_csv(write_csv(events, tmp_path / 'acled.csv'), tmp_path / 'events')
+
+    assert not (snapshot / 'acled_0.parquet').exists()
+    loaded = load_acled(snapshot_dir=snapshot).set_index('event_id_cnty')
+    assert len(loaded) == 18
+    assert 'EVT000000' not in loaded.index and 'EVT000001' not in loaded.index
+    assert loaded['iso'].isna().sum() == 1 and pd.isna(loaded.loc['EVT000002', 'iso'])
+    assert loaded.loc['EVT000003', 'fatalities'] == 0
+
+    out = capsys.readouterr().out
+    assert 'dropped 2 rows without a valid year' in out
+    assert '1 rows without a valid iso' in out
+
+
+def test_year_files_are_sorted_by_country_and_date(tmp_path, events):
+    snapshot = convert_acled_csv(write_csv(events, tmp_path / 'acled.csv'), tmp_path / 'events')
+
+    for path in snapshot.glob('*.parquet'):
+        year = pq.read_table(path, columns=['country', 'event_date']).to_pandas()
+        assert year.equals(year.sort_values(['country', 'event_date'], kind='stable').reset_index(drop=True))
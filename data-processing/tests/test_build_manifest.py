@@ -0,0 +1,53 @@
+import os
+import sys
+
+import build_manifest
+from build_manifest import code_version, content_hash, file_fingerprint, load_manifest, save_manifest
+
+THRESHOLD = 10
+
+
+def over_threshold(values):
+    return [value for value in values if value > THRESHOLD]
+
+
+def test_fingerprint_reuses_the_hash_while_size_and_mtime_match(tmp_path, monkeypatch):
+    path = tmp_path / 'input.csv'
+    path.write_text('a,b\n1,2\n')
+    first = file_fingerprint(path)
+    assert first['sha256'] == content_hash(path)
+
+    def fail(_):
+        raise AssertionError('re-hashed an unchanged file')
+    monkeypatch.setattr(build_manifest, 'content_hash', fail)
+    assert file_fingerprint(path, first) is first
+
+
+def test_touching_a_file_keeps_its_hash(tmp_path):
+    path = tmp_path / 'input.csv'
+    path.write_text('a,b\n1,2\n')
+    first = file_fingerprint(path)
+    os.utime(path, ns=(first['mtime_ns'] + 10**9, first['mtime_ns'] + 10**9))
+
+    touched = file_fingerprint(path, first)
+    assert touched['mtime_ns'] != first['mtime_ns']
+    assert touched['sha256'] == first['sha256']
+
+    path.write_text('a,b\n1,3\n')
+    assert file_fingerprint(path, touched)['sha256'] != first['sha256']
+
+
+def test_code_version_follows_the_constants_a_function_uses(monkeypatch):
+    version = code_version(over_threshold)
+    assert code_version(over_threshold) == version
+
+    monkeypatch.setattr(sys.modules[__name__], 'THRESHOLD', 11)
+    assert code_version(over_threshold) != version
+
+
+def test_manifest_round_trip(tmp_path):
+    path = tmp_path / 'nested' / 'manifest.json'
+    assert load_manifest(path) == {}
+
+    save_manifest({'targets': {'viz1': {'code': 'abc'}}}, path)
+    assert load_manifest(path) == {'targets': {'viz1': {'code': 'abc'}}}
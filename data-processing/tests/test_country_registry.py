@@ -0,0 +1,183 @@
+import json
+
+import pandas as pd
+import pytest
+
+import process_interventions
+from acled_store import convert_acled_csv
+from conftest import make_events, write_csv
+from country_registry import (
+    MASTER_MAPPING_CSV, _topology_centroids, build_centroids, build_country_registry, country_names, join_countries,
+    m49_codes, registry_available, rename_countries,
+)
+from economics_store import ECONOMICS_MASTER_CSV
+
+MAPPING_COLUMNS = ['UN_M49_Code', 'ISO3', 'ISO2', 'Country_Name_Standard', 'UN_Region', 'UN_Subregion',
+                   'WB_Region', 'WB_IncomeLevel', 'country_name_wb', 'WorldBank_ID']
+MAPPING = [
+    (76, 'BRA', 'BR', 'Brazil', 'Americas', 'South America', 'Latin America', 'Upper middle income', 'Brazil', 'BRA'),
+    (356, 'IND', 'IN', 'India', 'Asia', 'Southern Asia', 'South Asia', 'Lower middle income', 'India', 'IND'),
+    (364, 'IRN', 'IR', 'Iran', 'Asia', 'Southern Asia', 'Middle East', 'Upper middle income',
+     'Iran, Islamic Rep.', 'IRN'),
+    (484, 'MEX', 'MX', 'Mexico', 'Americas', 'Central America', 'Latin America', 'Upper middle income',
+     'Mexico', 'MEX'),
+    (516, 'NAM', 'NA', 'Namibia', 'Africa', 'Southern Africa', 'Sub-Saharan Africa', 'Upper middle income',
+     'Namibia', 'NAM'),
+    (566, 'NGA', 'NG', 'Nigeria', 'Africa', 'Western Africa', 'Sub-Saharan Africa', 'Lower middle income',
+     'Nigeria', 'NGA'),
+    (818, 'EGY', 'EG', 'Egypt', 'Africa', 'Northern Africa', 'Middle East', 'Lower middle income',
+     'Egypt, Arab Rep.', 'EGY'),
+    (None, None, None, None, None, None, None, None, 'High income', 'HIC'),
+]
+
+
+@pytest.fixture
+def registry(tmp_path):
+    """Registry directory built from a small mapping and ACLED snapshot, without topology or UN workbooks"""
+    mapping_path = tmp_path / 'master_country_mapping.csv'
+    pd.DataFrame(MAPPING, columns=MAPPING_COLUMNS).astype({'UN_M49_Code': 'Int64'}).to_csv(mapping_path, index=False)
+    snapshot_dir = convert_acled_csv(write_csv(make_events(200), tmp_path / 'acled.csv'), tmp_path / 'events')
+    registry_dir = tmp_path / 'country_registry'
+    build_country_registry(mapping_path, snapshot_dir, registry_dir, topology_path=tmp_path / 'no-topology.json')
+    return registry_dir
+
+
+def test_names_of_every_source_resolve_to_one_code(registry, capsys):
+    codes = m49_codes(['Mexico', 'Iran (Islamic Republic of)', 'High income', 'Atlantis', None], 'un_sna',
+                      registry_dir=registry)
+    assert codes.tolist() == [484, 364, -1, -1, -1]
+    # Aggregates resolve to -1 silently, unknown names are reported
+    assert 'Atlantis' in capsys.readouterr().out
+
+    assert m49_codes(['Iran, Islamic Rep.', 'IRN', 'india '], 'world_bank', registry_dir=registry).tolist() == [
+        364, 364, 356]
+    # Namibia's ISO2 code is not read as a missing value
+    assert m49_codes(['NA'], 'canonical', registry_dir=registry).tolist() == [516]
+
+
+def test_names_missing_from_a_source_resolve_through_the_others(registry):
+    # ACLED has no Egypt events here; the World Bank spelling resolves it
+    assert m49_codes(['Egypt, Arab Rep.', 'Iran'], 'acled', registry_dir=registry).tolist() == [818, 364]
+
+
+def test_rename_and_names(registry):
+    renamed = rename_countries(['Iran (Islamic Republic of)', 'Egypt', 'Atlantis'], 'un_sna', 'world_bank',
+                               registry_dir=registry)
+    assert renamed.tolist() == ['Iran, Islamic Rep.', 'Egypt, Arab Rep.', 'Atlantis']
+    assert country_names([364, 818], registry_dir=registry).tolist() == ['Iran', 'Egypt']
+
+
+def test_join_matches_codes_not_names(registry):
+    conflict = pd.DataFrame({'country': ['Iran', 'Egypt', 'Mexico', 'Atlantis'], 'year': 2020, 'events': [1, 2, 3, 4]})
+    economics = pd.DataFrame({'Country': ['Iran (Islamic Republic of)', 'Egypt', 'Egypt', 'Atlantis'],
+                              'year': [2020, 2020, 2021, 2020], 'gdp': [10.0, 20.0, 21.0, 30.0]})
+    merged = join_countries(conflict, economics, 'country', 'Country', 'acled', 'un_sna', on=['year'],
+                            registry_dir=registry)
+    assert merged['country'].tolist() == conflict['country'].tolist()
+    # Names that do not resolve never match, even when spelled the same
+    assert merged['gdp'].tolist()[:2] == [10.0, 20.0]
+    assert merged['gdp'].isna().tolist()[2:] == [True, True]
+
+
+def test_without_registry_names_match_after_the_fallback_renames(tmp_path, capsys):
+    registry_dir = tmp_path / 'not-built'
+    assert not registry_available(registry_dir)
+    assert 'not built' in capsys.readouterr().out
+
+    renamed = rename_countries(['Egypt, Arab Rep.', 'Atlantis'], 'world_bank', 'un_sna', registry_dir=registry_dir)
+    assert renamed.tolist() == ['Egypt', 'Atlantis']
+
+    economics = pd.DataFrame({'Country': ['Egypt', 'Atlantis'], 'gdp': [20.0, 30.0]})
+    indicators = pd.DataFrame({'Country Name': ['Egypt, Arab Rep.', 'Iran, Islamic Rep.'], 'inflation': [5.0, 40.0]})
+    merged = join_countries(economics, indicators, 'Country', 'Country Name', 'un_sna', 'world_bank',
+                            registry_dir=registry_dir)
+    assert merged['inflation'].tolist()[0] == 5.0
+    assert merged['inflation'].isna().tolist()[1]
+
+
+def test_committed_mapping_resolves_the_committed_economics_master(tmp_path):
+    registry_dir = tmp_path / 'country_registry'
+    build_country_registry(MASTER_MAPPING_CSV, tmp_path / 'no-events', registry_dir,
+                           topology_path=tmp_path / 'no-topology.json')
+    names = pd.read_csv(ECONOMICS_MASTER_CSV, usecols=['Country'])['Country'].drop_duplicates()
+    unresolved = names[m49_codes(names, 'un_sna', registry_dir=registry_dir) == -1].tolist()
+    # Only former states and Zanzibar (reported apart from mainland Tanzania) have no current code
+    assert sorted(unresolved) == sorted(name for name in names if 'Former' in name or name == 'Zanzibar')
+
+
+def square(lon, lat, size):
+    """Closed ring of a square with its south-west corner at (lon, lat)"""
+    return [[lon, lat], [lon + size, lat], [lon + size, lat + size], [lon, lat + size], [lon, lat]]
+
+
+def write_topology(path, arcs, geometries, transform=None):
+    topology = {'type': 'Topology', 'arcs': arcs,
+                'objects': {'countries': {'type': 'GeometryCollection', 'geometries': geometries}}}
+    if transform:
+        topology['transform'] = transform
+    path.write_text(json.dumps(topology), encoding='utf-8')
+    return path
+
+
+def sample_topology(path):
+    """
+    Brazil as a large square (centroid -10, -50) plus a small far island, and
+    India as a square (centroid 20, 80) whose ring joins an arc and a reversed arc
+    """
+    arcs = [square(-60, -20, 20), square(-30, 10, 1), [[70, 10], [90, 10], [90, 30]], [[70, 10], [70, 30], [90, 30]]]
+    return write_topology(path, arcs, [
+        {'type': 'MultiPolygon', 'id': '076', 'arcs': [[[0]], [[1]]], 'properties': {'name': 'Brazil'}},
+        {'type': 'Polygon', 'id': '356', 'arcs': [[2, ~3]], 'properties': {'name': 'India'}},
+        {'type': 'Polygon', 'arcs': [[0]], 'properties': {'name': 'N. Cyprus'}},
+    ])
+
+
+def test_topology_centroids_use_the_largest_polygon(tmp_path):
+    centroids = _topology_centroids(sample_topology(tmp_path / 'plain.json'))
+    assert sorted(centroids) == [76, 356]
+    assert centroids[76] == pytest.approx((-10, -50))
+    assert centroids[356] == pytest.approx((20, 80))
+
+    # The large square, quantized and delta-encoded
+    quantized = write_topology(tmp_path / 'quantized.json', [[[0, 0], [40, 0], [0, 40], [-40, 0], [0, -40]]],
+                               [{'type': 'Polygon', 'id': '076', 'arcs': [[0]], 'properties': {'name': 'Brazil'}}],
+                               {'scale': [0.5, 0.5], 'translate': [-60, -20]})
+    assert _topology_centroids(quantized)[76] == pytest.approx((-10, -50))
+
+
+def test_acled_places_only_the_countries_the_topology_leaves_out(tmp_path):
+    events = make_events(300, seed=7)
+    snapshot_dir = convert_acled_csv(write_csv(events, tmp_path / 'acled.csv'), tmp_path / 'events')
+    countries = pd.DataFrame({'m49': [76, 356, 484, 566]}).astype('int16')
+
+    centroids = build_centroids(countries, snapshot_dir, sample_topology(tmp_path / 'topology.json'))
+    centroids = centroids.set_index('m49')
+    assert centroids['source'].to_dict() == {76: 'topology', 356: 'topology', 484: 'acled', 566: 'acled'}
+    assert (centroids.loc[356, 'lat'], centroids.loc[356, 'lon']) == pytest.approx((20, 80))
+
+    mexico = events[events['country'] == 'Mexico']
+    weights = mexico['fatalities']
+    assert centroids.loc[484, 'lat'] == pytest.approx((mexico['latitude'] * weights).sum() / weights.sum())
+    assert centroids.loc[484, 'lon'] == pytest.approx((mexico['longitude'] * weights).sum() / weights.sum())
+
+
+def test_without_topology_no_centroids_are_built(tmp_path, capsys):
+    events = make_events(50)
+    snapshot_dir = convert_acled_csv(write_csv(events, tmp_path / 'acled.csv'), tmp_path / 'events')
+    centroids = build_centroids(pd.DataFrame({'m49': [484]}).astype('int16'), snapshot_dir, tmp_path / 'missing.json')
+    assert centroids.empty and list(centroids.columns) == ['m49', 'lat', 'lon', 'source']
+    assert 'not found' in capsys.readouterr().out
+
+
+def test_intervention_positions_fall_back_to_the_fixed_table(monkeypatch):
+    monkeypatch.setattr(process_interventions, 'registry_available', lambda: False)
+    assert process_interventions.country_positions(pd.Series(['Mali', 'Atlantis', 'Mali'])) == {
+        'Mali': process_interventions.FALLBACK_CENTROIDS['Mali']}
+
+    # Registry centroids win; names it cannot place use the fixed table
+    monkeypatch.setattr(process_interventions, 'registry_available', lambda: True)
+    monkeypatch.setattr(process_interventions, 'm49_codes', lambda names, source: pd.Series([466, 562, -1]))
+    monkeypatch.setattr(process_interventions, 'country_centroids', lambda codes: pd.DataFrame(
+        {'lat': [17.123, None, None], 'lon': [-3.987, None, None]}))
+    assert process_interventions.country_positions(pd.Series(['Mali', 'Niger', 'Atlantis'])) == {
+        'Mali': [17.12, -3.99], 'Niger': process_interventions.FALLBACK_CENTROIDS['Niger']}
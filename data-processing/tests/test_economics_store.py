@@ -0,0 +1,77 @@
+import pandas as pd
+import pytest
+
+import economics_store
+from economics_store import (
+    excel_cache_path, load_economics_master, read_excel_cached, read_sheet_cells, write_economics_master,
+)
+
+openpyxl = pytest.importorskip('openpyxl')
+
+GDP_ROWS = [
+    ['Gross domestic product, at current prices - national currency'],
+    ['Data extracted on 2025-01-01'],
+    ['CountryID', 'Country', 'Currency', 'IndicatorName', 1970, 1971, 2023],
+    [4, 'Afghanistan', 'Afghani', 'Gross Domestic Product (GDP)', 123456789012, 1.5, 0.1],
+    [4, 'Afghanistan', 'Afghani', 'Total Value Added', 98765432109, None, 1e-7],
+    [364, 'Iran (Islamic Republic of)', None, 'Manufacturing (ISIC D)', 1.0, 2.0, 3.0],
+]
+
+
+def write_workbook(path, rows):
+    workbook = openpyxl.Workbook()
+    for row in rows:
+        workbook.active.append(row)
+    workbook.save(path)
+    return path
+
+
+def test_cached_sheet_is_parsed_again_when_the_workbook_changes(tmp_path, monkeypatch):
+    path = write_workbook(tmp_path / 'tourism.xlsx', [['Country', 2019, 2020], ['Mali', 1.5, 2.5]])
+    cache_dir = tmp_path / 'cache'
+    first = read_excel_cached(path, cache_dir, header=0)
+    assert excel_cache_path(path, cache_dir, header=0).exists()
+
+    def fail(*args, **kwargs):
+        raise AssertionError('parsed an unchanged workbook')
+    with monkeypatch.context() as patch:
+        patch.setattr(economics_store.pd, 'read_excel', fail)
+        cached = read_excel_cached(path, cache_dir, header=0)
+    # Year headers stay numbers
+    assert list(cached.columns) == ['Country', 2019, 2020]
+    pd.testing.assert_frame_equal(cached, first)
+
+    write_workbook(path, [['Country', 2019, 2020], ['Mali', 1.5, 9.0]])
+    assert read_excel_cached(path, cache_dir, header=0)[2020].tolist() == [9.0]
+    assert len(list(cache_dir.iterdir())) == 2
+
+
+def reheaded(df):
+    """The frame below its first row, with that row as the column names"""
+    df = df.copy()
+    df.columns = df.iloc[0].tolist()
+    return df.drop(0).reset_index(drop=True)
+
+
+def test_sheet_cells_rebuild_the_frame_read_excel_infers(tmp_path):
+    path = write_workbook(tmp_path / 'gdp.xlsx', GDP_ROWS)
+    expected = reheaded(pd.read_excel(path, header=1))
+    for _ in range(2):
+        cells = read_sheet_cells(path, tmp_path / 'cache')
+        actual = reheaded(cells.iloc[2:].reset_index(drop=True).infer_objects())
+        assert [(type(col), col) for col in actual.columns] == [(type(col), col) for col in expected.columns]
+        pd.testing.assert_frame_equal(actual, expected, check_exact=True)
+
+
+def test_master_falls_back_to_the_csv_it_no_longer_matches(tmp_path):
+    csv_path, parquet_path = tmp_path / 'master.csv', tmp_path / 'master.parquet'
+    master = pd.DataFrame({'Country': ['Mali', 'Niger'], 'Year': [2020, 2020], 'GDP': [1, None]})
+    typed = write_economics_master(master, csv_path, parquet_path)
+    assert typed.dtypes.astype(str).tolist() == ['str', 'int64', 'float64']
+    pd.testing.assert_frame_equal(load_economics_master(csv_path=csv_path, parquet_path=parquet_path), typed)
+
+    # An edited CSV (e.g. after a git pull) wins over the stale Parquet copy, with the same dtypes
+    csv_path.write_text(csv_path.read_text().replace('Mali,2020,1.0', 'Mali,2020,5'))
+    loaded = load_economics_master(['Country', 'GDP'], csv_path=csv_path, parquet_path=parquet_path)
+    assert loaded['GDP'].tolist()[0] == 5.0
+    assert loaded.dtypes.astype(str).tolist() == ['str', 'float64']
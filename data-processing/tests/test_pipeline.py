@@ -0,0 +1,146 @@
+import ast
+import json
+from pathlib import Path
+
+import pytest
+
+import pipeline
+from publish import PUBLIC_DATA_PATH, PUBLISH_MANIFEST_NAME
+from viz_specs import VIZ_SPECS
+
+WRITE_A = """
+from pathlib import Path
+Path('viz-datasets/a.json').write_text(Path('raw/in.txt').read_text())
+Path('runs.txt').open('a').write('a')
+"""
+# Rewrites a.json after step a, like the legacy runners rewrite the engine's outputs
+WRITE_B = """
+from pathlib import Path
+Path('viz-datasets/a.json').write_text(Path('viz-datasets/a.json').read_text() + '+b')
+Path('viz-datasets/b.json').write_text('b')
+Path('runs.txt').open('a').write('b')
+"""
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    """A data-processing folder with two steps: a reads raw/in.txt, b depends on a and rewrites its output"""
+    (tmp_path / 'viz-datasets').mkdir()
+    (tmp_path / 'raw').mkdir()
+    (tmp_path / 'raw' / 'in.txt').write_text('1')
+    (tmp_path / 'a.py').write_text(WRITE_A)
+    (tmp_path / 'b.py').write_text(WRITE_B)
+    steps = [
+        {'name': 'a', 'run': 'a.py', 'deps': [], 'inputs': ['raw/in.txt'], 'outputs': ['a.json']},
+        {'name': 'b', 'run': 'b.py', 'deps': ['a'], 'outputs': ['a.json', 'b.json']},
+        {'name': 'c', 'run': 'c.py', 'deps': ['b'], 'outputs': ['c.json'], 'default': False},
+    ]
+    monkeypatch.setattr(pipeline, 'data_processing_path', tmp_path)
+    monkeypatch.setattr(pipeline, 'NOTEBOOK_OUTPUT_DIR', tmp_path / 'notebooks')
+    monkeypatch.setattr(pipeline, 'PIPELINE_STEPS', steps)
+    monkeypatch.setattr(pipeline, 'STEPS_BY_NAME', {step['name']: step for step in steps})
+    return tmp_path
+
+
+def run(project, **options):
+    """Run the default steps; returns the failed steps and the steps that ran"""
+    runs = project / 'runs.txt'
+    runs.write_text('')
+    failed = pipeline.run_pipeline(log_dir=project / 'logs', manifest_path=project / 'manifest.json', **options)
+    return failed, runs.read_text()
+
+
+def test_up_to_date_steps_are_skipped(project):
+    assert run(project) == ([], 'ab')
+    assert run(project) == ([], '')
+    assert (project / 'viz-datasets' / 'a.json').read_text() == '1+b'
+
+
+def test_changed_input_reruns_the_step_and_its_dependents(project):
+    run(project)
+    (project / 'raw' / 'in.txt').write_text('2')
+    assert run(project) == ([], 'ab')
+    assert (project / 'viz-datasets' / 'a.json').read_text() == '2+b'
+
+
+def test_missing_or_overwritten_output_reruns_its_writer(project):
+    run(project)
+    (project / 'viz-datasets' / 'b.json').unlink()
+    assert run(project) == ([], 'b')
+
+    (project / 'viz-datasets' / 'a.json').write_text('edited')
+    assert run(project) == ([], 'b')
+
+
+def test_changed_script_and_force_rerun(project):
+    run(project)
+    (project / 'b.py').write_text(WRITE_B + '\n# edited\n')
+    assert run(project) == ([], 'b')
+    assert run(project, force=True) == ([], 'ab')
+
+
+def test_failed_step_is_not_recorded(project):
+    (project / 'b.py').write_text('raise SystemExit(1)')
+    assert run(project) == (['b'], 'a')
+    (project / 'b.py').write_text(WRITE_B)
+    assert run(project) == ([], 'b')
+
+
+def test_default_graph_runs_no_script_from_temp():
+    for step in pipeline.PIPELINE_STEPS:
+        if step.get('default', True):
+            assert not step['run'].startswith('../temp/'), step['name']
+
+
+def test_every_step_declares_inputs_and_outputs():
+    for step in pipeline.PIPELINE_STEPS:
+        assert step['outputs'], step['name']
+        assert 'inputs' in step, step['name']
+        assert set(step['deps']) <= set(pipeline.STEPS_BY_NAME), step['name']
+
+
+def script_imports(path):
+    """Top-level names of the modules a step's script or notebook imports"""
+    if path.suffix == '.ipynb':
+        cells = json.loads(path.read_text(encoding='utf-8'))['cells']
+        source = '\n'.join(''.join(cell['source']) for cell in cells if cell['cell_type'] == 'code')
+        # IPython magics and shell escapes are not Python
+        source = '\n'.join(line for line in source.splitlines() if not line.lstrip().startswith(('%', '!')))
+    else:
+        source = path.read_text(encoding='utf-8')
+    modules = set()
+    for node in ast.walk(ast.parse(source)):
+        if isinstance(node, ast.ImportFrom) and node.module:
+            modules.add(node.module.split('.')[0])
+        elif isinstance(node, ast.Import):
+            modules.update(alias.name.split('.')[0] for alias in node.names)
+    return modules
+
+
+def test_steps_declare_the_modules_their_scripts_import():
+    local = {path.stem for path in pipeline.data_processing_path.glob('*.py')}
+    for step in pipeline.PIPELINE_STEPS:
+        script = pipeline.data_processing_path / step['run']
+        imported = {f'{module}.py' for module in script_imports(script) & local} - {script.name}
+        assert imported <= set(step['inputs']), (step['name'], sorted(imported - set(step['inputs'])))
+
+
+def test_each_output_has_one_default_writer():
+    writers = {}
+    for step in pipeline.PIPELINE_STEPS:
+        if step.get('default', True):
+            for output in step['outputs']:
+                assert output not in writers, (output, writers.get(output), step['name'])
+                writers[output] = step['name']
+    assert writers['viz10_actor_sankey.json'] == 'sankey-dates'
+
+
+def test_binary_copies_are_built_and_published():
+    binaries = {Path(spec['output']).with_suffix('.bin').name for spec in VIZ_SPECS if spec.get('binary')}
+    assert binaries == {'viz8_bubble_map_fatalities.bin', 'viz9_intervention_flows.bin'}
+    assert binaries <= set(pipeline.STEPS_BY_NAME['viz-datasets']['outputs'])
+    published = {Path(output).name for output in pipeline.STEPS_BY_NAME['publish']['outputs']}
+    assert binaries <= published
+    for name in binaries:
+        assert pipeline.step_path(name).exists(), name
+        assert name in json.loads((PUBLIC_DATA_PATH / PUBLISH_MANIFEST_NAME).read_text())['files'], name
@@ -0,0 +1,66 @@
+import hashlib
+import json
+
+import pytest
+
+from publish import PUBLISH_MANIFEST_NAME, publish_viz_datasets
+
+
+@pytest.fixture
+def dirs(tmp_path):
+    src, dest = tmp_path / 'viz-datasets', tmp_path / 'data'
+    src.mkdir()
+    (src / 'viz1_map.json').write_text('{"a":1}')
+    (src / 'viz9_flows.json').write_text('{"b":2}')
+    (src / 'viz9_flows.bin').write_bytes(b'VIZB\0\0\0\0')
+    (src / 'viz9_flows.json.gz').write_bytes(b'gz')
+    return src, dest
+
+
+def published_files(dest):
+    return json.loads((dest / PUBLISH_MANIFEST_NAME).read_text())['files']
+
+
+def test_publish_copies_changed_files_and_records_their_hashes(dirs):
+    src, dest = dirs
+    copied, removed = publish_viz_datasets(src_dir=src, dest_dir=dest)
+    assert copied == ['viz1_map.json', 'viz9_flows.bin', 'viz9_flows.json'] and removed == []
+    assert not (dest / 'viz9_flows.json.gz').exists()
+    for name, entry in published_files(dest).items():
+        content = (dest / name).read_bytes()
+        assert entry == {'sha256': hashlib.sha256(content).hexdigest(), 'size': len(content)}
+
+    mtime = (dest / 'viz1_map.json').stat().st_mtime_ns
+    assert publish_viz_datasets(src_dir=src, dest_dir=dest) == ([], [])
+    assert (dest / 'viz1_map.json').stat().st_mtime_ns == mtime
+
+    (src / 'viz9_flows.json').write_text('{"b":3}')
+    assert publish_viz_datasets(src_dir=src, dest_dir=dest) == (['viz9_flows.json'], [])
+    assert (dest / 'viz9_flows.json').read_text() == '{"b":3}'
+
+
+def test_named_publish_includes_the_binary_copy(dirs):
+    src, dest = dirs
+    copied, _ = publish_viz_datasets(['viz9_flows.json'], src_dir=src, dest_dir=dest)
+    assert copied == ['viz9_flows.bin', 'viz9_flows.json']
+    assert sorted(published_files(dest)) == copied
+
+    with pytest.raises(ValueError, match='viz5_missing'):
+        publish_viz_datasets(['viz5_missing.json'], src_dir=src, dest_dir=dest)
+
+
+def test_full_publish_removes_files_it_published_before(dirs):
+    src, dest = dirs
+    publish_viz_datasets(src_dir=src, dest_dir=dest)
+    (dest / 'hand_made.json').write_text('{}')
+    (src / 'viz9_flows.bin').unlink()
+
+    # A named publish leaves other files alone
+    assert publish_viz_datasets(['viz1_map.json'], src_dir=src, dest_dir=dest) == ([], [])
+    assert (dest / 'viz9_flows.bin').exists()
+
+    assert publish_viz_datasets(src_dir=src, dest_dir=dest) == ([], ['viz9_flows.bin'])
+    assert not (dest / 'viz9_flows.bin').exists()
+    assert 'viz9_flows.bin' not in published_files(dest)
+    # Files publish did not write are kept
+    assert (dest / 'hand_made.json').exists()
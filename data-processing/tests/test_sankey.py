@@ -0,0 +1,76 @@
+import pandas as pd
+import pytest
+
+from acled_actor_stats import build_actor_stats, load_actor_stats, top_actors_by_type
+from acled_actors import build_actor_dictionary
+from acled_store import convert_acled_csv, load_acled
+from conftest import make_events, write_csv
+from viz_specs import sankey_dataset, sankey_flow_grain
+
+ACTOR_TYPES = ['Protesters', 'Rebel group', 'State forces']
+# Declared out of alphabetical order, so input order and name order disagree
+TIED_ACTORS = ['Delta Front', 'Alpha Brigade', 'Charlie Unit', 'Bravo Militia']
+SANKEY_COLUMNS = ['event_date', 'year', 'event_type', 'sub_event_type', 'actor1', 'inter1', 'country', 'fatalities']
+
+
+@pytest.fixture
+def tied_snapshot(tmp_path):
+    """Every actor of every type has the same number of events"""
+    events = make_events(240, seed=4)
+    events['inter1'] = [ACTOR_TYPES[i % 3] for i in range(len(events))]
+    events['actor1'] = [TIED_ACTORS[(i // 3) % 4] for i in range(len(events))]
+    snapshot_dir = convert_acled_csv(write_csv(events, tmp_path / 'acled.csv'), tmp_path / 'events')
+    build_actor_dictionary(snapshot_dir, tmp_path / 'actor_dictionary.parquet')
+    build_actor_stats(snapshot_dir, tmp_path / 'actor_dictionary.parquet', tmp_path / 'actor_stats.parquet')
+    return snapshot_dir
+
+
+def test_grain_and_index_selections_break_ties_the_same_way(tmp_path, tied_snapshot):
+    events = load_acled(columns=SANKEY_COLUMNS, snapshot_dir=tied_snapshot)
+    stats = load_actor_stats(dictionary_path=tmp_path / 'actor_dictionary.parquet',
+                             path=tmp_path / 'actor_stats.parquet')
+
+    from_index = top_actors_by_type(stats, 2)
+    for order in [events, events.iloc[::-1]]:
+        from_grain = sankey_dataset(sankey_flow_grain(order), 2)['actor_types']
+        assert from_grain == from_index
+    assert from_index == {actor_type: ['Alpha Brigade', 'Bravo Militia'] for actor_type in ACTOR_TYPES}
+
+
+def test_flows_add_up_to_the_events_of_the_selected_actors(tmp_path):
+    events = make_events(600, seed=5)
+    snapshot_dir = convert_acled_csv(write_csv(events, tmp_path / 'acled.csv'), tmp_path / 'events')
+    dataset = sankey_dataset(sankey_flow_grain(load_acled(columns=SANKEY_COLUMNS, snapshot_dir=snapshot_dir)), 2)
+
+    selected = [actor for actors in dataset['actor_types'].values() for actor in actors]
+    expected = events[events['actor1'].isin(selected)]
+    flows = pd.DataFrame(dataset['flows'])
+    assert flows['events'].sum() == len(expected)
+    assert flows['fatalities'].sum() == expected['fatalities'].sum()
+    for flow in dataset['flows']:
+        assert flow['years'] == sorted(flow['years'])
+        assert sum(year['events'] for year in flow['year_breakdown'].values()) == flow['events']
+
+
+def decode_day_runs(flow, base_date):
+    """The decoder contract SankeyChart.vue implements for date_days/date_counts"""
+    days = pd.Series(flow['date_days']).cumsum()
+    counts = flow.get('date_counts', [1] * len(days))
+    dates = pd.Timestamp(base_date) + pd.to_timedelta(days, unit='D')
+    return [date.strftime('%Y-%m-%d') for date, count in zip(dates, counts) for _ in range(count)]
+
+
+def test_day_runs_decode_to_the_date_strings(tmp_path):
+    events = make_events(600, seed=6)
+    events.loc[:50, 'event_date'] = '2020-03-15'  # several events on one day
+    events.loc[:50, 'year'] = 2020
+    snapshot_dir = convert_acled_csv(write_csv(events, tmp_path / 'acled.csv'), tmp_path / 'events')
+    frame = load_acled(columns=SANKEY_COLUMNS, snapshot_dir=snapshot_dir)
+
+    strings = sankey_dataset(sankey_flow_grain(frame), 3, dates=frame, date_encoding='strings')
+    runs = sankey_dataset(sankey_flow_grain(frame), 3, dates=frame, date_encoding='day-runs')
+
+    base_date = runs['metadata']['date_encoding']['base_date']
+    assert len(strings['flows']) == len(runs['flows'])
+    for string_flow, run_flow in zip(strings['flows'], runs['flows']):
+        assert decode_day_runs(run_flow, base_date) == sorted(string_flow['dates'])
@@ -0,0 +1,146 @@
+import json
+
+import pandas as pd
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+import pytest
+
+from acled_store import ACLED_SCHEMA, convert_acled_csv, load_acled, write_year_file, year_file_path
+from conftest import make_events, write_csv
+from viz_engine import DERIVED_COLUMNS, build_viz_datasets, spec_year_window
+from viz_output import write_viz_json
+from viz_specs import VIZ_SPECS
+
+# ACLED specs that need no economics master or country registry
+ACLED_ONLY_SPECS = ['viz3', 'viz4', 'viz6', 'viz8']
+SPECS_BY_NAME = {spec['name']: spec for spec in VIZ_SPECS}
+
+
+@pytest.fixture
+def snapshot(tmp_path):
+    events = make_events(1500, seed=3, years=(2015, 2024))
+    return events, convert_acled_csv(write_csv(events, tmp_path / 'acled.csv'), tmp_path / 'events')
+
+
+def build(tmp_path, snapshot_dir, names, **options):
+    out_dir = tmp_path / 'viz-datasets'
+    build_viz_datasets(names, snapshot_dir, out_dir, manifest_path=tmp_path / 'manifest.json', **options)
+    return out_dir
+
+
+def baseline_viz6(events):
+    """viz6 records the way the original week3 script computed them from the raw CSV"""
+    categories = {'Protests': 'Protests & Riots', 'Riots': 'Protests & Riots', 'Battles': 'Battles',
+                  'Explosions/Remote violence': 'Other', 'Violence against civilians': 'Violence against civilians',
+                  'Strategic developments': 'Other'}
+    df = events.assign(event_date=pd.to_datetime(events['event_date']))
+    df = df[df['country'].isin(['Mexico', 'India']) & (df['year'] >= df['year'].max() - 6)]
+    df = df.assign(year_month=df['event_date'].dt.to_period('M').astype(str),
+                   event_category=df['event_type'].map(categories))
+    combined = df.groupby(['country', 'year_month', 'event_category']).agg(
+        event_count=('event_id_cnty', 'count'), fatalities=('fatalities', 'sum')).reset_index()
+
+    output = {}
+    for country in ['Mexico', 'India']:
+        data = combined[combined['country'] == country]
+        counts = data.pivot(index='year_month', columns='event_category', values='event_count').fillna(0).astype(int)
+        fatal = data.pivot(index='year_month', columns='event_category', values='fatalities').fillna(0).astype(int)
+        records = []
+        for year_month in counts.index:
+            count_row, fatal_row = counts.loc[year_month], fatal.loc[year_month]
+            total_events, total_fatalities = int(count_row.sum()), int(fatal_row.sum())
+            record = {'date': year_month}
+            record.update({col: int(count_row[col]) for col in counts.columns})
+            record.update({f'{col}_fatalities': int(fatal_row[col]) for col in counts.columns})
+            record['_total_events'] = total_events
+            record['_total_fatalities'] = total_fatalities
+            for col in counts.columns:
+                record[f'{col}_pct'] = round(count_row[col] / total_events * 100 if total_events > 0 else 0, 1)
+                record[f'{col}_fatality_rate'] = round(fatal_row[col] / count_row[col] if count_row[col] > 0 else 0, 2)
+            records.append(record)
+        output[country.lower()] = records
+    return output
+
+
+def direct_output(spec, snapshot_dir, tmp_path):
+    """A spec's output from its own full aggregation of the snapshot (no shared grain, no per-year scan)"""
+    events = load_acled(snapshot_dir=snapshot_dir)
+    for name, (_, derive) in DERIVED_COLUMNS.items():
+        events[name] = derive(events)
+    first_year, last_year = int(events['year'].min()), int(events['year'].max())
+    start, end = spec_year_window(spec, first_year, last_year)
+    events = events[events['year'].between(start, end)]
+    if spec.get('countries') is not None:
+        events = events[events['country'].isin(spec['countries'])]
+    if spec.get('event_types') is not None:
+        events = events[events['event_type'].isin(spec['event_types'])]
+    frame = events.groupby(spec['keys'], observed=True).agg(**{
+        out: (col if col is not None else 'year', func) for out, (col, func) in spec['measures'].items()
+    }).reset_index()
+    output = spec['post'](frame, {'current_year': last_year, 'start_year': start})
+    path = write_viz_json(output, tmp_path / 'direct' / spec['output'], spec.get('precision'),
+                          ensure_ascii=spec.get('ensure_ascii', False), columnar=spec.get('columnar'))
+    return path.read_bytes()
+
+
+def test_viz6_matches_the_baseline_script(tmp_path, snapshot):
+    events, snapshot_dir = snapshot
+    out_dir = build(tmp_path, snapshot_dir, ['viz6'])
+
+    built = json.loads((out_dir / SPECS_BY_NAME['viz6']['output']).read_text(encoding='utf-8'))
+    expected = baseline_viz6(events)
+    assert built['mexico'] == expected['mexico']
+    assert built['india'] == expected['india']
+    assert built['metadata']['date_range'] == '2018-2024'
+
+
+@pytest.mark.parametrize('name', ACLED_ONLY_SPECS)
+def test_fused_scan_matches_a_direct_aggregation(tmp_path, snapshot, name):
+    _, snapshot_dir = snapshot
+    (tmp_path / 'direct').mkdir()
+    out_dir = build(tmp_path, snapshot_dir, ACLED_ONLY_SPECS)
+
+    spec = SPECS_BY_NAME[name]
+    assert (out_dir / spec['output']).read_bytes() == direct_output(spec, snapshot_dir, tmp_path)
+
+
+def output_mtimes(out_dir, names):
+    return {name: (out_dir / SPECS_BY_NAME[name]['output']).stat().st_mtime_ns for name in names}
+
+
+def test_rebuild_touches_only_targets_whose_inputs_or_code_changed(tmp_path, snapshot, monkeypatch):
+    _, snapshot_dir = snapshot
+    names = ['viz4', 'viz6']
+    out_dir = build(tmp_path, snapshot_dir, names)
+    built = output_mtimes(out_dir, names)
+
+    build(tmp_path, snapshot_dir, names)
+    assert output_mtimes(out_dir, names) == built
+
+    # A correction to 2015 is outside viz6's 2018-2024 window
+    path = year_file_path(2015, snapshot_dir)
+    year = pq.read_table(path, schema=ACLED_SCHEMA)
+    write_year_file(year.set_column(year.schema.get_field_index('fatalities'), 'fatalities',
+                                    pc.add(year.column('fatalities'), 1)), path)
+    build(tmp_path, snapshot_dir, names)
+    rebuilt = output_mtimes(out_dir, names)
+    assert rebuilt['viz4'] != built['viz4']
+    assert rebuilt['viz6'] == built['viz6']
+
+    # So is a change to viz4's declaration
+    monkeypatch.setitem(SPECS_BY_NAME['viz4'], 'precision', {'fatalities': 0})
+    build(tmp_path, snapshot_dir, names)
+    assert output_mtimes(out_dir, names)['viz4'] != rebuilt['viz4']
+    assert output_mtimes(out_dir, names)['viz6'] == built['viz6']
+
+    build(tmp_path, snapshot_dir, names, force=True)
+    assert output_mtimes(out_dir, names)['viz6'] != built['viz6']
+
+
+def test_parallel_scan_writes_the_same_datasets(tmp_path, snapshot):
+    _, snapshot_dir = snapshot
+    serial = build(tmp_path / 'serial', snapshot_dir, ACLED_ONLY_SPECS)
+    parallel = build(tmp_path / 'parallel', snapshot_dir, ACLED_ONLY_SPECS, jobs=2)
+    for name in ACLED_ONLY_SPECS:
+        output = SPECS_BY_NAME[name]['output']
+        assert (parallel / output).read_bytes() == (serial / output).read_bytes(), name
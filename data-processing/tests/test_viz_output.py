@@ -0,0 +1,192 @@
+import gzip
+import json
+import shutil
+import struct
+import subprocess
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+import viz_output
+from viz_output import encode_json, write_viz_json
+
+VIZ_DATA_JS = Path(__file__).resolve().parents[2] / 'public' / 'src' / 'utils' / 'vizData.js'
+
+RECORDS = [
+    {'from': 'Côte d\'Ivoire', 'to': 'Mali', 'deaths': 25, 'share': 0.125, 'active': True, 'years': [2019, 2020]},
+    {'from': 'Côte d\'Ivoire', 'to': None, 'deaths': 31, 'share': float('nan'), 'active': False, 'years': []},
+    {'from': 'Niger', 'to': 'Mali', 'deaths': np.int64(12), 'share': np.float32(0.5), 'active': True},
+]
+DATASET = {'metadata': {'title': 'Flows', 'total': np.float64(68.0), 'ratio': float('inf')}, 'flows': RECORDS}
+
+
+def test_bytes_depend_only_on_the_values(tmp_path):
+    written = write_viz_json(DATASET, tmp_path / 'numpy.json').read_bytes()
+    assert write_viz_json(DATASET, tmp_path / 'again.json').read_bytes() == written
+
+    # The same values as plain Python numbers, as a build without NumPy results would hold them
+    plain = {'metadata': {'title': 'Flows', 'total': 68.0, 'ratio': float('inf')},
+             'flows': [dict(RECORDS[0]), dict(RECORDS[1]), {**RECORDS[2], 'deaths': 12, 'share': 0.5}]}
+    assert write_viz_json(plain, tmp_path / 'plain.json').read_bytes() == written
+
+
+def test_non_finite_floats_and_numpy_scalars(tmp_path):
+    written = write_viz_json(DATASET, tmp_path / 'viz.json').read_bytes()
+    assert b'NaN' not in written and b'Infinity' not in written
+
+    data = json.loads(written)
+    assert data['metadata'] == {'title': 'Flows', 'total': 68.0, 'ratio': None}
+    assert data['flows'][1]['share'] is None
+    assert data['flows'][2]['deaths'] == 12 and data['flows'][2]['share'] == 0.5
+    assert written == json.dumps(data, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+def test_indent_and_ascii_escaping_only_change_the_layout():
+    minified = encode_json(DATASET)
+    indented = encode_json(DATASET, indent=2)
+    escaped = encode_json(DATASET, ensure_ascii=True)
+    assert 'Côte'.encode('utf-8') in minified and b'C\\u00f4te' in escaped
+    assert b'\n' not in minified and b'\n' in indented
+    assert json.loads(minified) == json.loads(indented) == json.loads(escaped)
+
+
+def test_precision_rounds_the_fields_it_names(tmp_path):
+    data = {'gdp_usd': 1234.567, 'rows': [{'share': 0.123456, 'gdp_usd': [1.6, 2.4]}], 'other': 0.123456}
+    written = json.loads(write_viz_json(data, tmp_path / 'viz.json', precision={'share': 2, 'gdp_usd': 0})
+                         .read_bytes())
+    assert written == {'gdp_usd': 1235, 'rows': [{'share': 0.12, 'gdp_usd': [2, 2]}], 'other': 0.123456}
+
+
+def test_companions_only_on_request_and_never_stale(tmp_path):
+    path = tmp_path / 'viz.json'
+    write_viz_json(DATASET, path)
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['viz.json']
+
+    write_viz_json(DATASET, path, compress=True)
+    assert gzip.decompress((tmp_path / 'viz.json.gz').read_bytes()) == path.read_bytes()
+    if viz_output.brotli is None:
+        assert not (tmp_path / 'viz.json.br').exists()
+
+    write_viz_json({'changed': True}, path)
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['viz.json']
+
+
+def table_rows(table):
+    """The records of a dataset field the way tableRows() in public/src/utils/vizData.js reads them"""
+    if isinstance(table, list):
+        return table
+    dictionaries = table.get('dictionaries', {})
+    columns = {field: [None if dictionaries.get(field) is None or value is None else dictionaries[field][value]
+                       for value in values] if field in dictionaries else values
+               for field, values in table['columns'].items()}
+    return [{field: values[row] for field, values in columns.items()} for row in range(table['length'])]
+
+
+def run_viz_data(tmp_path, script):
+    """stdout of an ES module script run by node with the exports of vizData.js in scope"""
+    source = (VIZ_DATA_JS.read_text(encoding='utf-8')
+              .replace("import publishManifest from '@/assets/data/manifest.json'", 'const publishManifest = {}'))
+    (tmp_path / 'vizData.mjs').write_text(source, encoding='utf-8')
+    (tmp_path / 'script.mjs').write_text("import * as vizData from './vizData.mjs'\n"
+                                         "import { readFileSync } from 'node:fs'\n" + script, encoding='utf-8')
+    result = subprocess.run(['node', str(tmp_path / 'script.mjs')], capture_output=True, text=True, check=True)
+    return result.stdout
+
+
+def expected_records(records):
+    """Records as the JSON file holds them: NaN as null, fields missing from a record as null"""
+    records = json.loads(encode_json(records))
+    fields = list(dict.fromkeys(key for record in records for key in record))
+    return [{field: record.get(field) for field in fields} for record in records]
+
+
+def test_columnar_tables_read_back_as_the_records(tmp_path):
+    path = write_viz_json(DATASET, tmp_path / 'viz.json', columnar=['flows'])
+    data = json.loads(path.read_bytes())
+    assert data['metadata'] == json.loads(encode_json(DATASET['metadata']))
+    assert data['flows']['layout'] == 'columnar'
+    # Repeated strings are dictionary-encoded, null stays null
+    assert data['flows']['dictionaries'] == {'from': ["Côte d'Ivoire", 'Niger'], 'to': ['Mali']}
+    assert data['flows']['columns']['to'] == [0, None, 0]
+    assert table_rows(data['flows']) == expected_records(RECORDS)
+    assert table_rows(data['metadata'].get('missing', [])) == []
+
+
+@pytest.mark.skipif(shutil.which('node') is None, reason='needs node')
+def test_columnar_tables_read_back_in_the_browser_loader(tmp_path):
+    path = write_viz_json(DATASET, tmp_path / 'viz.json', columnar=['flows'])
+    rows = run_viz_data(tmp_path, f"const data = JSON.parse(readFileSync({json.dumps(str(path))}, 'utf8'))\n"
+                                  "console.log(JSON.stringify(vizData.tableRows(data.flows)))\n")
+    assert json.loads(rows) == expected_records(RECORDS)
+
+
+def decode_binary(payload):
+    """A .bin dataset decoded the way decodeVizBinary() and tableRows() in vizData.js read it"""
+    assert payload[:4] == viz_output.BINARY_MAGIC
+    header_length = struct.unpack('<I', payload[4:8])[0]
+    data_start = 8 + header_length
+    assert data_start % viz_output.BINARY_ALIGNMENT == 0
+    header = json.loads(payload[8:data_start])
+
+    dataset = dict(header['fields'])
+    for name, table in header['tables'].items():
+        columns = {}
+        for column in table['columns']:
+            if column['type'] == 'json':
+                columns[column['name']] = column['values']
+                continue
+            dtype = {'int32': '<i4', 'dictionary': '<i4', 'float64': '<f8', 'uint8': 'u1'}[column['type']]
+            offset = data_start + column['offset']
+            assert offset % viz_output.BINARY_ALIGNMENT == 0
+            values = np.frombuffer(payload, dtype=dtype, count=table['length'], offset=offset).tolist()
+            if column['type'] == 'dictionary':
+                values = [None if i < 0 else column['dictionary'][i] for i in values]
+            elif column['type'] == 'float64':
+                values = [None if np.isnan(v) else v for v in values]
+            elif column['type'] == 'uint8':
+                values = [v == 1 for v in values]
+            columns[column['name']] = values
+        dataset[name] = [{field: values[row] for field, values in columns.items()} for row in range(table['length'])]
+    return dataset
+
+
+BINARY_DATASET = {**DATASET, 'flows': RECORDS + [
+    {'from': None, 'to': 'Niger', 'deaths': None, 'share': 1e-3, 'active': True, 'years': [2024]},
+    {'from': 'Niger', 'to': 'Chad', 'deaths': 2**40, 'share': -2.5, 'active': False},
+], 'countries': [{'name': 'Mali', 'code': 466}], 'empty': []}
+
+
+def test_binary_reads_back_as_the_records(tmp_path):
+    path = write_viz_json(BINARY_DATASET, tmp_path / 'viz.json', binary=True)
+    decoded = decode_binary(path.with_suffix('.bin').read_bytes())
+    expected = json.loads(encode_json(BINARY_DATASET))
+    assert decoded['metadata'] == expected['metadata'] and decoded['empty'] == []
+    assert decoded['countries'] == expected['countries']
+    assert decoded['flows'] == expected_records(BINARY_DATASET['flows'])
+    # The JSON file next to it is the usual one
+    assert path.read_bytes() == encode_json(BINARY_DATASET)
+
+
+def test_binary_only_on_request_and_never_stale(tmp_path):
+    path = tmp_path / 'viz.json'
+    write_viz_json(BINARY_DATASET, path)
+    assert not path.with_suffix('.bin').exists()
+    write_viz_json(BINARY_DATASET, path, binary=True)
+    assert path.with_suffix('.bin').exists()
+    write_viz_json(BINARY_DATASET, path)
+    assert not path.with_suffix('.bin').exists()
+
+
+@pytest.mark.skipif(shutil.which('node') is None, reason='needs node')
+def test_binary_reads_back_in_the_browser_loader(tmp_path):
+    path = write_viz_json(BINARY_DATASET, tmp_path / 'viz.json', binary=True).with_suffix('.bin')
+    output = run_viz_data(tmp_path, f"const file = readFileSync({json.dumps(str(path))})\n"
+                                    "const buffer = file.buffer.slice(file.byteOffset, file.byteOffset + file.length)\n"
+                                    "const data = vizData.decodeVizBinary(buffer)\n"
+                                    "console.log(JSON.stringify({...data, flows: vizData.tableRows(data.flows),\n"
+                                    "                            countries: vizData.tableRows(data.countries)}))\n")
+    decoded = json.loads(output)
+    assert decoded['flows'] == expected_records(BINARY_DATASET['flows'])
+    assert decoded['countries'] == BINARY_DATASET['countries']
+    assert decoded['metadata'] == json.loads(encode_json(DATASET['metadata']))
@@ -0,0 +1,353 @@
+"""
+Viz Dataset Engine
+
+Builds the viz-datasets/ outputs declared in viz_specs.py in one process.
+
+All ACLED specs are planned together: every spec is assigned to a shared
+aggregate grain (the conflict cube grain when its keys and filters fit,
+otherwise its own grain), and the snapshot is read once, one year file at a
+time, with the union of the columns any grain needs. Each year is aggregated
+into every grain that covers it, and each spec is then a filtered roll-up of
+its grain. Other sources (economics master, UCDP) are loaded once and shared.
+
+Builds are incremental: intermediate/viz_build_manifest.json records, per
+target, the content hash of every input file (only the snapshot years in the
+spec's window) and a version hash of its builder code. Only targets whose own
+inputs or code changed are planned and scanned.
+
+Usage:
+    python viz_engine.py build                 # stale specs only
+    python viz_engine.py build --only viz1 viz4
+    python viz_engine.py build --force         # rebuild everything
+    python viz_engine.py build --jobs 4        # scan years in 4 processes over shared memory
+    python viz_engine.py build --indent 2      # indented JSON instead of minified
+"""
+
+import argparse
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+
+from acled_cube import CUBE_KEYS
+from acled_shared import attach_shared_acled, share_acled, shared_acled_year
+from acled_store import (
+    ACLED_SNAPSHOT_DIR, acled_year_range, data_processing_path, intermediate_path, load_acled,
+    year_file_path
+)
+from build_manifest import code_version, file_fingerprint, load_manifest, save_manifest
+from country_registry import COUNTRY_REGISTRY_DIR
+from economics_store import ECONOMICS_MASTER_CSV, load_economics_master
+from process_interventions import ucdp_battle_deaths_path
+from viz_output import VIZ_JSON_INDENT, write_viz_json
+from viz_specs import VIZ_SPECS
+
+viz_datasets_path = data_processing_path / 'viz-datasets'
+MANIFEST_PATH = intermediate_path / 'viz_build_manifest.json'
+
+# Columns derived from the snapshot during the scan
+DERIVED_COLUMNS = {
+    'month': ('event_date', lambda events: events['event_date'].dt.month.astype('int8')),
+}
+
+# How partial aggregates of each measure are combined across grains and years
+MEASURE_COMBINE = {'size': 'sum', 'sum': 'sum', 'min': 'min', 'max': 'max'}
+
+# Aggregates shared by every spec they cover
+SHARED_GRAINS = [CUBE_KEYS]
+
+
+def _grain_measure(column, func):
+    """Column name of a measure inside a grain aggregate"""
+    return 'rows' if func == 'size' else f'{column}_{func}'
+
+
+def _spec_columns(spec):
+    """Dimension columns a spec needs from its grain: keys, filter columns and year"""
+    columns = list(spec['keys'])
+    for col, field in [('country', 'countries'), ('event_type', 'event_types'), ('year', 'years')]:
+        if spec.get(field) is not None and col not in columns:
+            columns.append(col)
+    if 'year' not in columns:
+        columns.append('year')
+    return columns
+
+
+def spec_year_window(spec, first_year, last_year):
+    """Resolve a spec's relative year window against the snapshot's year range"""
+    if spec.get('years') is None:
+        return first_year, last_year
+    return last_year + spec['years'][0], last_year + spec['years'][1]
+
+
+def plan_specs(specs, first_year, last_year):
+    """
+    Resolve year windows and assign every ACLED spec to a grain.
+
+    Returns the grains (keys, measures, years to scan) and the per-spec plans.
+    Grains always include year, so per-year partial aggregates never overlap.
+    """
+    grains = [{'keys': list(keys), 'measures': set(), 'years': set(), 'specs': []} for keys in SHARED_GRAINS]
+    plans = []
+    for spec in specs:
+        if spec['source'] != 'acled':
+            plans.append({'spec': spec})
+            continue
+
+        start, end = spec_year_window(spec, first_year, last_year)
+        needed = _spec_columns(spec)
+        grain = next((g for g in grains if set(needed) <= set(g['keys'])), None)
+        if grain is None:
+            grain = {'keys': needed, 'measures': set(), 'years': set(), 'specs': []}
+            grains.append(grain)
+        grain['measures'] |= set(spec['measures'].values())
+        grain['years'] |= set(range(max(start, first_year), min(end, last_year) + 1))
+        grain['specs'].append(spec['name'])
+        plans.append({'spec': spec, 'grain': grain, 'start_year': start, 'end_year': end})
+
+    return [g for g in grains if g['specs']], plans
+
+
+def aggregate_year(events, year, grains):
+    """Aggregate one year of events into every grain that covers it: {grain index: partial aggregate}"""
+    for name, (_, derive) in DERIVED_COLUMNS.items():
+        if any(name in g['keys'] for g in grains):
+            events[name] = derive(events)
+
+    parts = {}
+    for i, grain in enumerate(grains):
+        if year not in grain['years']:
+            continue
+        aggregations = {
+            _grain_measure(col, func): (col if col is not None else 'year', func)
+            for col, func in sorted(grain['measures'], key=str)
+        }
+        parts[i] = events.groupby(grain['keys'], observed=True).agg(**aggregations).reset_index()
+    return parts
+
+
+def _aggregate_shared_year(year, grains):
+    """Worker side of a parallel scan: aggregate one year of the shared ACLED frame"""
+    events = shared_acled_year(year)
+    return len(events), aggregate_year(events, year, grains)
+
+
+def scan_grains(grains, snapshot_dir=ACLED_SNAPSHOT_DIR, jobs=1):
+    """
+    Read the snapshot once, year by year, aggregating each year into every grain that needs it.
+
+    With jobs > 1 the scanned columns are loaded once into shared memory and
+    the years are aggregated by a pool of worker processes that attach to it
+    zero-copy, so memory stays at about one copy of those columns.
+    """
+    columns = set()
+    for grain in grains:
+        columns |= {DERIVED_COLUMNS[k][0] if k in DERIVED_COLUMNS else k for k in grain['keys']}
+        columns |= {col for col, func in grain['measures'] if col is not None}
+    years = sorted(set().union(*(g['years'] for g in grains)))
+    # Only what aggregate_year needs is sent to the workers
+    scan_plan = [{'keys': g['keys'], 'measures': g['measures'], 'years': g['years']} for g in grains]
+
+    parts = {i: [] for i in range(len(grains))}
+
+    def collect(year, rows, year_parts):
+        for i, part in year_parts.items():
+            parts[i].append(part)
+        print(f'  Scanned {year}: {rows:,} events')
+
+    if jobs > 1 and len(years) > 1:
+        with share_acled(sorted(columns), years=(years[0], years[-1]), snapshot_dir=snapshot_dir) as shared:
+            with ProcessPoolExecutor(max_workers=jobs, initializer=attach_shared_acled, initargs=(shared,)) as pool:
+                results = pool.map(_aggregate_shared_year, years, [scan_plan] * len(years))
+                for year, (rows, year_parts) in zip(years, results):
+                    collect(year, rows, year_parts)
+    else:
+        for year in years:
+            events = load_acled(columns=sorted(columns), years=(year, year), snapshot_dir=snapshot_dir)
+            collect(year, len(events), aggregate_year(events, year, scan_plan))
+
+    for i, grain in enumerate(grains):
+        grain['frame'] = pd.concat(parts[i], ignore_index=True)
+
+
+def rollup(grain, plan):
+    """Filter a grain aggregate to one spec's window and roll it up to the spec's keys"""
+    spec = plan['spec']
+    frame = grain['frame']
+    mask = frame['year'].between(plan['start_year'], plan['end_year'])
+    if spec.get('countries') is not None:
+        mask &= frame['country'].isin(spec['countries'])
+    if spec.get('event_types') is not None:
+        mask &= frame['event_type'].isin(spec['event_types'])
+
+    aggregations = {
+        out: (_grain_measure(col, func), MEASURE_COMBINE[func])
+        for out, (col, func) in spec['measures'].items()
+    }
+    return frame[mask].groupby(spec['keys'], observed=True).agg(**aggregations).reset_index()
+
+
+def load_economics():
+    """Economics master table (typed Parquet copy of processed-data/economics-countries-master.csv)"""
+    return load_economics_master()
+
+
+# Loaders of the non-ACLED sources and inputs, each called at most once per run
+INPUT_LOADERS = {
+    'economics': load_economics,
+    'ucdp': lambda: None,  # process_interventions reads UCDP itself
+}
+
+# Files behind each non-ACLED source and input, fingerprinted for incremental builds
+# (economics specs join on the country registry, so its tables count as economics inputs)
+INPUT_FILES = {
+    'economics': [ECONOMICS_MASTER_CSV, COUNTRY_REGISTRY_DIR / 'countries.parquet', COUNTRY_REGISTRY_DIR / 'aliases.parquet'],
+    'ucdp': [ucdp_battle_deaths_path, COUNTRY_REGISTRY_DIR / 'aliases.parquet', COUNTRY_REGISTRY_DIR / 'centroids.parquet'],
+}
+
+
+def spec_input_files(spec, first_year, last_year, snapshot_dir=ACLED_SNAPSHOT_DIR):
+    """Input files a spec reads: the snapshot years in its window plus its other sources"""
+    files = []
+    if spec['source'] == 'acled':
+        start, end = spec_year_window(spec, first_year, last_year)
+        years = range(max(start, first_year), min(end, last_year) + 1)
+        files += [path for path in (year_file_path(y, snapshot_dir) for y in years) if path.exists()]
+    else:
+        files += INPUT_FILES[spec['source']]
+    for name in spec.get('inputs', []):
+        files += INPUT_FILES[name]
+    return files
+
+
+def spec_code_version(spec):
+    """Version hash of a spec's declaration, its post step, the writer and, for ACLED specs, the engine path"""
+    funcs = [spec['post'], write_viz_json]
+    if spec['source'] == 'acled':
+        funcs += [plan_specs, scan_grains, rollup]
+    declaration = repr(sorted((k, v) for k, v in spec.items() if k != 'post'))
+    return hashlib.sha256((code_version(*funcs) + declaration).encode('utf-8')).hexdigest()
+
+
+def _manifest_key(path):
+    """Manifest key of a file: relative to data-processing/ when inside it"""
+    path = Path(path).resolve()
+    try:
+        return path.relative_to(data_processing_path.resolve()).as_posix()
+    except ValueError:
+        return str(path)
+
+
+def spec_signature(spec, files, manifest, indent=VIZ_JSON_INDENT):
+    """
+    Current code version, input hashes and JSON layout of a spec, refreshing cached file fingerprints.
+
+    A missing input (e.g. the country registry before it is built) counts as
+    None, so the spec is rebuilt once it appears.
+    """
+    inputs = {}
+    for path in files:
+        key = _manifest_key(path)
+        if not Path(path).exists():
+            manifest['files'].pop(key, None)
+            inputs[key] = None
+            continue
+        manifest['files'][key] = file_fingerprint(path, manifest['files'].get(key))
+        inputs[key] = manifest['files'][key]['sha256']
+    return {'code': spec_code_version(spec), 'inputs': inputs, 'indent': indent}
+
+
+def build_viz_datasets(names=None, snapshot_dir=ACLED_SNAPSHOT_DIR, out_dir=viz_datasets_path,
+                       force=False, manifest_path=MANIFEST_PATH, jobs=1, indent=VIZ_JSON_INDENT):
+    """
+    Plan and build the requested specs (all by default) with a single ACLED scan.
+
+    Specs whose output exists and whose inputs and code match the manifest
+    are skipped unless force is set. jobs > 1 aggregates the scanned years in
+    parallel worker processes sharing one copy of the events. Outputs are
+    written by viz_output.write_viz_json (minified unless indent is given).
+    """
+    specs = [s for s in VIZ_SPECS if names is None or s['name'] in names]
+    unknown = set(names or []) - {s['name'] for s in VIZ_SPECS}
+    if unknown:
+        raise ValueError(f'Unknown viz specs: {sorted(unknown)}')
+
+    out_dir = Path(out_dir)
+    first_year, last_year = acled_year_range(snapshot_dir)
+    manifest = load_manifest(manifest_path)
+    manifest.setdefault('files', {})
+    manifest.setdefault('targets', {})
+
+    signatures = {}
+    stale = []
+    for spec in specs:
+        files = spec_input_files(spec, first_year, last_year, snapshot_dir)
+        signatures[spec['name']] = spec_signature(spec, files, manifest, indent)
+        target = manifest['targets'].get(spec['name'])
+        if force or target != signatures[spec['name']] or not (out_dir / spec['output']).exists():
+            stale.append(spec)
+        else:
+            print(f"  {spec['name']}: up to date")
+    save_manifest(manifest, manifest_path)
+
+    grains, plans = plan_specs(stale, first_year, last_year)
+    for grain in grains:
+        print(f"Grain {grain['keys']}: {', '.join(grain['specs'])}")
+    if grains:
+        scan_grains(grains, snapshot_dir, jobs)
+
+    inputs = {}
+
+    def get_input(name):
+        if name not in inputs:
+            inputs[name] = INPUT_LOADERS[name]()
+        return inputs[name]
+
+    out_dir.mkdir(exist_ok=True)
+    for plan in plans:
+        spec = plan['spec']
+        ctx = {'current_year': last_year, 'start_year': plan.get('start_year')}
+        for name in spec.get('inputs', []):
+            ctx[name] = get_input(name)
+
+        if spec['source'] == 'acled':
+            frame = rollup(plan['grain'], plan)
+        else:
+            source = get_input(spec['source'])
+            frame = source.copy() if source is not None else None
+        output = spec['post'](frame, ctx)
+
+        output_file = write_viz_json(output, out_dir / spec['output'], spec.get('precision'), indent,
+                                     spec.get('ensure_ascii', False), spec.get('compress', False),
+                                     binary=spec.get('binary', False),
+                                     columnar=spec.get('columnar'))
+        print(f"[OK] {spec['name']}: {output_file.name} ({output_file.stat().st_size / 1024:.1f} KB)")
+
+        manifest['targets'][spec['name']] = signatures[spec['name']]
+        save_manifest(manifest, manifest_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build the viz datasets from their specs')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    build_parser = subparsers.add_parser('build', help='Build viz datasets in one pass over ACLED')
+    build_parser.add_argument('--only', nargs='+', metavar='NAME', help='Spec names to build (default: all)')
+    build_parser.add_argument('--snapshot', type=Path, default=ACLED_SNAPSHOT_DIR, help='ACLED snapshot directory')
+    build_parser.add_argument('--out', type=Path, default=viz_datasets_path, help='Output directory')
+    build_parser.add_argument('--force', action='store_true', help='Rebuild even if inputs and code are unchanged')
+    build_parser.add_argument('--manifest', type=Path, default=MANIFEST_PATH, help='Build manifest file')
+    build_parser.add_argument('--jobs', type=int, default=1,
+                              help='Worker processes for the ACLED scan, sharing one copy of the events')
+    build_parser.add_argument('--indent', type=int, default=VIZ_JSON_INDENT,
+                              help='Indent the JSON outputs (default: minified)')
+
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        build_viz_datasets(args.only, args.snapshot, args.out, args.force, args.manifest, args.jobs, args.indent)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,231 @@
+"""
+Viz Output
+
+One writer for every viz dataset: minified JSON by default, floats of chosen
+fields rounded to a fixed number of decimals and, on request (compress=True),
+precompressed .gz / .br companions next to the file for hosts that serve
+them. The website's Vite build only bundles the JSON imports, so the
+companions are off by default and publish.py does not copy them.
+
+    from viz_output import write_viz_json
+    write_viz_json(output, viz_datasets_path / 'viz7_maps.json',
+                   precision={'gdp_per_capita': 2, 'gdp_usd': 0})
+
+Large record lists can be written in a columnar layout instead (opt-in per
+top-level field, e.g. columnar=['flows']): one array per field, with string
+fields that repeat values stored as indices into a lookup list.
+
+    {"layout": "columnar", "length": 3,
+     "columns": {"from": [0, 0, 1], "deaths": [25, 31, 12]},
+     "dictionaries": {"from": ["Mali", "Niger"]}}
+
+Dictionary-encoded columns keep null as null. The Vue components read either
+layout through tableRows() in public/src/utils/vizData.js.
+
+Specs that set 'binary': True are also written as a typed-array binary (.bin
+next to the JSON) that the browser can fetch and map into typed arrays without
+building one object per record (loadVizBinary() in vizData.js):
+
+    b'VIZB' | uint32 header length | JSON header | column buffers
+
+The header holds the top-level fields that are not record lists and, per
+record list, its length and columns: name, type and the byte offset of the
+column's buffer after the header (8-byte aligned, little-endian). Integer columns
+are int32, other numeric columns float64 (NaN for null), string columns
+int32 indices into a dictionary in the header (-1 for null), booleans uint8;
+anything else (lists, objects, mixed values) stays in the header as JSON.
+
+Every file is encoded by the json module with one fixed configuration, so
+the bytes written depend only on the data, not on the machine: NaN and
+infinite floats are written as null (never as the invalid NaN/Infinity
+tokens), NumPy scalars as the Python numbers they hold, and ensure_ascii
+only switches the escaping of non-ASCII characters. .br companions need the
+brotli package and are skipped without it.
+"""
+
+import gzip
+import json
+import math
+import os
+import struct
+from pathlib import Path
+
+import numpy as np
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Default layout: None writes minified JSON, 2 the old indented layout
+VIZ_JSON_INDENT = None
+
+BINARY_MAGIC = b'VIZB'
+BINARY_VERSION = 1
+BINARY_ALIGNMENT = 8
+INT32_RANGE = (-2**31, 2**31 - 1)
+
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 11
+COMPANION_SUFFIXES = ['.gz', '.br']
+
+
+def quantize(data, precision):
+    """
+    Copy of data with the floats under the keys of precision rounded.
+
+    precision maps a field name to its decimals; the rounding applies to
+    everything nested under the field (e.g. lists of values). 0 decimals
+    writes integers.
+    """
+    def walk(value, digits):
+        if isinstance(value, float):
+            if digits is None or not math.isfinite(value):
+                return value
+            return round(value, digits) if digits > 0 else int(round(value))
+        if isinstance(value, dict):
+            return {key: walk(item, precision.get(key, digits)) for key, item in value.items()}
+        if isinstance(value, (list, tuple)):
+            return [walk(item, digits) for item in value]
+        return value
+
+    return walk(data, None)
+
+
+def to_columnar(records):
+    """A list of records as a columnar table (fields missing from a record are null)"""
+    fields = list(dict.fromkeys(key for record in records for key in record))
+    columns, dictionaries = {}, {}
+    for field in fields:
+        values = [record.get(field) for record in records]
+        present = [value for value in values if value is not None]
+        # Only strings are dictionary-encoded (lists and objects are not hashable)
+        strings = bool(present) and all(isinstance(value, str) for value in present)
+        distinct = list(dict.fromkeys(present)) if strings else present
+        if strings and len(distinct) < len(present):
+            index = {value: i for i, value in enumerate(distinct)}
+            values = [None if value is None else index[value] for value in values]
+            dictionaries[field] = distinct
+        columns[field] = values
+    return {'layout': 'columnar', 'length': len(records), 'columns': columns, 'dictionaries': dictionaries}
+
+
+def _binary_column(values):
+    """(column header, buffer or None) of one record field"""
+    present = [value for value in values if value is not None]
+    if present and all(isinstance(value, bool) for value in present) and len(present) == len(values):
+        return {'type': 'uint8'}, np.asarray(values, dtype='u1').tobytes()
+    if present and all(isinstance(value, (int, float)) and not isinstance(value, bool) for value in present):
+        if (len(present) == len(values) and all(isinstance(value, int) for value in present)
+                and INT32_RANGE[0] <= min(present) and max(present) <= INT32_RANGE[1]):
+            return {'type': 'int32'}, np.asarray(values, dtype='<i4').tobytes()
+        floats = [math.nan if value is None else value for value in values]
+        return {'type': 'float64'}, np.asarray(floats, dtype='<f8').tobytes()
+    if present and all(isinstance(value, str) for value in present):
+        dictionary = list(dict.fromkeys(present))
+        index = {value: i for i, value in enumerate(dictionary)}
+        indices = [-1 if value is None else index[value] for value in values]
+        return {'type': 'dictionary', 'dictionary': dictionary}, np.asarray(indices, dtype='<i4').tobytes()
+    return {'type': 'json', 'values': values}, None
+
+
+def _is_record_list(value):
+    """Whether a top-level field is a non-empty list of records"""
+    return isinstance(value, list) and bool(value) and all(isinstance(item, dict) for item in value)
+
+
+def encode_binary(data, ensure_ascii=False):
+    """Typed-array binary of a dataset: the record lists of data as column buffers, the rest in the header"""
+    header = {'version': BINARY_VERSION, 'fields': {}, 'tables': {}}
+    buffers = []
+    for key, value in data.items():
+        if not _is_record_list(value):
+            header['fields'][key] = value
+            continue
+        names = list(dict.fromkeys(name for record in value for name in record))
+        columns = []
+        for name in names:
+            column, buffer = _binary_column([record.get(name) for record in value])
+            column = {'name': name, **column}
+            if buffer is not None:
+                column['byteLength'] = len(buffer)
+                buffers.append((column, buffer))
+            columns.append(column)
+        header['tables'][key] = {'length': len(value), 'columns': columns}
+
+    offset = 0
+    for column, buffer in buffers:
+        column['offset'] = offset
+        offset += len(buffer) + (-len(buffer) % BINARY_ALIGNMENT)
+
+    # Pad the header so the column buffers start 8-byte aligned
+    encoded = encode_json(header, None, ensure_ascii)
+    encoded += b' ' * (-(len(BINARY_MAGIC) + 4 + len(encoded)) % BINARY_ALIGNMENT)
+    parts = [BINARY_MAGIC, struct.pack('<I', len(encoded)), encoded]
+    for _, buffer in buffers:
+        parts += [buffer, b'\0' * (-len(buffer) % BINARY_ALIGNMENT)]
+    return b''.join(parts)
+
+
+def json_safe(data):
+    """Copy of data with NaN and infinite floats as None and NumPy scalars as Python numbers"""
+    if isinstance(data, dict):
+        return {key: json_safe(value) for key, value in data.items()}
+    if isinstance(data, (list, tuple)):
+        return [json_safe(value) for value in data]
+    if isinstance(data, np.generic):
+        data = data.item()
+    if isinstance(data, float) and not math.isfinite(data):
+        return None
+    return data
+
+
+def encode_json(data, indent=VIZ_JSON_INDENT, ensure_ascii=False):
+    """JSON bytes of data, minified when indent is None (same bytes on every machine)"""
+    separators = (',', ':') if indent is None else (',', ': ')
+    return json.dumps(json_safe(data), indent=indent, separators=separators, ensure_ascii=ensure_ascii,
+                      allow_nan=False).encode('utf-8')
+
+
+def _write_bytes(path, payload):
+    """Write a file atomically (readers never see a partial file)"""
+    tmp_path = path.with_name(path.name + '.tmp')
+    tmp_path.write_bytes(payload)
+    os.replace(tmp_path, path)
+
+
+def write_viz_json(data, path, precision=None, indent=VIZ_JSON_INDENT, ensure_ascii=False, compress=False,
+                   columnar=None, binary=False):
+    """
+    Write a viz dataset, its compressed companions and its binary copy; returns the path.
+
+    columnar names top-level record lists of data to write as columnar tables.
+
+    compress=False and binary=False remove companions left over from earlier
+    runs, so they never go stale next to a newer JSON file.
+    """
+    path = Path(path)
+    data = json_safe(data)
+    if precision:
+        data = quantize(data, precision)
+    binary_path = path.with_suffix('.bin')
+    if binary and isinstance(data, dict):
+        _write_bytes(binary_path, encode_binary(data, ensure_ascii))
+    elif binary_path.exists():
+        binary_path.unlink()
+    if columnar:
+        data = {key: to_columnar(value) if key in columnar else value for key, value in data.items()}
+    payload = encode_json(data, indent, ensure_ascii)
+    _write_bytes(path, payload)
+
+    companions = {
+        '.gz': lambda: gzip.compress(payload, compresslevel=GZIP_LEVEL, mtime=0),
+        '.br': (lambda: brotli.compress(payload, quality=BROTLI_QUALITY)) if brotli is not None else None,
+    }
+    for suffix in COMPANION_SUFFIXES:
+        companion_path = path.with_name(path.name + suffix)
+        if compress and companions[suffix] is not None:
+            _write_bytes(companion_path, companions[suffix]())
+        elif companion_path.exists():
+            companion_path.unlink()
+    return path
@@ -0,0 +1,732 @@
+"""
+Viz Dataset Specs
+
+Declarative definitions of the viz1-viz9 datasets, executed together by
+viz_engine.py. Each spec names its source, filters, group keys, measures,
+post-processing and output file:
+
+    'name'          short id used on the command line
+    'source'        'acled' (fused snapshot scan), 'economics' or 'ucdp'
+    'years'         ACLED year window as offsets from the latest year, inclusive
+                    (e.g. (-9, 0) for the last 10 years); None for all years
+    'countries'     optional country filter
+    'event_types'   optional event type filter
+    'keys'          group keys of the ACLED aggregate handed to post
+    'measures'      {output column: (input column, 'size' | 'sum' | 'min' | 'max')}
+    'inputs'        extra shared inputs needed by post (e.g. ['economics'])
+    'post'          post(frame, ctx) -> JSON-ready dict
+    'output'        file name under viz-datasets/
+    'precision'     optional {field: decimals} rounding of float fields in the output
+    'columnar'      optional top-level record lists written as columnar tables
+                    (read with tableRows() in public/src/utils/vizData.js)
+    'ensure_ascii'  escape non-ASCII characters in the output (default False)
+    'compress'      also write .gz / .br companions (default False)
+    'binary'        also write the typed-array .bin copy (default False)
+
+post receives the aggregated frame (ACLED specs) or the source table, and a
+ctx dict with current_year, start_year and the requested inputs.
+"""
+
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from acled_store import ACLED_CSV
+from country_registry import join_countries, rename_countries
+
+HIGHLIGHTED_COUNTRIES = ['Ukraine', 'India', 'Mexico', 'United States', 'Afghanistan', 'Somalia', 'Italy']
+
+# Decimals kept of the map values (viz7): cents per capita, whole dollars of GDP
+MAP_VALUE_PRECISION = {'gdp_per_capita': 2, 'gdp_usd': 0}
+
+
+def _latest_economics(econ):
+    """Latest economics row per country"""
+    return econ.sort_values('Year').groupby('Country').last().reset_index()
+
+
+def _top_conflict_countries(frame, econ):
+    """Top 20 countries by events with their sector shares and per capita rates (viz1, viz2)"""
+    df_merged = join_countries(frame, _latest_economics(econ), 'country', 'Country', 'acled', 'un_sna')
+
+    country_totals = df_merged.groupby('country', observed=True).agg({
+        'event_count': 'sum',
+        'total_fatalities': 'sum',
+        'Primary_%': 'first',
+        'Secondary_%': 'first',
+        'Tertiary_%': 'first',
+        'Tourism_%': 'first',
+        'Population': 'first'
+    }).reset_index()
+    country_totals = country_totals[country_totals['Primary_%'].notna()].copy()
+
+    country_totals['events_per_100k'] = (country_totals['event_count'] / country_totals['Population']) * 100000
+    country_totals['fatalities_per_100k'] = (country_totals['total_fatalities'] / country_totals['Population']) * 100000
+
+    return country_totals.nlargest(20, 'event_count').sort_values('event_count', ascending=False)
+
+
+def build_viz1(frame, ctx):
+    """Viz 1: Bar chart - top conflict countries by economic sector"""
+    viz_data = _top_conflict_countries(frame, ctx['economics'])[[
+        'country', 'event_count', 'total_fatalities', 'events_per_100k', 'fatalities_per_100k',
+        'Primary_%', 'Secondary_%', 'Tertiary_%', 'Tourism_%', 'Population'
+    ]].copy()
+
+    viz_data['event_count'] = viz_data['event_count'].astype(int)
+    viz_data['total_fatalities'] = viz_data['total_fatalities'].astype(int)
+    viz_data['events_per_100k'] = viz_data['events_per_100k'].round(2)
+    viz_data['fatalities_per_100k'] = viz_data['fatalities_per_100k'].round(2)
+    viz_data['Primary_%'] = viz_data['Primary_%'].round(2)
+    viz_data['Secondary_%'] = viz_data['Secondary_%'].round(2)
+    viz_data['Tertiary_%'] = viz_data['Tertiary_%'].round(2)
+    viz_data['Tourism_%'] = viz_data['Tourism_%'].fillna(0).round(2)
+    viz_data['Population'] = viz_data['Population'].astype('Int64')
+
+    return {
+        'metadata': {
+            'title': 'Top Conflict Countries by Economic Sector (2015-2024)',
+            'description': 'Top 20 countries sorted by number of conflict events',
+            'source': 'ACLED + World Bank',
+            'date_range': '2015-2024',
+            'notes': 'Per capita rates calculated per 100000 population'
+        },
+        'data': viz_data.to_dict('records')
+    }
+
+
+def build_viz2(frame, ctx):
+    """Viz 2: 100% stacked bar - sector composition of the highlighted countries"""
+    viz1_data = _top_conflict_countries(frame, ctx['economics'])
+    stacked_data = viz1_data[viz1_data['country'].isin(HIGHLIGHTED_COUNTRIES)].copy()
+    stacked_data['sort_order'] = stacked_data['country'].map(
+        {country: i for i, country in enumerate(HIGHLIGHTED_COUNTRIES)}
+    )
+    stacked_data = stacked_data.sort_values('sort_order').drop(columns=['sort_order'])
+
+    # Tourism is shown separately, but subtracted from Tertiary to keep total at 100%
+    stacked_records = []
+    for _, row in stacked_data.iterrows():
+        tourism_pct = float(row['Tourism_%']) if pd.notna(row['Tourism_%']) else 0.0
+        tertiary_pct = float(row['Tertiary_%']) if pd.notna(row['Tertiary_%']) else 0.0
+        primary_pct = float(row['Primary_%']) if pd.notna(row['Primary_%']) else 0.0
+        secondary_pct = float(row['Secondary_%']) if pd.notna(row['Secondary_%']) else 0.0
+
+        for sector, pct in [('Primary', primary_pct), ('Secondary', secondary_pct),
+                            ('Tertiary', tertiary_pct - tourism_pct), ('Tourism', tourism_pct)]:
+            stacked_records.append({'country': row['country'], 'sector': sector, 'percentage': round(pct, 2)})
+
+    return {
+        'metadata': {
+            'title': '100% Stacked Bar: Economic Sector Composition by Country',
+            'description': 'Distribution of economic sectors (Primary, Secondary, Tertiary, Tourism) for highlighted conflict countries',
+            'source': 'World Bank + ACLED',
+            'date_range': '2015-2024',
+            'note': 'Tourism is shown separately but is part of Tertiary sector. Bars total 100%. Only showing the 7 highlighted countries from Viz 1.'
+        },
+        'countries': stacked_data['country'].tolist(),
+        'data': stacked_records
+    }
+
+
+def build_viz3(frame, ctx):
+    """Viz 3: Grouped bar - event types of the highlighted countries"""
+    pivot_df = frame.pivot(index='country', columns='event_type', values='event_count').fillna(0)
+    pivot_df = pivot_df[pivot_df.index.isin(HIGHLIGHTED_COUNTRIES)]
+    pivot_df['Protests & Riots'] = pivot_df['Protests'] + pivot_df['Riots']
+
+    viz3_columns = ['Battles', 'Explosions/Remote violence', 'Protests & Riots', 'Violence against civilians']
+    pivot_df = pivot_df[viz3_columns]
+    pivot_df['sort_order'] = pivot_df.index.map({country: i for i, country in enumerate(HIGHLIGHTED_COUNTRIES)})
+    pivot_df = pivot_df.sort_values('sort_order').drop(columns=['sort_order']).reset_index()
+    for col in viz3_columns:
+        pivot_df[col] = pivot_df[col].astype(int)
+
+    return {
+        "metadata": {
+            "title": "Event Types by Country (2015-2024)",
+            "description": "Distribution of ACLED event types across the 7 highlighted countries",
+            "source": "ACLED",
+            "date_range": "2015-2024",
+            "note": "Protests & Riots combined. Strategic developments excluded. Same 7 countries as viz2."
+        },
+        "data": pivot_df.to_dict('records')
+    }
+
+
+def build_viz4(frame, ctx):
+    """Viz 4: Heatmap - event types x years"""
+    heatmap_data = frame.copy()
+    heatmap_data['year'] = heatmap_data['year'].astype(int)
+    heatmap_data['event_count'] = heatmap_data['event_count'].astype(int)
+    heatmap_data['total_fatalities'] = heatmap_data['total_fatalities'].astype(int)
+
+    return {
+        'metadata': {
+            'title': 'Heatmap: Event Types by Year (2015-2024)',
+            'description': 'Temporal distribution of ACLED event types showing both event counts and fatalities',
+            'source': 'ACLED',
+            'date_range': f"{heatmap_data['year'].min()}-{heatmap_data['year'].max()}",
+            'note': 'Color intensity based on event_count, fatalities included for additional context'
+        },
+        'data': heatmap_data.to_dict('records')
+    }
+
+
+def build_viz5(frame, ctx):
+    """Viz 5: Waffle chart - event-weighted sector composition per event type"""
+    econ_latest = _latest_economics(ctx['economics'])
+    df_events_econ = join_countries(
+        frame, econ_latest[['Country', 'Primary_%', 'Secondary_%', 'Tertiary_%']], 'country', 'Country', 'acled', 'un_sna'
+    )
+    df_events_econ = df_events_econ[
+        df_events_econ['Primary_%'].notna() &
+        df_events_econ['Secondary_%'].notna() &
+        df_events_econ['Tertiary_%'].notna() &
+        (df_events_econ['event_type'] != 'Strategic developments')
+    ]
+    country_event_counts = df_events_econ.groupby(['event_type', 'country'], observed=True).agg({
+        'event_count': 'sum',
+        'Primary_%': 'first',
+        'Secondary_%': 'first',
+        'Tertiary_%': 'first'
+    }).reset_index()
+
+    waffle_data = []
+    for event_type in country_event_counts['event_type'].unique():
+        event_df = country_event_counts[country_event_counts['event_type'] == event_type]
+        total_events = event_df['event_count'].sum()
+        weight = event_df['event_count'] / total_events
+
+        primary_weighted = (event_df['Primary_%'] * weight).sum()
+        secondary_weighted = (event_df['Secondary_%'] * weight).sum()
+        tertiary_weighted = (event_df['Tertiary_%'] * weight).sum()
+
+        total_pct = primary_weighted + secondary_weighted + tertiary_weighted
+        waffle_data.append({
+            'event_type': event_type,
+            'event_count': int(total_events),
+            'primary_pct': round((primary_weighted / total_pct) * 100, 2),
+            'secondary_pct': round((secondary_weighted / total_pct) * 100, 2),
+            'tertiary_pct': round((tertiary_weighted / total_pct) * 100, 2)
+        })
+
+    waffle_df = pd.DataFrame(waffle_data).sort_values('primary_pct', ascending=False).reset_index(drop=True)
+    waffle_df['total_pct'] = waffle_df['primary_pct'] + waffle_df['secondary_pct'] + waffle_df['tertiary_pct']
+
+    waffle_records = []
+    for _, row in waffle_df.iterrows():
+        waffle_records.append({
+            'event_type': row['event_type'],
+            'event_count': int(row['event_count']),
+            'sectors': [
+                {'sector': 'Primary', 'percentage': float(row['primary_pct'])},
+                {'sector': 'Secondary', 'percentage': float(row['secondary_pct'])},
+                {'sector': 'Tertiary', 'percentage': float(row['tertiary_pct'])}
+            ],
+            'total_percentage': float(row['total_pct'])
+        })
+
+    return {
+        'metadata': {
+            'title': 'Waffle Chart: Economic Sector Composition by Event Type',
+            'description': 'Weighted average economic sector distribution for countries experiencing each type of conflict event',
+            'source': 'ACLED + World Bank',
+            'date_range': f"{ctx['start_year']}-{ctx['current_year']}",
+            'note': 'Percentages are WEIGHTED by event frequency per country. Countries with more events of a type have proportionally more influence on the average. Tourism sector removed. NaN values excluded. Strategic developments excluded. Sorted by Primary sector percentage.'
+        },
+        'data': waffle_records
+    }
+
+
+# Stream chart categories (Protests + Riots combined, Explosions/Strategic into Other)
+STREAM_EVENT_CATEGORIES = {
+    'Protests': 'Protests & Riots',
+    'Riots': 'Protests & Riots',
+    'Battles': 'Battles',
+    'Explosions/Remote violence': 'Other',
+    'Violence against civilians': 'Violence against civilians',
+    'Strategic developments': 'Other'
+}
+
+
+def create_stream_records(stream_data):
+    """
+    Convert long-format stream data to stream chart records with tooltip data.
+
+    stream_data has one row per country, year_month and event_category with
+    event_count and fatalities. Returns {country: records}, where each
+    country's records cover the event categories it has data for. Totals,
+    percentages and fatality rates are computed for all countries at once.
+    """
+    keys = ['country', 'year_month']
+    counts = stream_data.pivot(index=keys, columns='event_category', values='event_count')
+    fatal = stream_data.pivot(index=keys, columns='event_category', values='fatalities')
+    present = counts.notna().groupby(level='country', observed=True).any()
+    counts = counts.fillna(0).astype(int)
+    fatal = fatal.fillna(0).astype(int)
+
+    total_events = counts.sum(axis=1)
+    total_fatalities = fatal.sum(axis=1)
+    # NaN where the denominator is zero; those fields are written as 0
+    pct = counts.div(total_events.where(total_events > 0), axis=0) * 100
+    fatality_rate = fatal / counts.where(counts > 0)
+
+    def rounded(values, digits):
+        return [round(v, digits) if v == v else 0 for v in values.tolist()]
+
+    records = {}
+    for country in present.index:
+        event_cols = [col for col in counts.columns if present.at[country, col]]
+        fields = {'date': [str(ym) for ym in counts.loc[country].index]}
+        for event_type in event_cols:
+            fields[event_type] = counts.loc[country, event_type].tolist()
+        for event_type in event_cols:
+            fields[f'{event_type}_fatalities'] = fatal.loc[country, event_type].tolist()
+        fields['_total_events'] = total_events.loc[country].tolist()
+        fields['_total_fatalities'] = total_fatalities.loc[country].tolist()
+        for event_type in event_cols:
+            fields[f'{event_type}_pct'] = rounded(pct.loc[country, event_type], 1)
+            fields[f'{event_type}_fatality_rate'] = rounded(fatality_rate.loc[country, event_type], 2)
+
+        names = list(fields)
+        records[country] = [dict(zip(names, row)) for row in zip(*fields.values())]
+
+    return records
+
+
+def build_viz6(frame, ctx):
+    """Viz 6: Stream charts - monthly conflict timeline for Mexico and India"""
+    df = frame.copy()
+    df['year_month'] = df['year'].astype(str) + '-' + df['month'].astype(str).str.zfill(2)
+    df['event_category'] = df['event_type'].map(STREAM_EVENT_CATEGORIES)
+    stream_data_combined = df.groupby(['country', 'year_month', 'event_category'], observed=True).agg({
+        'event_count': 'sum',
+        'fatalities': 'sum'
+    }).reset_index()
+
+    records = create_stream_records(stream_data_combined)
+
+    return {
+        'metadata': {
+            'title': 'Violence in Mexico and India: Timeline Comparison (2018-2024)',
+            'description': 'Stream charts comparing conflict types and intensity in Mexico and India before, during, and after COVID-19',
+            'source': 'ACLED',
+            'date_range': f"{ctx['start_year']}-{ctx['current_year']}",
+            'countries': ['Mexico', 'India'],
+            'event_categories': sorted(set(stream_data_combined['event_category'].unique())),
+            'tooltip_fields': {
+                'counts': 'Direct event category values (e.g., "Battles")',
+                'fatalities': 'Event category with _fatalities suffix (e.g., "Battles_fatalities")',
+                'percentages': 'Event category with _pct suffix (e.g., "Battles_pct")',
+                'fatality_rate': 'Event category with _fatality_rate suffix (e.g., "Battles_fatality_rate")',
+                'totals': '_total_events and _total_fatalities fields'
+            },
+            'notes': [
+                'Data aggregated monthly (YYYY-MM format)',
+                'Protests and Riots combined into single category',
+                'Explosions/Remote violence and Strategic developments combined into Other category',
+                'Pre-COVID period: 2018-2019',
+                'COVID period: 2020-2021',
+                'Post-COVID period: 2022-2024',
+                'Tooltip data includes: fatalities, percentages, and fatality rates per event type'
+            ]
+        },
+        'mexico': records.get('Mexico', []),
+        'india': records.get('India', [])
+    }
+
+
+def build_viz7(econ, ctx):
+    """Viz 7: Choropleth maps - latest primary sector share and GDP per capita"""
+    df_econ = econ.rename(columns=str.lower)
+    df_econ = df_econ.sort_values('year').groupby('country').last().reset_index()
+    df_econ['gdp_per_capita'] = df_econ['gdp_usd'] / df_econ['population']
+
+    df_viz = df_econ[['country', 'year', 'primary_%', 'gdp_usd', 'gdp_per_capita']].rename(columns={"primary_%": "primary"})
+    df_viz = df_viz[df_viz['gdp_usd'].notna() & df_viz['primary'].notna()].copy()
+    # Names as the map topology spells them (see country_registry.COUNTRY_ALIASES)
+    df_viz['country'] = rename_countries(df_viz['country'], 'un_sna', 'topology')
+
+    # Add duplicate rows for territories that share data
+    for source_country, territory in [("Somalia", "Somaliland"), ("Cyprus", "N. Cyprus")]:
+        territory_rows = df_viz[df_viz['country'] == source_country].copy()
+        territory_rows['country'] = territory
+        df_viz = pd.concat([df_viz, territory_rows], ignore_index=True)
+
+    return {
+        'metadata': {
+            'title': 'Maps',
+            'description': '',
+            'source': 'World Bank',
+            'date_range': '>= 2024',
+            'notes': ''
+        },
+        'data': df_viz.to_dict(orient='records')
+    }
+
+
+def build_viz8(frame, ctx):
+    """Viz 8: Bubble map - fatalities and event type breakdown for every country"""
+    country_conflict = frame.groupby('country', observed=True).agg({
+        'event_count': 'sum',
+        'fatalities': 'sum'
+    }).reset_index()
+    country_conflict.columns = ['country', 'event_count', 'total_fatalities']
+
+    event_pivot = frame.pivot(index='country', columns='event_type', values='event_count').fillna(0).astype(int)
+    country_conflict = country_conflict.merge(event_pivot.reset_index(), on='country', how='left')
+
+    # Only countries with at least 1 fatality (to make bubbles meaningful)
+    country_conflict = country_conflict[country_conflict['total_fatalities'] > 0].copy()
+    country_conflict['event_count'] = country_conflict['event_count'].astype(int)
+    country_conflict['total_fatalities'] = country_conflict['total_fatalities'].astype(int)
+
+    rename_cols = {
+        'Battles': 'battles',
+        'Explosions/Remote violence': 'explosions',
+        'Protests': 'protests',
+        'Riots': 'riots',
+        'Strategic developments': 'strategic',
+        'Violence against civilians': 'violence_civilians'
+    }
+    country_conflict = country_conflict.rename(columns=rename_cols)
+    for col in rename_cols.values():
+        if col in country_conflict.columns:
+            country_conflict[col] = country_conflict[col].fillna(0).astype(int)
+
+    return {
+        'metadata': {
+            'title': 'Bubble Map: Conflict Fatalities by Country (2015-2024)',
+            'description': 'All countries with recorded conflict fatalities',
+            'source': 'ACLED',
+            'date_range': f"{ctx['start_year']}-{ctx['current_year']}",
+            'notes': 'Includes all countries with at least 1 fatality'
+        },
+        'data': country_conflict.to_dict(orient='records')
+    }
+
+
+def build_viz9(_, ctx):
+    """Viz 9: Intervention flow map from UCDP BattleDeaths"""
+    from process_interventions import build_intervention_flows
+    return build_intervention_flows()
+
+
+SANKEY_FLOW_KEYS = ['actor1', 'inter1', 'country', 'event_type']
+# Actors per actor type in the viz10 Sankey. viz10 is not an engine spec: it needs each flow's
+# event dates, so scripts/regenerate_sankey_with_dates.py builds it (the pipeline's sankey-dates step)
+SANKEY_TOP_ACTORS = 10
+
+
+def sankey_flow_grain(events):
+    """Aggregate ACLED events to the (flow keys, sub_event_type, year) grain the Sankey builders use"""
+    events = events.dropna(subset=SANKEY_FLOW_KEYS)
+    return events.groupby(SANKEY_FLOW_KEYS + ['sub_event_type', 'year'], observed=True).agg(
+        events=('year', 'size'),
+        fatalities=('fatalities', 'sum')
+    ).reset_index()
+
+
+def select_top_actors(actor_stats, top_n=SANKEY_TOP_ACTORS):
+    """
+    Top actors of each actor type by total_events, as {inter1: [actor1, ...]}.
+
+    actor_stats has one row per (inter1, actor1). Ties go by actor name, like
+    acled_actor_stats.top_actors_by_type, so both selections pick the same actors.
+    """
+    ranked = actor_stats.sort_values(['inter1', 'total_events', 'actor1'], ascending=[True, False, True],
+                                     kind='stable')
+    top = ranked.groupby('inter1', observed=True, sort=False).head(top_n)
+    return {actor_type: actors.tolist() for actor_type, actors in top.groupby('inter1', observed=True)['actor1']}
+
+
+def aggregate_sankey_flows(grain, actors):
+    """
+    Actor -> country -> event type flows of the selected actors.
+
+    grain is a sankey_flow_grain frame. Returns one row per flow with events,
+    fatalities, the most frequent sub event type (ties resolved alphabetically,
+    like Series.mode), the sorted years and the per-year breakdown dict, all
+    split out of a single (flow keys, year) groupby.
+    """
+    selected = grain[grain['actor1'].isin(actors)]
+
+    by_year = selected.groupby(SANKEY_FLOW_KEYS + ['year'], observed=True)[['events', 'fatalities']].sum().reset_index()
+    per_flow = by_year.groupby(SANKEY_FLOW_KEYS, observed=True, sort=False)
+    flows = per_flow[['events', 'fatalities']].sum().reset_index()
+
+    sub_events = selected.groupby(SANKEY_FLOW_KEYS + ['sub_event_type'], observed=True)['events'].sum().reset_index()
+    sub_events = sub_events.sort_values(SANKEY_FLOW_KEYS + ['events', 'sub_event_type'],
+                                        ascending=[True] * len(SANKEY_FLOW_KEYS) + [False, True])
+    sub_events = sub_events.drop_duplicates(SANKEY_FLOW_KEYS)[SANKEY_FLOW_KEYS + ['sub_event_type']]
+    flows = flows.merge(sub_events, on=SANKEY_FLOW_KEYS, how='left')
+
+    # by_year is sorted by flow then year, so each flow's years are one contiguous slice
+    ends = per_flow.size().to_numpy().cumsum()
+    starts = ends - per_flow.size().to_numpy()
+    years = by_year['year'].astype(int).tolist()
+    year_keys = [str(year) for year in years]
+    year_values = [
+        {'events': events, 'fatalities': fatalities}
+        for events, fatalities in zip(by_year['events'].astype(int).tolist(), by_year['fatalities'].astype(int).tolist())
+    ]
+    flows['years'] = [years[start:end] for start, end in zip(starts, ends)]
+    flows['year_breakdown'] = [dict(zip(year_keys[start:end], year_values[start:end])) for start, end in zip(starts, ends)]
+    return flows
+
+
+def sankey_flow_dates(events, flows):
+    """
+    Sorted event dates ('%Y-%m-%d', one entry per event) of each flow, aligned with flows.
+
+    events are the raw events behind flows (flow keys and event_date).
+    """
+    per_date = events.groupby(SANKEY_FLOW_KEYS + ['event_date'], observed=True).size()
+    dates = per_date.index.get_level_values('event_date').strftime('%Y-%m-%d').to_numpy()
+    dates = dates.repeat(per_date.to_numpy()).tolist()
+
+    # per_date is sorted by flow then date, in the same flow order as flows
+    ends = flows['events'].astype(int).to_numpy().cumsum()
+    starts = ends - flows['events'].astype(int).to_numpy()
+    return [dates[start:end] for start, end in zip(starts, ends)]
+
+
+# Compact per-flow event dates (see sankey_flow_day_runs); decoded by decodeFlowDates in SankeyChart.vue
+SANKEY_DATE_ENCODING = {
+    'format': 'day-runs',
+    'fields': {
+        'date_days': 'Event days, delta-encoded: the first value is days since base_date, '
+                     'each next value days since the previous one',
+        'date_counts': 'Events on each day of date_days; omitted when every day has one event'
+    }
+}
+
+
+def sankey_flow_day_runs(events, flows, base_date):
+    """
+    Event dates of each flow as day runs, aligned with flows.
+
+    Returns (date_days, date_counts): per flow, the distinct event days as
+    delta-encoded offsets from base_date, and the events per day (None when
+    all are 1). Decoding repeats each day date_counts times, which gives
+    back the sankey_flow_dates list.
+    """
+    per_date = events.groupby(SANKEY_FLOW_KEYS + ['event_date'], observed=True).size()
+    days = ((per_date.index.get_level_values('event_date') - base_date).days).to_numpy()
+    counts = per_date.to_numpy()
+
+    # per_date is sorted by flow then date, in the same flow order as flows
+    sizes = per_date.groupby(level=SANKEY_FLOW_KEYS, observed=True, sort=False).size().to_numpy()
+    ends = sizes.cumsum()
+    starts = ends - sizes
+    deltas = np.diff(days, prepend=0)
+    deltas[starts] = days[starts]
+    has_repeats = np.maximum.reduceat(counts, starts) > 1
+
+    deltas = deltas.tolist()
+    counts = counts.tolist()
+    date_days = [deltas[start:end] for start, end in zip(starts, ends)]
+    date_counts = [counts[start:end] if repeats else None for start, end, repeats in zip(starts, ends, has_repeats)]
+    return date_days, date_counts
+
+
+def sankey_actor_stats(flows):
+    """
+    Per actor type and actor: events, fatalities and per-country breakdown of the flows.
+
+    Shape: {inter1: {actor1: {'events', 'fatalities', 'countries': {country: {'events', 'fatalities'}}}}},
+    so the frontend looks actors up instead of re-aggregating every flow.
+    """
+    by_country = flows.groupby(['inter1', 'actor1', 'country'], observed=True)[['events', 'fatalities']].sum().reset_index()
+    stats = {}
+    for row in by_country.itertuples(index=False):
+        actor = stats.setdefault(row.inter1, {}).setdefault(row.actor1, {'events': 0, 'fatalities': 0, 'countries': {}})
+        actor['events'] += int(row.events)
+        actor['fatalities'] += int(row.fatalities)
+        actor['countries'][row.country] = {'events': int(row.events), 'fatalities': int(row.fatalities)}
+    return stats
+
+
+def sankey_dataset(grain, top_n=SANKEY_TOP_ACTORS, dates=None, date_encoding='strings', actors_by_type=None):
+    """
+    Actor Sankey dataset (viz10) from a sankey_flow_grain frame.
+
+    actors_by_type is a precomputed {inter1: [actor1, ...]} selection (e.g.
+    acled_actor_stats.top_actors_by_type); by default the top_n actors of each
+    type are selected from grain.
+
+    dates, when given, are the raw events (flow keys and event_date) used to
+    add each flow's exact event dates and the overall date range. With
+    date_encoding='strings' each flow gets a 'dates' list with one
+    '%Y-%m-%d' string per event; with 'day-runs' it gets the compact
+    date_days/date_counts fields described in metadata.date_encoding.
+    """
+    if date_encoding not in ('strings', 'day-runs'):
+        raise ValueError(f'Unknown date encoding: {date_encoding}')
+
+    if actors_by_type is None:
+        actor_stats = grain.groupby(['inter1', 'actor1'], observed=True).agg(
+            total_events=('events', 'sum'),
+            fatalities=('fatalities', 'sum')
+        ).reset_index()
+        actors_by_type = select_top_actors(actor_stats, top_n)
+    all_selected_actors = [actor for actors in actors_by_type.values() for actor in actors]
+
+    flows = aggregate_sankey_flows(grain, all_selected_actors)
+    years = grain.loc[grain['actor1'].isin(all_selected_actors), 'year']
+    if dates is not None:
+        dates = dates[dates['actor1'].isin(all_selected_actors)].dropna(subset=SANKEY_FLOW_KEYS)
+        base_date = dates['event_date'].min()
+        if date_encoding == 'strings':
+            flows['dates'] = sankey_flow_dates(dates, flows)
+        else:
+            flows['date_days'], flows['date_counts'] = sankey_flow_day_runs(dates, flows, base_date)
+
+    flows_list = []
+    for row in flows.itertuples(index=False):
+        flow = {
+            'actor': row.actor1,
+            'actor_type': row.inter1,
+            'country': row.country,
+            'event_type': row.event_type,
+            'sub_event_type': row.sub_event_type,
+            'events': int(row.events),
+            'fatalities': int(row.fatalities),
+            'years': row.years,
+        }
+        if dates is not None and date_encoding == 'strings':
+            flow['dates'] = row.dates
+        elif dates is not None:
+            flow['date_days'] = row.date_days
+            if row.date_counts is not None:
+                flow['date_counts'] = row.date_counts
+        flow['year_breakdown'] = row.year_breakdown
+        flows_list.append(flow)
+
+    metadata = {
+        'created_date': datetime.now().isoformat(),
+        'source': ACLED_CSV.name,
+        'total_actors': len(all_selected_actors),
+        'total_flows': len(flows_list),
+        'year_range': [int(years.min()), int(years.max())],
+    }
+    if dates is not None:
+        metadata['date_range'] = [base_date.strftime('%Y-%m-%d'), dates['event_date'].max().strftime('%Y-%m-%d')]
+        if date_encoding == 'day-runs':
+            metadata['date_encoding'] = {'base_date': metadata['date_range'][0], **SANKEY_DATE_ENCODING}
+    metadata['fatality_stats'] = {
+        'min': int(flows['fatalities'].min()),
+        'max': int(flows['fatalities'].max()),
+        'mean': float(flows['fatalities'].mean()),
+        'median': float(flows['fatalities'].median()),
+        'q25': float(flows['fatalities'].quantile(0.25)),
+        'q75': float(flows['fatalities'].quantile(0.75))
+    }
+    metadata['event_stats'] = {
+        'min': int(flows['events'].min()),
+        'max': int(flows['events'].max()),
+        'mean': float(flows['events'].mean()),
+        'median': float(flows['events'].median())
+    }
+
+    return {
+        'metadata': metadata,
+        'actor_types': actors_by_type,
+        'actor_stats': sankey_actor_stats(flows),
+        'flows': flows_list
+    }
+
+
+# Shared last-10-years measures of the country-level charts
+COUNTRY_MEASURES = {'event_count': (None, 'size'), 'total_fatalities': ('fatalities', 'sum')}
+
+VIZ_SPECS = [
+    {
+        'name': 'viz1',
+        'source': 'acled',
+        'years': (-9, 0),
+        'keys': ['country', 'year'],
+        'measures': COUNTRY_MEASURES,
+        'inputs': ['economics'],
+        'post': build_viz1,
+        'output': 'viz1_bar_chart_sectors_conflicts.json',
+    },
+    {
+        'name': 'viz2',
+        'source': 'acled',
+        'years': (-9, 0),
+        'keys': ['country', 'year'],
+        'measures': COUNTRY_MEASURES,
+        'inputs': ['economics'],
+        'post': build_viz2,
+        'output': 'viz2_stacked_bar_sectors.json',
+    },
+    {
+        'name': 'viz3',
+        'source': 'acled',
+        'years': (-9, 0),
+        'keys': ['country', 'event_type'],
+        'measures': {'event_count': (None, 'size')},
+        'post': build_viz3,
+        'output': 'viz3_event_types.json',
+        'ensure_ascii': True,
+    },
+    {
+        'name': 'viz4',
+        'source': 'acled',
+        'years': (-9, 0),
+        'keys': ['year', 'event_type'],
+        'measures': COUNTRY_MEASURES,
+        'post': build_viz4,
+        'output': 'viz4_heatmap_event_types_years.json',
+    },
+    {
+        'name': 'viz5',
+        'source': 'acled',
+        'years': (-9, 0),
+        'keys': ['country', 'event_type'],
+        'measures': {'event_count': (None, 'size')},
+        'inputs': ['economics'],
+        'post': build_viz5,
+        'output': 'viz5_waffle_sectors_by_event_type.json',
+    },
+    {
+        'name': 'viz6',
+        'source': 'acled',
+        'years': (-6, 0),
+        'countries': ['Mexico', 'India'],
+        'keys': ['country', 'year', 'month', 'event_type'],
+        'measures': {'event_count': (None, 'size'), 'fatalities': ('fatalities', 'sum')},
+        'post': build_viz6,
+        'output': 'viz6_stream_mexico_india_timeline.json',
+    },
+    {
+        'name': 'viz7',
+        'source': 'economics',
+        'post': build_viz7,
+        'output': 'viz7_maps.json',
+        'precision': MAP_VALUE_PRECISION,
+    },
+    {
+        'name': 'viz8',
+        'source': 'acled',
+        'years': (-9, 0),
+        'keys': ['country', 'event_type'],
+        'measures': {'event_count': (None, 'size'), 'fatalities': ('fatalities', 'sum')},
+        'post': build_viz8,
+        'output': 'viz8_bubble_map_fatalities.json',
+        'columnar': ['data'],
+        'binary': True,
+    },
+    {
+        'name': 'viz9',
+        'source': 'ucdp',
+        'post': build_viz9,
+        'output': 'viz9_intervention_flows.json',
+        'columnar': ['flows'],
+        'binary': True,
+        'ensure_ascii': True,
+    },
+]
@@ -0,0 +1,94 @@
+import publishManifest from '@/assets/data/manifest.json'
+
+// Loader contract for viz datasets (written by data-processing/viz_output.py).
+// A record list is either a plain array of objects or a columnar table:
+//   { layout: 'columnar', length: n,
+//     columns: { field: [value, ...] },          // one array of length n per field
+//     dictionaries: { field: [distinct, ...] } } // fields whose values are indices into this list
+// Dictionary-encoded columns keep null as null (-1 in binary datasets).
+
+// Value of a column cell as it was in the records
+function cellDecoder(table, field) {
+  const dictionary = table.dictionaries?.[field]
+  if (dictionary) return i => (i === null || i < 0 ? null : dictionary[i])
+  const type = table.types?.[field]
+  if (type === 'float64') return v => (Number.isNaN(v) ? null : v)
+  if (type === 'uint8') return v => v === 1
+  return null
+}
+
+// Records of a dataset field in either layout (empty array when the field is missing)
+export function tableRows(table) {
+  if (Array.isArray(table)) return table
+  if (!table || table.layout !== 'columnar') return []
+
+  const fields = Object.keys(table.columns)
+  const columns = fields.map(field => {
+    const values = table.columns[field]
+    const decode = cellDecoder(table, field)
+    return decode ? Array.from(values, decode) : values
+  })
+
+  const rows = new Array(table.length)
+  for (let r = 0; r < table.length; r++) {
+    const row = {}
+    for (let c = 0; c < fields.length; c++) row[fields[c]] = columns[c][r]
+    rows[r] = row
+  }
+  return rows
+}
+
+// Typed-array binary of a dataset (the .bin file written next to the JSON file
+// for specs that set 'binary': True):
+//   'VIZB' | uint32 header length (little-endian) | JSON header | column buffers
+// Top-level fields that are not record lists come back as they are. Record lists come back
+// as columnar tables whose numeric columns are typed arrays viewing the fetched buffer (no
+// per-record objects): int32 -> Int32Array, float64 -> Float64Array (NaN for null),
+// uint8 booleans -> Uint8Array, strings -> Int32Array indices into table.dictionaries.
+// table.types names each column's type; tableRows() turns a table into records when needed.
+export function decodeVizBinary(buffer) {
+  const bytes = new Uint8Array(buffer)
+  if (String.fromCharCode(...bytes.subarray(0, 4)) !== 'VIZB') throw new Error('Not a viz binary dataset')
+  const headerLength = new DataView(buffer).getUint32(4, true)
+  const header = JSON.parse(new TextDecoder().decode(bytes.subarray(8, 8 + headerLength)))
+  const dataStart = 8 + headerLength
+
+  const dataset = { ...header.fields }
+  for (const [name, table] of Object.entries(header.tables)) {
+    const columns = {}
+    const dictionaries = {}
+    const types = {}
+    for (const column of table.columns) {
+      const offset = dataStart + column.offset
+      types[column.name] = column.type
+      if (column.type === 'int32' || column.type === 'dictionary') {
+        columns[column.name] = new Int32Array(buffer, offset, table.length)
+      } else if (column.type === 'float64') {
+        columns[column.name] = new Float64Array(buffer, offset, table.length)
+      } else if (column.type === 'uint8') {
+        columns[column.name] = new Uint8Array(buffer, offset, table.length)
+      } else {
+        columns[column.name] = column.values
+      }
+      if (column.dictionary) dictionaries[column.name] = column.dictionary
+    }
+    dataset[name] = { layout: 'columnar', length: table.length, columns, dictionaries, types }
+  }
+  return dataset
+}
+
+// URL of a published dataset file with its content hash appended, so browsers refetch it only
+// after it changed (hashes from manifest.json, written by data-processing/publish.py)
+export function datasetUrl(url, file) {
+  const hash = publishManifest.files?.[file]?.sha256
+  return hash ? `${url}${url.includes('?') ? '&' : '?'}v=${hash.slice(0, 12)}` : url
+}
+
+// Fetch and decode a binary dataset:
+//   import flowsUrl from '@/assets/data/viz9_intervention_flows.bin?url'
+//   const flowData = await loadVizBinary(datasetUrl(flowsUrl, 'viz9_intervention_flows.bin'))
+export async function loadVizBinary(url) {
+  const response = await fetch(url)
+  if (!response.ok) throw new Error(`Failed to load ${url}: ${response.status}`)
+  return decodeVizBinary(await response.arrayBuffer())
+}
@@ -1,49 +1,48 @@
-import pandas as pd
-from collections import Counter, defaultdict
+import sys
+from pathlib import Path
 
-# Load the ACLED data
-print("Loading data...")
-df = pd.read_csv('data-processing/raw-data/ACLED/ACLED_2025-10-29.csv')
-print(f"Loaded {len(df):,} rows")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'data-processing'))
+from acled_actor_stats import actor_totals, country_breakdown, load_actor_stats
 
-# Get unique actor types
-actor_types = df['inter1'].unique()
+# Load the actor statistics index (python acled_actor_stats.py build)
+print("Loading actor index...")
+stats = load_actor_stats()
+print(f"Loaded {len(stats):,} index rows ({stats['events'].sum():,} events)")
+
+# Top 15 actors per type, and the countries of every actor, from one pass over the index each
+totals = actor_totals(stats)
+top = totals.groupby('inter1', sort=False).head(15)
+countries_by_actor = {
+    key: group for key, group in country_breakdown(stats).groupby(['inter1', 'actor_id'], sort=False)
+}
+events_by_type = stats.groupby('inter1')['events'].sum()
 
 md_lines = ["# ACLED Actors by Type - Country Analysis\n\n"]
 
-for actor_type in sorted(actor_types):
+for actor_type, type_top in top.groupby('inter1', sort=True):
     md_lines.append(f"## {actor_type}\n\n")
 
-    # Filter to this actor type
-    type_df = df[df['inter1'] == actor_type]
-
-    # Get top 15 most common actors of this type
-    actor_counts = type_df['actor1'].value_counts().head(15)
-
-    md_lines.append(f"**Total events:** {len(type_df):,}\n\n")
+    md_lines.append(f"**Total events:** {events_by_type[actor_type]:,}\n\n")
     md_lines.append("| Actor | Events | Countries | Top Countries |\n")
     md_lines.append("|-------|--------|-----------|---------------|\n")
 
-    for actor, event_count in actor_counts.items():
-        # Get countries this actor operates in
-        actor_df = type_df[type_df['actor1'] == actor]
-        countries = actor_df['country'].value_counts()
+    for row in type_top.itertuples(index=False):
+        # Countries this actor operates in, most events first
+        countries = countries_by_actor[(actor_type, row.actor_id)]
         num_countries = len(countries)
 
         # Top 5 countries
         top_countries = countries.head(5)
-        if num_countries <= 5:
-            country_str = ", ".join([f"{c} ({n:,})" for c, n in top_countries.items()])
-        else:
-            country_str = ", ".join([f"{c} ({n:,})" for c, n in top_countries.items()])
+        country_str = ", ".join([f"{c} ({n:,})" for c, n in zip(top_countries['country'], top_countries['events'])])
+        if num_countries > 5:
             country_str += f" +{num_countries - 5} more"
 
         # Escape pipes and truncate if needed
-        actor_safe = actor.replace('|', '\\|')
+        actor_safe = row.actor.replace('|', '\\|')
         if len(actor_safe) > 50:
             actor_safe = actor_safe[:47] + "..."
 
-        md_lines.append(f"| {actor_safe} | {event_count:,} | {num_countries} | {country_str} |\n")
+        md_lines.append(f"| {actor_safe} | {row.total_events:,} | {num_countries} | {country_str} |\n")
 
     md_lines.append("\n---\n\n")
 
@@ -1,35 +1,32 @@
-import pandas as pd
-import re
-
-df = pd.read_csv('data-processing/raw-data/ACLED/ACLED_2025-10-29.csv', low_memory=False)
-
-# Get list of all countries in the dataset
-all_countries = set(df['country'].unique())
-
-# Extract country from actor names (usually in parentheses at the end)
-def extract_country(actor, valid_countries):
-    if pd.isna(actor):
-        return None
-    match = re.search(r'\(([^)]+)\)$', str(actor))
-    if match:
-        extracted = match.group(1)
-        # Only return if it's actually a country name
-        if extracted in valid_countries:
-            return extracted
-    return None
-
-# Check for events where actor's country differs from event country
-df['actor1_country'] = df['actor1'].apply(lambda x: extract_country(x, all_countries))
-df['actor2_country'] = df['actor2'].apply(lambda x: extract_country(x, all_countries))
-df['assoc1_country'] = df['assoc_actor_1'].apply(lambda x: extract_country(x, all_countries))
-df['assoc2_country'] = df['assoc_actor_2'].apply(lambda x: extract_country(x, all_countries))
+import numpy as np
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'data-processing'))
+from acled_actors import actor_ids, country_codes, home_country_codes, read_actor_dictionary
+from acled_store import load_acled
+
+df = load_acled(columns=['country', 'actor1', 'actor2', 'assoc_actor_1', 'assoc_actor_2'])
+
+# Actor dictionary: integer actor IDs with each actor string's home country (parenthesized, e.g. "(Sudan)")
+# resolved once (python acled_actors.py build)
+dictionary, countries = read_actor_dictionary()
+country_names = np.array(countries + [None], dtype=object)  # code -1 -> None
+
+# Country codes of the event location and of each actor's home country (-1 = none)
+event_country = country_codes(df['country'], countries)
+home = {
+    'actor1': home_country_codes(actor_ids(df['actor1'], dictionary), dictionary, countries),
+    'actor2': home_country_codes(actor_ids(df['actor2'], dictionary), dictionary, countries),
+    'assoc1': home_country_codes(actor_ids(df['assoc_actor_1'], dictionary), dictionary, countries),
+    'assoc2': home_country_codes(actor_ids(df['assoc_actor_2'], dictionary), dictionary, countries),
+}
 
 # Find cross-border events (actor from different country than event location)
-mask1 = (df['actor1_country'].notna()) & (df['actor1_country'] != df['country'])
-mask2 = (df['actor2_country'].notna()) & (df['actor2_country'] != df['country'])
-mask3 = (df['assoc1_country'].notna()) & (df['assoc1_country'] != df['country'])
-mask4 = (df['assoc2_country'].notna()) & (df['assoc2_country'] != df['country'])
-cross_border = df[mask1 | mask2 | mask3 | mask4]
+cross_border_mask = np.zeros(len(df), dtype=bool)
+for codes in home.values():
+    cross_border_mask |= (codes >= 0) & (codes != event_country)
+cross_border = df[cross_border_mask]
 
 print(f'Total events: {len(df):,}')
 print(f'Events with cross-border actors: {len(cross_border):,} ({100*len(cross_border)/len(df):.2f}%)')
@@ -38,26 +35,25 @@ print()
 # Show examples
 if len(cross_border) > 0:
     print('Examples of cross-border events:')
-    sample = cross_border[['country', 'actor1', 'actor1_country', 'actor2', 'actor2_country', 'assoc_actor_1', 'assoc1_country']].head(15)
-    for idx, row in sample.iterrows():
-        print(f"  Event in: {row['country']}")
-        if row['actor1_country'] and row['actor1_country'] != row['country']:
-            print(f"    Actor1: {row['actor1']} -> from {row['actor1_country']}")
-        if row['actor2_country'] and row['actor2_country'] != row['country']:
-            print(f"    Actor2: {row['actor2']} -> from {row['actor2_country']}")
-        if row['assoc1_country'] and row['assoc1_country'] != row['country']:
-            print(f"    Assoc Actor1: {row['assoc_actor_1']} -> from {row['assoc1_country']}")
+    sample = cross_border[['country', 'actor1', 'actor2', 'assoc_actor_1']].head(15).copy()
+    positions = np.flatnonzero(cross_border_mask)[:15]
+    for name in ['actor1', 'actor2', 'assoc1']:
+        sample[f'{name}_country'] = country_names[home[name][positions]]
+    for row in sample.itertuples(index=False):
+        print(f"  Event in: {row.country}")
+        if row.actor1_country and row.actor1_country != row.country:
+            print(f"    Actor1: {row.actor1} -> from {row.actor1_country}")
+        if row.actor2_country and row.actor2_country != row.country:
+            print(f"    Actor2: {row.actor2} -> from {row.actor2_country}")
+        if row.assoc1_country and row.assoc1_country != row.country:
+            print(f"    Assoc Actor1: {row.assoc_actor_1} -> from {row.assoc1_country}")
         print()
 
 # Also check: how many events have TWO different countries involved (actors from 2+ countries)
-df['countries_involved'] = df.apply(lambda row: set(filter(None, [
-    row['country'],
-    row['actor1_country'],
-    row['actor2_country'],
-    row['assoc1_country'],
-    row['assoc2_country']
-])), axis=1)
-df['num_countries'] = df['countries_involved'].apply(len)
+# Distinct non-negative codes per row: sort the five codes and count the changes
+involved = np.sort(np.column_stack([event_country, *home.values()]), axis=1)
+distinct = (involved[:, 1:] != involved[:, :-1]) & (involved[:, 1:] >= 0)
+df['num_countries'] = (involved[:, 0] >= 0).astype(int) + distinct.sum(axis=1)
 
 print(f"\nEvents by number of countries involved:")
 print(df['num_countries'].value_counts().sort_index())